@@ -0,0 +1,380 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+import requests
+from requests import RequestException
+
+import deadlines
+import engine
+import homework
+import metrics
+from botapi import TELEGRAM_API_URL, BotClient, bot_errors
+from breakers import CircuitBreaker
+from checkpoint import CheckpointStore
+from incidents import ErrorAggregator
+from logs import log_context
+from metrics import measure
+from outbox import Outbox
+from scheduler import jittered
+from tenants import load_tenants
+from transport import CONNECT_TIMEOUT, READ_TIMEOUT
+
+ASYNC_IN_FLIGHT = int(os.getenv('ASYNC_IN_FLIGHT', 1000))
+
+logger = homework.logger
+
+
+class Response:
+    """Прочитанный ответ aiohttp с интерфейсом ответа requests."""
+
+    def __init__(self, status_code, content):
+        """Запоминает код и тело ответа."""
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        """Разбирает тело ответа как JSON."""
+        return json.loads(self.content)
+
+
+class AsyncTransport:
+    """Асинхронный HTTP-транспорт на aiohttp с общим пулом соединений.
+
+    Аналог Transport для asyncio: таймауты соединения и чтения, не
+    больше pool_maxsize соединений с хостом и общие автоматы защиты
+    хостов; таймауты не выходят за срок итерации из deadlines. Ошибки
+    aiohttp превращаются в исключения requests, поэтому код поверх
+    транспорта обрабатывает их так же, как в синхронном режиме. aiohttp
+    загружается при первом запросе.
+    """
+
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, pool_maxsize=ASYNC_IN_FLIGHT,
+                 breakers=True):
+        """Создает транспорт; сессия откроется при первом запросе."""
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_maxsize = pool_maxsize
+        self.breakers = {} if breakers else None
+        self.session = None
+
+    async def get(self, url, **kwargs):
+        """Выполняет GET-запрос через пул соединений."""
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        """Выполняет POST-запрос через пул соединений."""
+        return await self.request('POST', url, **kwargs)
+
+    async def request(self, method, url, **kwargs):
+        """Выполняет запрос и возвращает прочитанный ответ."""
+        if deadlines.expired():
+            raise deadlines.exceeded()
+        breaker = self.breaker(url)
+        if breaker is None:
+            return await self._send(method, url, **kwargs)
+        generation = breaker.allow()
+        try:
+            response = await self._send(method, url, **kwargs)
+        except BaseException:
+            breaker.record(True, generation)
+            raise
+        breaker.record(breaker.failed(response.status_code), generation)
+        return response
+
+    def breaker(self, url):
+        """Возвращает автомат защиты хоста url или None."""
+        if self.breakers is None:
+            return None
+        host = urlsplit(url).netloc
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(host)
+        return breaker
+
+    async def close(self):
+        """Закрывает все соединения пула."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _send(self, method, url, **kwargs):
+        import aiohttp
+
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=self.connect_timeout,
+                    sock_read=self.read_timeout,
+                ),
+                connector=aiohttp.TCPConnector(
+                    limit=0, limit_per_host=self.pool_maxsize
+                ),
+            )
+        connect, read = deadlines.timeout(
+            self.connect_timeout, self.read_timeout
+        )
+        kwargs.setdefault('timeout', aiohttp.ClientTimeout(
+            total=deadlines.remaining(), sock_connect=connect, sock_read=read,
+        ))
+        try:
+            async with self.session.request(method, url, **kwargs) as answer:
+                return Response(answer.status, await answer.read())
+        except asyncio.TimeoutError as error:
+            if deadlines.expired():
+                raise deadlines.exceeded() from error
+            raise requests.Timeout(f'{method} {url}: таймаут') from error
+        except aiohttp.ClientError as error:
+            message = f'{method} {url}: {error}'
+            raise requests.ConnectionError(message) from error
+
+
+class AsyncBotClient(BotClient):
+    """Клиент Bot API поверх AsyncTransport.
+
+    send_message и call — сопрограммы, ошибки те же, что у BotClient.
+    """
+
+    def __init__(self, token, transport=None, base_url=TELEGRAM_API_URL):
+        """Создает клиент для бота с токеном token."""
+        super().__init__(
+            token, AsyncTransport() if transport is None else transport,
+            base_url,
+        )
+
+    async def call(self, method, **params):
+        """Вызывает метод Bot API и возвращает поле result ответа."""
+        try:
+            response = await self.transport.post(
+                self.url + method, json=params
+            )
+            data = response.json()
+        except (RequestException, ValueError) as error:
+            raise self.error(method, error) from error
+        return self.result(method, response, data)
+
+
+async def send_message(bot, message):
+    """Отправляет сообщение в Telegram."""
+    await send_chat_message(bot, homework.TELEGRAM_CHAT_ID, message)
+
+
+async def send_chat_message(bot, chat_id, message):
+    """Отправляет сообщение в указанный чат Telegram."""
+    logger.debug('Отправка сообщения в Telegram.')
+    with measure('send_message'):
+        try:
+            await bot.send_message(chat_id, message)
+        except bot_errors() as error:
+            raise IOError(
+                'Невозможно отправить сообщение в Telegram.'
+            ) from error
+    logger.info('Сообщение отправлено в Telegram: "%s"', message)
+
+
+async def get_api_answer(current_timestamp, transport=None):
+    """Выполняет запрос к API."""
+    return await fetch_api_answer(
+        current_timestamp, homework.PRACTICUM_TOKEN, transport
+    )
+
+
+async def fetch_api_answer(current_timestamp, practicum_token,
+                           transport=None):
+    """Выполняет запрос к API с токеном указанного пользователя.
+
+    Без транспорта запрос открывает и закрывает собственную сессию.
+    """
+    timestamp = current_timestamp or int(time.time())
+    if transport is not None:
+        response = await request_api(timestamp, practicum_token, transport)
+        return response.json()
+    transport = AsyncTransport(breakers=False)
+    try:
+        response = await request_api(timestamp, practicum_token, transport)
+    finally:
+        await transport.close()
+    return response.json()
+
+
+async def request_api(from_date, practicum_token, transport):
+    """Выполняет запрос к API и возвращает ответ с кодом 200."""
+    logger.debug('Выполнение запроса к API.')
+    with measure('get_api_answer'):
+        try:
+            params = {'from_date': from_date}
+            headers = {'Authorization': f'OAuth {practicum_token}'}
+            response = await transport.get(
+                homework.ENDPOINT, headers=headers, params=params
+            )
+            if response.status_code != HTTPStatus.OK:
+                raise RequestException(response=response)
+        except RequestException as error:
+            raise homework.api_error(error) from error
+    return response
+
+
+async def fetch_statuses(practicum_token, current_timestamp, transport=None,
+                         locale=None):
+    """Запрашивает и проверяет статусы работ.
+
+    Возвращает новую метку времени и список пар (работа, сообщение).
+    """
+    response = await fetch_api_answer(
+        current_timestamp, practicum_token, transport
+    )
+    return homework.parse_statuses(response, locale)
+
+
+class LoopBot:
+    """Синхронный интерфейс асинхронного бота для Outbox.
+
+    send_message вызывается из потоков Outbox, а сам запрос выполняется
+    в цикле событий loop. Так асинхронный режим использует те же
+    ограничения скорости и повторы по retry_after, что и синхронный.
+    """
+
+    def __init__(self, bot, loop):
+        """Запоминает асинхронный бот и его цикл событий."""
+        self.bot = bot
+        self.loop = loop
+
+    def send_message(self, chat_id, text):
+        """Отправляет сообщение в цикле событий и ждет результата."""
+        return asyncio.run_coroutine_threadsafe(
+            self.bot.send_message(chat_id, text), self.loop
+        ).result()
+
+
+async def poll_once(runtime, practicum_token, chat_id, current_timestamp,
+                    transport=None, checkpoint=None, locale=None):
+    """Выполняет один опрос API, как homework.poll_once.
+
+    Запрос к API асинхронный, а отправка сообщений и запись контрольной
+    точки выполняются homework.deliver_statuses в пуле потоков runtime,
+    чтобы SQLite и ожидание очереди сообщений не блокировали цикл
+    событий. Возвращает новую метку времени и список полученных работ.
+    """
+    current_date, statuses = await fetch_statuses(
+        practicum_token, current_timestamp, transport, locale
+    )
+    items = await runtime.call(
+        homework.deliver_statuses, runtime.bot, chat_id, current_date,
+        statuses, checkpoint,
+    )
+    return current_date, items
+
+
+async def poll_tenant(tenant, runtime, transport, limit, interval=None):
+    """Опрашивает API для пользователя каждые interval секунд.
+
+    limit — семафор, ограничивающий число опросов в полете. Первый опрос
+    откладывается на случайную долю интервала.
+    """
+    interval = homework.RETRY_TIME if interval is None else interval
+    checkpoint = None
+    cursor = None
+    if runtime.store is not None:
+        checkpoint = runtime.store.for_tenant(tenant.name)
+        cursor = await runtime.call(lambda: checkpoint.cursor)
+    current_timestamp = cursor or int(time.time())
+    incidents = ErrorAggregator()
+    await asyncio.sleep(random.uniform(0, interval))
+    while True:
+        with log_context(tenant=tenant.name):
+            try:
+                async with limit:
+                    with deadlines.deadline():
+                        current_timestamp, _ = await poll_once(
+                            runtime, tenant.practicum_token, tenant.chat_id,
+                            current_timestamp, transport, checkpoint,
+                            tenant.locale,
+                        )
+            except Exception as error:
+                logger.exception(error)
+                await engine.report_incident(
+                    tenant, runtime, incidents.record(error)
+                )
+            else:
+                await engine.report_incident(
+                    tenant, runtime, incidents.resolve()
+                )
+        await asyncio.sleep(jittered(interval))
+
+
+async def run(tenants, bot, transport, store=None, interval=None,
+              in_flight=ASYNC_IN_FLIGHT, concurrency=engine.MAX_CONCURRENCY):
+    """Опрашивает API для всех пользователей в одном цикле событий.
+
+    Каждый пользователь — отдельная задача, одновременно выполняется не
+    больше in_flight опросов. bot — синхронный бот, обычно Outbox поверх
+    LoopBot; отправка и контрольные точки выполняются в пуле из
+    concurrency потоков.
+    """
+    limit = asyncio.Semaphore(in_flight)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    runtime = engine.Runtime(bot, executor, store=store)
+    coroutines = [
+        poll_tenant(tenant, runtime, transport, limit, interval)
+        for tenant in tenants
+    ]
+    if store is not None:
+        coroutines.append(engine.flush_periodically(runtime))
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        executor.shutdown(wait=False)
+
+
+async def serve(tenants):
+    """Создает ресурсы процесса и опрашивает API до остановки."""
+    loop = asyncio.get_running_loop()
+    transport = AsyncTransport()
+    outbox = Outbox(LoopBot(
+        AsyncBotClient(homework.TELEGRAM_TOKEN, transport), loop
+    ))
+    store = CheckpointStore()
+    try:
+        await run(tenants, outbox, transport, store)
+    finally:
+        await loop.run_in_executor(None, outbox.close)
+        await transport.close()
+        store.close()
+
+
+def main():
+    """Запускает асинхронный опрос API для всех пользователей."""
+    tenants = load_tenants()
+    if not (homework.TELEGRAM_TOKEN and tenants):
+        message = (
+            'Не заданы TELEGRAM_TOKEN или список пользователей'
+            ' (TENANTS_FILE либо PRACTICUM_TOKEN и TELEGRAM_CHAT_ID).'
+            '\nПрограмма принудительно остановлена.'
+        )
+        logger.critical(message)
+        sys.exit(message)
+
+    logger.info(
+        'Запуск асинхронного опроса API для пользователей: %d.', len(tenants)
+    )
+    homework.renderer.load()
+    metrics.start_server()
+    try:
+        asyncio.run(serve(tenants))
+    except KeyboardInterrupt:
+        logger.info('Опрос остановлен.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import homework
+import streaming
+from botapi import BotClient
+from checkpoint import CHECKPOINT_PATH, CheckpointStore, homework_key
+from tenants import load_tenants
+from transport import Transport
+
+BACKFILL_PARALLEL = int(os.getenv('BACKFILL_PARALLEL', 4))
+
+logger = homework.logger
+
+
+def updated_at(item):
+    """Возвращает время изменения статуса работы как метку времени."""
+    value = item.get('date_updated')
+    if not value:
+        return None
+    parsed = datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ')
+    return int(parsed.replace(tzinfo=timezone.utc).timestamp())
+
+
+def keep_latest(latest, item):
+    """Запоминает работу, если это самый поздний известный ее статус."""
+    key = homework_key(item)
+    known = latest.get(key)
+    if known is None or (updated_at(item) or 0) >= (updated_at(known) or 0):
+        latest[key] = item
+
+
+def backfill_tenant(tenant, start, end, transport=None):
+    """Собирает последние статусы работ пользователя за промежуток.
+
+    API умеет только from_date, поэтому промежуток запрашивается одним
+    потоковым запросом с start, а изменения не раньше end отбрасываются:
+    деление на окна не уменьшило бы ни объем ответа, ни число запросов.
+    Для каждой работы остается только последний переход, по возрастанию
+    времени. Возвращает метку времени ответа API и список работ.
+    """
+    stream = streaming.stream_homeworks(
+        tenant.practicum_token, start, transport
+    )
+    latest = {}
+    for item in stream:
+        updated = updated_at(item)
+        if updated is None or start <= updated < end:
+            keep_latest(latest, item)
+    ordered = sorted(latest.values(), key=lambda item: updated_at(item) or 0)
+    return stream.current_date, ordered
+
+
+def backfill_tenants(tenants, start, end, parallel=BACKFILL_PARALLEL,
+                     transport=None):
+    """Параллельно собирает статусы за промежуток для пользователей.
+
+    Возвращает список пар (пользователь, результат) в порядке tenants.
+    Результат — пара (метка времени, работы) или исключение, из-за
+    которого статусы пользователя получить не удалось: ошибка одного
+    пользователя не мешает остальным.
+    """
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        futures = [
+            executor.submit(backfill_tenant, tenant, start, end, transport)
+            for tenant in tenants
+        ]
+        return [
+            (tenant, outcome(future))
+            for tenant, future in zip(tenants, futures)
+        ]
+
+
+def outcome(future):
+    """Возвращает результат Future или его исключение."""
+    error = future.exception()
+    return future.result() if error is None else error
+
+
+def deliver_backfill(bot, tenant, items, checkpoint, current_date,
+                     until=None):
+    """Отправляет последние статусы и сдвигает курсор пользователя.
+
+    Курсор не сдвигается дальше until: изменения после него не
+    запрашивались и должны прийти при обычном опросе.
+    """
+    sent = 0
+    for item in items:
+        message = homework.render_status(item, tenant.locale)
+        sent += homework.deliver_status(
+            bot, tenant.chat_id, item, message, checkpoint
+        )
+    cursor = checkpoint.cursor or 0
+    if current_date is not None and until is not None:
+        current_date = min(current_date, until)
+    if current_date is not None and current_date > cursor:
+        checkpoint.save_cursor(current_date)
+    checkpoint.store.flush()
+    return sent
+
+
+def deliver_results(bot, store, results, until):
+    """Отправляет собранные статусы каждому пользователю.
+
+    Ошибки получения и отправки записываются в журнал, остальные
+    пользователи обрабатываются дальше. Возвращает имена пользователей,
+    которых догнать не удалось.
+    """
+    failed = []
+    for tenant, result in results:
+        try:
+            if isinstance(result, Exception):
+                raise result
+            current_date, items = result
+            sent = deliver_backfill(
+                bot, tenant, items, store.for_tenant(tenant.name),
+                current_date, until
+            )
+        except Exception as error:
+            logger.error('Пользователь %s: %s', tenant.name, error)
+            failed.append(tenant.name)
+            continue
+        logger.info(
+            'Пользователь %s: работ %d, отправлено %d.',
+            tenant.name, len(items), sent,
+        )
+    return failed
+
+
+def parse_args(argv):
+    """Разбирает аргументы командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Догоняет статусы работ за прошедший промежуток.'
+    )
+    parser.add_argument(
+        '--since', required=True, type=date_argument,
+        help='начало промежутка: YYYY-MM-DD или метка времени'
+    )
+    parser.add_argument('--until', type=date_argument, default=None)
+    parser.add_argument('--parallel', type=int, default=BACKFILL_PARALLEL)
+    parser.add_argument('--tenant', help='имя пользователя (по умолчанию все)')
+    parser.add_argument(
+        '--dry-run', action='store_true',
+        help='печатать сообщения вместо отправки'
+    )
+    return parser.parse_args(argv)
+
+
+def date_argument(value):
+    """Переводит дату YYYY-MM-DD или метку времени в метку времени."""
+    if value.isdigit():
+        return int(value)
+    parsed = datetime.strptime(value, '%Y-%m-%d')
+    return int(parsed.replace(tzinfo=timezone.utc).timestamp())
+
+
+class PrintBot:
+    """Бот для пробного запуска: печатает сообщения вместо отправки."""
+
+    def send_message(self, chat_id, text):
+        """Печатает сообщение."""
+        print(f'{chat_id}: {text}')
+
+
+def main(argv=None):
+    """Догоняет статусы работ всех или одного пользователя."""
+    args = parse_args(argv)
+    until = args.until or int(time.time()) + 1
+    tenants = [
+        tenant for tenant in load_tenants()
+        if args.tenant in (None, tenant.name)
+    ]
+    if not tenants or not (args.dry_run or homework.TELEGRAM_TOKEN):
+        sys.exit('Не заданы пользователи или TELEGRAM_TOKEN.')
+
+    homework.renderer.load()
+    transport = Transport(pool_maxsize=args.parallel)
+    bot = PrintBot() if args.dry_run else BotClient(
+        homework.TELEGRAM_TOKEN, transport
+    )
+    store = CheckpointStore(':memory:' if args.dry_run else CHECKPOINT_PATH)
+    try:
+        results = backfill_tenants(
+            tenants, args.since, until, args.parallel, transport
+        )
+        failed = deliver_results(bot, store, results, until)
+    finally:
+        transport.close()
+        store.close()
+    if failed:
+        sys.exit(
+            f'Не удалось догнать пользователей: {len(failed)} из '
+            f'{len(tenants)} ({", ".join(failed)}).'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Опросы в полете: пул потоков против asyncapi на aiohttp.
+
+Выполняет --polls опросов разных пользователей против заменителя API с
+задержкой ответа --latency. Синхронный вариант — homework.fetch_statuses
+в пуле из --threads потоков (как engine.py с MAX_CONCURRENCY),
+асинхронный — asyncapi.fetch_statuses с не больше --in-flight
+одновременных запросов в одном потоке. Печатаются время прогона и
+число опросов в секунду.
+Запуск: python benchmarks/bench_async.py [--polls 2000] [--latency 0.2]
+       [--threads 32] [--in-flight 1000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import asyncapi  # noqa: E402
+import homework  # noqa: E402
+from benchmarks.servers import start_server  # noqa: E402
+from transport import Transport  # noqa: E402
+
+
+def run_threads(polls, threads):
+    """Выполняет опросы в пуле потоков и возвращает время прогона."""
+    transport = Transport(pool_maxsize=threads, breakers=False)
+
+    def poll(index):
+        return homework.fetch_statuses(f'token-{index}', 0, transport)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(poll, range(polls)))
+    elapsed = time.perf_counter() - started
+    transport.close()
+    return elapsed
+
+
+async def run_async(polls, in_flight):
+    """Выполняет опросы в цикле событий и возвращает время прогона."""
+    transport = asyncapi.AsyncTransport(
+        pool_maxsize=in_flight, breakers=False
+    )
+    limit = asyncio.Semaphore(in_flight)
+
+    async def poll(index):
+        async with limit:
+            return await asyncapi.fetch_statuses(
+                f'token-{index}', 0, transport
+            )
+
+    started = time.perf_counter()
+    await asyncio.gather(*(poll(index) for index in range(polls)))
+    elapsed = time.perf_counter() - started
+    await transport.close()
+    return elapsed
+
+
+def main():
+    """Запускает сравнение и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--polls', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--in-flight', type=int, default=1000)
+    args = parser.parse_args()
+
+    homework.logger.disabled = True
+    server, _ = start_server(latency=args.latency)
+    homework.ENDPOINT = f'{server.url}/api/user_api/homework_statuses/'
+    print(f'Опросов: {args.polls}, задержка API: '
+          f'{args.latency * 1000:.0f} мс')
+    results = (
+        (f'потоки ({args.threads})', run_threads(args.polls, args.threads)),
+        (f'asyncio ({args.in_flight})',
+         asyncio.run(run_async(args.polls, args.in_flight))),
+    )
+    for name, elapsed in results:
+        print(f'  {name:>16}: {elapsed:.2f} с, '
+              f'{args.polls / elapsed:.0f} опросов/с')
+
+
+if __name__ == '__main__':
+    main()
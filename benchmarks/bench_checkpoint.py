@@ -0,0 +1,53 @@
+"""Скорость записи и восстановления контрольных точек.
+
+Запуск: python benchmarks/bench_checkpoint.py [--tenants 10000] [--polls 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from checkpoint import CheckpointStore  # noqa: E402
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=10000)
+    parser.add_argument('--polls', type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'checkpoint.sqlite3')
+    store = CheckpointStore(path)
+    started = time.perf_counter()
+    for poll in range(args.polls):
+        for tenant in range(args.tenants):
+            store.mark_delivered(str(tenant), str(poll), 'approved')
+            store.save_cursor(str(tenant), poll)
+    store.close()
+    writes = args.tenants * args.polls * 2
+    elapsed = time.perf_counter() - started
+    print(f'Записей: {writes}, {writes / elapsed:.0f} в секунду')
+
+    started = time.perf_counter()
+    store = CheckpointStore(path)
+    cursor = store.load_cursor(str(args.tenants - 1))
+    elapsed = time.perf_counter() - started
+    print(f'Восстановление: {elapsed * 1000:.2f} мс (курсор {cursor})')
+
+    started = time.perf_counter()
+    for tenant in range(args.tenants):
+        store.load_cursor(str(tenant))
+    elapsed = time.perf_counter() - started
+    print(
+        f'Чтение курсоров всех пользователей: {elapsed * 1000:.1f} мс'
+    )
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
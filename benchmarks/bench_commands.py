@@ -0,0 +1,109 @@
+"""Время ответа на /status из кеша статусов при тысячах пользователей.
+
+Измеряет поиск записи и сборку ответа (первую и повторную) и полную
+обработку обновления getUpdates с отправкой ответа в пустой бот.
+Запуск: python benchmarks/bench_commands.py [--tenants 10000]
+       [--homeworks 10] [--commands 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import homework  # noqa: E402
+from commands import CommandPoller, StatusCache  # noqa: E402
+from tenants import Tenant  # noqa: E402
+
+
+class NullClient:
+    """Клиент Bot API, который ничего не отправляет."""
+
+    def call(self, method, **params):
+        """Возвращает пустой список обновлений."""
+        return []
+
+    def send_message(self, chat_id, text):
+        """Ничего не делает."""
+
+
+def make_cache(tenants, homeworks):
+    """Создает кеш с полными снимками статусов всех пользователей."""
+    cache = StatusCache()
+    statuses = list(homework.HOMEWORK_STATUSES)
+    for index in range(tenants):
+        chat_id = str(index)
+        cache.add(Tenant(chat_id, 'token', chat_id))
+        cache.update(chat_id, [
+            {'homework_name': f'hw{number}',
+             'status': random.choice(statuses)}
+            for number in range(homeworks)
+        ], complete=True)
+    return cache
+
+
+def percentiles(samples):
+    """Возвращает p50 и p99 в микросекундах."""
+    samples = sorted(samples)
+    return (
+        samples[len(samples) // 2] * 1e6,
+        samples[int(len(samples) * 0.99)] * 1e6,
+    )
+
+
+def measure_calls(func, chats):
+    """Вызывает func для каждого чата и возвращает время вызовов."""
+    samples = []
+    for chat_id in chats:
+        started = time.perf_counter()
+        func(chat_id)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=10000)
+    parser.add_argument('--homeworks', type=int, default=10)
+    parser.add_argument('--commands', type=int, default=20000)
+    args = parser.parse_args()
+    homework.logger.disabled = True
+
+    cache = make_cache(args.tenants, args.homeworks)
+    chats = [
+        str(random.randrange(args.tenants)) for _ in range(args.commands)
+    ]
+
+    def lookup(chat_id):
+        entry = cache.get(chat_id)
+        if not cache.is_stale(entry):
+            cache.report(entry)
+
+    print(f'Пользователей: {args.tenants}, работ у каждого: '
+          f'{args.homeworks}, команд: {args.commands}')
+    cold = measure_calls(lookup, [str(i) for i in range(args.tenants)])
+    warm = measure_calls(lookup, chats)
+    poller = CommandPoller(NullClient(), cache)
+    handled = measure_calls(
+        lambda chat_id: poller.handle({
+            'update_id': 1,
+            'message': {'chat': {'id': int(chat_id)}, 'text': '/status'},
+        }),
+        chats,
+    )
+    poller.close()
+    for name, samples in (
+        ('первый ответ', cold),
+        ('ответ из кеша', warm),
+        ('обработка обновления', handled),
+    ):
+        p50, p99 = percentiles(samples)
+        print(f'  {name:>20}: p50 {p50:.1f} мкс, p99 {p99:.1f} мкс')
+
+
+if __name__ == '__main__':
+    main()
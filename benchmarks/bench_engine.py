@@ -0,0 +1,130 @@
+"""Сравнение многопользовательского движка с процессом на пользователя.
+
+Запуск: python benchmarks/bench_engine.py [--tenants 500] [--latency 0.05]
+       [--duration 5]
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine  # noqa: E402
+import homework  # noqa: E402
+from tenants import Tenant  # noqa: E402
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def rss():
+    """Возвращает текущий RSS процесса в байтах."""
+    with open('/proc/self/statm') as file:
+        return int(file.read().split()[1]) * PAGE_SIZE
+
+
+def cpu_time():
+    """Возвращает процессорное время процесса в секундах."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class FakeResponse:
+    """Ответ API без сетевого обмена."""
+
+    status_code = 200
+
+    def json(self):
+        """Возвращает пустой список работ."""
+        return {'homeworks': [], 'current_date': int(time.time())}
+
+
+class FakeBot:
+    """Бот Telegram, который ничего не отправляет."""
+
+    def send_message(self, chat_id, text):
+        """Принимает сообщение."""
+
+
+def process_per_tenant_rss():
+    """Измеряет RSS отдельного процесса бота после импорта зависимостей."""
+    code = (
+        'import homework, telegram\n'
+        'print(open("/proc/self/statm").read().split()[1])'
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=ROOT, check=True,
+        capture_output=True, text=True,
+    ).stdout
+    return int(output) * PAGE_SIZE
+
+
+def bench_engine(tenant_count, latency, duration):
+    """Измеряет CPU и RSS движка на заданном числе пользователей."""
+    def fake_get(*args, **kwargs):
+        time.sleep(latency)
+        return FakeResponse()
+
+    homework.requests.get = fake_get
+    homework.RETRY_TIME = 0
+    tenants = [
+        Tenant(str(i), f'token-{i}', str(i)) for i in range(tenant_count)
+    ]
+    polls = 0
+    original_poll_once = homework.poll_once
+
+    def counting_poll_once(*args):
+        nonlocal polls
+        polls += 1
+        return original_poll_once(*args)
+
+    async def run_for_duration():
+        try:
+            await asyncio.wait_for(
+                engine.run(tenants, FakeBot()), timeout=duration
+            )
+        except asyncio.TimeoutError:
+            pass
+
+    homework.poll_once = counting_poll_once
+    rss_before = rss()
+    cpu_before = cpu_time()
+    started = time.monotonic()
+    asyncio.run(run_for_duration())
+    elapsed = time.monotonic() - started
+    cpu = cpu_time() - cpu_before
+    return polls, elapsed, cpu, rss() - rss_before
+
+
+def main():
+    """Запускает сравнение и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tenants', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+
+    homework.logger.disabled = True
+    polls, elapsed, cpu, rss_delta = bench_engine(
+        args.tenants, args.latency, args.duration
+    )
+    cpu_per_poll = cpu / polls
+    per_process = process_per_tenant_rss()
+
+    print(f'Пользователей: {args.tenants}, опросов: {polls}')
+    print(f'Время: {elapsed:.2f} с, CPU: {cpu:.2f} с')
+    print(f'CPU на опрос: {cpu_per_poll * 1000:.3f} мс')
+    print(
+        'Пользователей на ядро при RETRY_TIME=600: '
+        f'{int(600 / cpu_per_poll)}'
+    )
+    print(f'RSS на пользователя (движок): {rss_delta / args.tenants:.0f} Б')
+    print(f'RSS на пользователя (процесс): {per_process:.0f} Б')
+
+
+if __name__ == '__main__':
+    main()
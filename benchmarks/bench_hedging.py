@@ -0,0 +1,90 @@
+"""Хвост задержки опроса при зависаниях API: сроки и дублирование.
+
+Заменитель API отвечает с задержкой --latency, а доля --stall-rate
+ответов зависает на --stall секунд. Опросы выполняются пулом потоков
+через Transport в трех режимах: как раньше (только таймаут чтения),
+со сроком итерации --deadline и со сроком и дублированием запросов.
+Печатаются p50, p99 и максимум задержки опроса, доля неудачных опросов
+и число запросов к API.
+Запуск: python benchmarks/bench_hedging.py [--polls 2000] [--threads 16]
+       [--latency 0.02] [--stall-rate 0.02] [--stall 3] [--deadline 1]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import deadlines  # noqa: E402
+import homework  # noqa: E402
+from benchmarks.servers import start_server  # noqa: E402
+from hedging import Hedger  # noqa: E402
+from transport import Transport  # noqa: E402
+
+
+def run(server, args, seconds, hedger):
+    """Выполняет опросы и возвращает задержки и число неудач."""
+    transport = Transport(
+        pool_maxsize=args.threads, breakers=False, hedger=hedger
+    )
+
+    def poll(index):
+        started = time.perf_counter()
+        try:
+            with deadlines.deadline(seconds):
+                homework.fetch_statuses(f'token-{index}', 0, transport)
+        except IOError:
+            return time.perf_counter() - started, True
+        return time.perf_counter() - started, False
+
+    requests_before = server.requests
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        results = list(executor.map(poll, range(args.polls)))
+    transport.close()
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        'p50': latencies[len(latencies) // 2] * 1000,
+        'p99': latencies[int(len(latencies) * 0.99)] * 1000,
+        'max': latencies[-1] * 1000,
+        'failed': sum(failed for _, failed in results) / len(results),
+        'requests': server.requests - requests_before,
+    }
+
+
+def main():
+    """Запускает сравнение и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--polls', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--stall-rate', type=float, default=0.02)
+    parser.add_argument('--stall', type=float, default=3)
+    parser.add_argument('--deadline', type=float, default=1)
+    args = parser.parse_args()
+
+    homework.logger.disabled = True
+    server, _ = start_server(
+        latency=args.latency, stall_rate=args.stall_rate, stall=args.stall
+    )
+    homework.ENDPOINT = f'{server.url}/api/user_api/homework_statuses/'
+    print(f'Опросов: {args.polls}, задержка API: '
+          f'{args.latency * 1000:.0f} мс, зависает {args.stall_rate:.0%} '
+          f'ответов на {args.stall} с')
+    modes = (
+        ('без срока', 0, None),
+        (f'срок {args.deadline} с', args.deadline, None),
+        ('срок и копии', args.deadline, Hedger()),
+    )
+    for name, seconds, hedger in modes:
+        result = run(server, args, seconds, hedger)
+        print(f'  {name:>14}: p50 {result["p50"]:.0f} мс, '
+              f'p99 {result["p99"]:.0f} мс, max {result["max"]:.0f} мс, '
+              f'неудачных {result["failed"]:.1%}, '
+              f'запросов к API {result["requests"]}')
+
+
+if __name__ == '__main__':
+    main()
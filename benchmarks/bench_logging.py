@@ -0,0 +1,118 @@
+"""Стоимость записи в журнал для вызывающего потока.
+
+Сравнивает прежнюю настройку (StreamHandler, f-строки, запись в том же
+потоке) с очередью и фоновым потоком из logs.py. Журнал пишется
+в /dev/null и в медленный поток, имитирующий занятый терминал или канал.
+Запуск: python benchmarks/bench_logging.py [--calls 20000]
+       [--write-latency 0.0001]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import logs  # noqa: E402
+
+RESPONSE = {
+    'homeworks': [
+        {'homework_name': f'hw{index}', 'status': 'approved'}
+        for index in range(20)
+    ],
+    'current_date': 1,
+}
+
+
+def old_logger(stream):
+    """Возвращает логгер с прежней синхронной настройкой."""
+    logger = logging.getLogger('bench.old')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(
+        logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
+    )
+    logger.addHandler(handler)
+    return logger
+
+
+def new_logger(stream):
+    """Возвращает логгер с очередью и фоновой записью."""
+    logger = logging.getLogger('bench.new')
+    logger.propagate = False
+    logs.setup(logger, stream=stream)
+    return logger
+
+
+class SlowStream:
+    """Поток вывода, каждая запись в который занимает latency секунд."""
+
+    def __init__(self, latency):
+        """Создает поток с задержкой записи."""
+        self.latency = latency
+
+    def write(self, text):
+        """Принимает текст после задержки."""
+        time.sleep(self.latency)
+
+    def flush(self):
+        """Ничего не делает."""
+
+
+def per_call(func, calls):
+    """Возвращает среднее время вызова func в микросекундах."""
+    started = time.perf_counter()
+    for index in range(calls):
+        func(index)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def run_cases(old, new, calls):
+    """Сравнивает стоимость вызовов старого и нового логгеров."""
+    cases = {
+        'debug': (
+            lambda index: old.debug('Выполнение запроса к API.'),
+            lambda index: new.debug('Выполнение запроса к API.'),
+        ),
+        'info с ответом': (
+            lambda index: old.info(f'Ответ API: {RESPONSE}'),
+            lambda index: new.info('Ответ API: %s', RESPONSE),
+        ),
+    }
+    queued = next(
+        handler for handler in new.handlers
+        if isinstance(handler, logs.LazyQueueHandler)
+    )
+    for name, (before, after) in cases.items():
+        old_cost = per_call(before, calls)
+        new_cost = per_call(after, calls)
+        logs.flush(new, timeout=60)
+        print(f'  {name:>14}: было {old_cost:.2f} мкс, '
+              f'стало {new_cost:.2f} мкс на вызов')
+    print(f'  отброшено при переполнении очереди: {queued.dropped}')
+    for handler in list(old.handlers):
+        old.removeHandler(handler)
+    logs.close(new)
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--write-latency', type=float, default=0.0001)
+    args = parser.parse_args()
+
+    with open(os.devnull, 'w') as devnull:
+        for stream_name, stream in (
+            ('/dev/null', devnull),
+            ('медленный вывод', SlowStream(args.write_latency)),
+        ):
+            print(f'Вывод в {stream_name}:')
+            run_cases(old_logger(stream), new_logger(stream), args.calls)
+
+
+if __name__ == '__main__':
+    main()
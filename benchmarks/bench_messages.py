@@ -0,0 +1,62 @@
+"""Стоимость сборки сообщений при рассылке одного изменения по чатам.
+
+Сравнивает f-строку на каждый чат с кешируемым MessageRenderer.
+Запуск: python benchmarks/bench_messages.py [--chats 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import homework  # noqa: E402
+
+LOCALES = ['ru', 'en']
+
+
+def naive(chats, status, name):
+    """Собирает сообщение f-строкой заново для каждого чата."""
+    messages = []
+    for chat in chats:
+        verdict = homework.HOMEWORK_STATUSES[status]
+        messages.append(
+            f'Изменился статус проверки работы "{name}". {verdict}'
+        )
+    return messages
+
+
+def per_chat(chats, status, name):
+    """Вызывает кешируемый render для каждого чата."""
+    return [
+        homework.renderer.render(status, name, locale)
+        for _, locale in chats
+    ]
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chats', type=int, default=10000)
+    parser.add_argument('--changes', type=int, default=200)
+    args = parser.parse_args()
+
+    chats = [
+        (index, LOCALES[index % len(LOCALES)]) for index in range(args.chats)
+    ]
+    statuses = list(homework.HOMEWORK_STATUSES)
+    for name, func in (
+        ('f-строка', naive),
+        ('render', per_chat),
+    ):
+        started = time.perf_counter()
+        for change in range(args.changes):
+            func(chats, statuses[change % len(statuses)], f'hw{change}')
+        elapsed = time.perf_counter() - started
+        per_message = elapsed / (args.changes * args.chats) * 1e9
+        print(f'{name:>12}: {per_message:.0f} нс на сообщение')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Накладные расходы метрик на вызов функции.
+
+Сравнивает голый вызов parse_status с вызовом через timed и measure,
+а также время одной выдачи /metrics.
+Запуск: python benchmarks/bench_metrics.py [--calls 200000]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import homework  # noqa: E402
+import metrics  # noqa: E402
+
+HOMEWORK = {'homework_name': 'hw', 'status': 'approved'}
+
+
+def per_call(func, calls):
+    """Возвращает среднее время вызова func в наносекундах."""
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=200000)
+    args = parser.parse_args()
+
+    homework.logger.disabled = True
+    bare = homework.parse_status.__wrapped__
+
+    def with_measure():
+        with metrics.measure('bench'):
+            bare(HOMEWORK)
+
+    results = {
+        'без метрик': per_call(lambda: bare(HOMEWORK), args.calls),
+        'timed': per_call(lambda: homework.parse_status(HOMEWORK), args.calls),
+        'measure': per_call(with_measure, args.calls),
+    }
+    for name, nanos in results.items():
+        overhead = nanos - results['без метрик']
+        print(f'{name:>11}: {nanos:.0f} нс на вызов (+{overhead:.0f} нс)')
+
+    started = time.perf_counter()
+    body = metrics.REGISTRY.render()
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f'Выдача /metrics: {elapsed:.2f} мс, {len(body)} байт')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Накладные расходы профилировщика на итерацию опроса.
+
+Сравнивает итерации без профилировщика, с выключенным и с включенным
+режимом на проверке и сборке сообщений для ответа API.
+Запуск: python benchmarks/bench_profiling.py [--iterations 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import homework  # noqa: E402
+from profiling import Profiler  # noqa: E402
+
+RESPONSE = {
+    'homeworks': [
+        {'homework_name': f'hw{index}', 'status': 'approved'}
+        for index in range(100)
+    ],
+    'current_date': 1,
+}
+
+
+def work():
+    """Одна итерация: проверка ответа и сборка сообщений."""
+    for item in homework.check_response(RESPONSE):
+        homework.parse_status(item)
+
+
+def run(iterations, profiler=None):
+    """Возвращает среднее время итерации в микросекундах."""
+    started = time.perf_counter()
+    for _ in range(iterations):
+        if profiler is None:
+            work()
+        else:
+            with profiler.iteration():
+                work()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def wait_for(condition):
+    """Ждет, пока фоновый поток профилировщика применит переключение."""
+    while not condition():
+        time.sleep(0.01)
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    homework.logger.disabled = True
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = Profiler(directory)
+        profiler.install(enabled=False)
+        base = run(args.iterations)
+        off = run(args.iterations, profiler)
+        profiler.toggle(True)
+        wait_for(lambda: profiler.enabled)
+        on = run(args.iterations, profiler)
+        profiler.toggle(False)
+        wait_for(lambda: not profiler.enabled)
+        files = len(os.listdir(directory))
+    for name, micros in (
+        ('без профилировщика', base), ('выключен', off), ('включен', on),
+    ):
+        print(f'{name:>18}: {micros:.1f} мкс на итерацию '
+              f'({(micros / base - 1) * 100:+.1f}%)')
+    print(f'Файлов отчета: {files}')
+
+
+if __name__ == '__main__':
+    main()
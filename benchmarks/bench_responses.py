@@ -0,0 +1,107 @@
+"""Сокращение запросов к API общим кешем ответов при нескольких процессах.
+
+Несколько процессов-обработчиков по несколько потоков одновременно
+запрашивают ответы API для одного набора токенов — как опросы и
+обновления /status разных процессов одного хоста. Сравниваются запросы,
+дошедшие до заменителя API, без кеша и с общим ResponseCache.
+Запуск: python benchmarks/bench_responses.py [--workers 4] [--threads 8]
+       [--tokens 50] [--calls 200] [--latency 0.05]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import homework  # noqa: E402
+from benchmarks.servers import start_server  # noqa: E402
+from responses import ResponseCache  # noqa: E402
+from transport import Transport  # noqa: E402
+
+
+def work(endpoint, cache_path, tokens, threads, calls, from_date, seed):
+    """Выполняет запросы одного процесса и возвращает задержки и счетчики."""
+    homework.logger.disabled = True
+    homework.ENDPOINT = endpoint
+    random.seed(seed)
+    cache = None if cache_path is None else ResponseCache(cache_path)
+    transport = Transport(pool_maxsize=threads, responses=cache)
+
+    def call(index):
+        token = f'token-{random.randrange(tokens)}'
+        started = time.perf_counter()
+        homework.fetch_api_answer(from_date, token, transport)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(call, range(calls)))
+    stats = {} if cache is None else dict(cache.stats)
+    transport.close()
+    return latencies, stats
+
+
+def run(server, args, cache_path):
+    """Запускает процессы-обработчики и возвращает сводку прогона."""
+    requests_before = server.requests
+    endpoint = homework.ENDPOINT
+    from_date = int(time.time())
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(args.workers) as pool:
+        results = pool.starmap(work, [
+            (endpoint, cache_path, args.tokens, args.threads, args.calls,
+             from_date, seed)
+            for seed in range(args.workers)
+        ])
+    latencies = sorted(
+        latency for worker_latencies, _ in results
+        for latency in worker_latencies
+    )
+    stats = {}
+    for _, worker_stats in results:
+        for key, value in worker_stats.items():
+            stats[key] = stats.get(key, 0) + value
+    return {
+        'calls': len(latencies),
+        'requests': server.requests - requests_before,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'stats': stats,
+    }
+
+
+def main():
+    """Запускает сравнение и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--tokens', type=int, default=50)
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    server, _ = start_server(latency=args.latency)
+    homework.ENDPOINT = f'{server.url}/api/user_api/homework_statuses/'
+    print(f'Процессов: {args.workers}, потоков: {args.threads}, токенов: '
+          f'{args.tokens}, вызовов на процесс: {args.calls}, задержка API: '
+          f'{args.latency * 1000:.0f} мс')
+    baseline = run(server, args, None)
+    with tempfile.TemporaryDirectory() as directory:
+        cached = run(
+            server, args, os.path.join(directory, 'responses.sqlite3')
+        )
+    for name, result in (('без кеша', baseline), ('с кешем', cached)):
+        print(f'  {name:>8}: вызовов {result["calls"]}, запросов к API '
+              f'{result["requests"]}, p50 {result["p50_ms"]:.2f} мс '
+              f'{result["stats"] or ""}')
+    reduction = 1 - cached['requests'] / max(baseline['requests'], 1)
+    print(f'  запросов к API меньше на {reduction:.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""Накладные расходы планировщика на 10k и 100k пользователей.
+
+Сравнивает TimingWheel с кучей heapq (отмена в куче — пометкой).
+Запуск: python benchmarks/bench_scheduler.py
+"""
+import heapq
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scheduler import TimingWheel, jittered  # noqa: E402
+
+INTERVAL = 600
+
+
+def bench_wheel(count, deadlines):
+    """Возвращает время операций колеса таймеров в наносекундах."""
+    wheel = TimingWheel(tick=1, now=0)
+    started = time.perf_counter_ns()
+    for key, deadline in enumerate(deadlines):
+        wheel.schedule(key, deadline)
+    inserted = time.perf_counter_ns()
+    for key in range(0, count, 2):
+        wheel.cancel(key)
+    cancelled = time.perf_counter_ns()
+    for now in range(INTERVAL + 1):
+        for key in wheel.advance(now):
+            wheel.schedule(key, now + jittered(INTERVAL))
+    advanced = time.perf_counter_ns()
+    return (
+        (inserted - started) / count,
+        (cancelled - inserted) / (count // 2),
+        (advanced - cancelled) / (count - count // 2),
+    )
+
+
+def bench_heap(count, deadlines):
+    """Возвращает время операций кучи в наносекундах."""
+    heap = []
+    entries = {}
+    started = time.perf_counter_ns()
+    for key, deadline in enumerate(deadlines):
+        entry = [deadline, key, True]
+        entries[key] = entry
+        heapq.heappush(heap, entry)
+    inserted = time.perf_counter_ns()
+    for key in range(0, count, 2):
+        entries.pop(key)[2] = False
+    cancelled = time.perf_counter_ns()
+    for now in range(INTERVAL + 1):
+        while heap and heap[0][0] <= now:
+            _, key, active = heapq.heappop(heap)
+            if active:
+                entry = [now + jittered(INTERVAL), key, True]
+                entries[key] = entry
+                heapq.heappush(heap, entry)
+    advanced = time.perf_counter_ns()
+    return (
+        (inserted - started) / count,
+        (cancelled - inserted) / (count // 2),
+        (advanced - cancelled) / (count - count // 2),
+    )
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    for count in (10_000, 100_000):
+        deadlines = [random.uniform(0, INTERVAL) for _ in range(count)]
+        for name, bench in (('колесо', bench_wheel), ('куча', bench_heap)):
+            insert, cancel, fire = bench(count, deadlines)
+            print(
+                f'{count:>7} {name:>6}: добавление {insert:.0f} нс, '
+                f'отмена {cancel:.0f} нс, срабатывание и перепланирование '
+                f'{fire:.0f} нс'
+            )
+
+
+if __name__ == '__main__':
+    main()
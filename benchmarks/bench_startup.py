@@ -0,0 +1,62 @@
+"""Время импорта и RSS процесса бота при старте.
+
+Сравнивает импорт модулей бота с прежним набором зависимостей
+(python-telegram-bot и python-dotenv загружались всегда) и без него.
+Время импорта берется из python -X importtime, каждый вариант
+запускается в отдельном процессе несколько раз.
+Запуск: python benchmarks/bench_startup.py [--runs 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+VARIANTS = {
+    'homework, прежние зависимости': 'import telegram, dotenv, homework',
+    'homework': 'import homework',
+    'engine, прежние зависимости': 'import telegram, dotenv, engine',
+    'engine': 'import engine',
+}
+REPORT = (
+    'import sys\n'
+    'print("rss", open("/proc/self/statm").read().split()[1])\n'
+    'print("modules", len(sys.modules))'
+)
+
+
+def measure(code):
+    """Возвращает время импорта (мкс), RSS (байт) и число модулей."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'{code}\n{REPORT}'],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    import_time = 0
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if (len(parts) == 3 and parts[1].strip().isdigit()
+                and not parts[2].startswith('  ')):
+            import_time += int(parts[1])
+    report = dict(line.split() for line in result.stdout.splitlines())
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    return import_time, int(report['rss']) * page_size, int(report['modules'])
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    for name, code in VARIANTS.items():
+        runs = [measure(code) for _ in range(args.runs)]
+        import_time = statistics.median(run[0] for run in runs) / 1000
+        rss = statistics.median(run[1] for run in runs) / 2 ** 20
+        print(f'{name:>30}: импорт {import_time:.0f} мс, '
+              f'RSS {rss:.1f} МБ, модулей {runs[0][2]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Память на состояние опроса при десятках и сотнях тысяч пользователей.
+
+Сравнивает состояние в виде словаря на пользователя, где у каждого
+собственные копии статусов, отпечатков ошибок и ответа API, с
+состоянием движка: Tenant, TenantState в слотах, срок опроса в колесе
+таймеров и запись кеша /status с интернированными статусами. Каждый
+пользователь получил ответ API с одной работой, доля error — ошибку.
+Печатается память в байтах на пользователя по tracemalloc.
+Запуск: python benchmarks/bench_state.py [--tenants 10000 100000]
+       [--errors 0.01]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import engine  # noqa: E402
+import homework  # noqa: E402
+from commands import StatusCache  # noqa: E402
+from incidents import fingerprint  # noqa: E402
+from scheduler import TimingWheel  # noqa: E402
+from tenants import Tenant  # noqa: E402
+
+INTERVAL = 600
+
+
+def api_answer(index):
+    """Возвращает ответ API с одной работой, как после json.loads."""
+    return json.loads(json.dumps({
+        'homeworks': [{
+            'id': index,
+            'homework_name': f'user{index}__hw05.zip',
+            'status': random.choice(list(homework.HOMEWORK_STATUSES)),
+            'reviewer_comment': 'Принято.',
+            'lesson_name': 'Итоговый проект',
+            'date_updated': '2021-10-01T10:00:00Z',
+        }],
+        'current_date': 1633000000 + index,
+    }))
+
+
+def api_error(index):
+    """Возвращает ошибку опроса с трассировкой, как в движке."""
+    try:
+        raise ConnectionError(f'Нет ответа от API, попытка {index}.')
+    except ConnectionError as error:
+        return error
+
+
+def build_dicts(count, errors):
+    """Создает состояние в виде словаря на пользователя."""
+    states = {}
+    now = time.monotonic()
+    for index in range(count):
+        chat_id = str(100000000 + index)
+        answer = api_answer(index)
+        item = answer['homeworks'][0]
+        error = api_error(index) if random.random() < errors else None
+        state = {
+            'name': f'tenant-{index}',
+            'practicum_token': f'y0_{index:056d}',
+            'chat_id': chat_id,
+            'locale': None,
+            'current_timestamp': answer['current_date'],
+            'latest_error': error,
+            'next_due': now + INTERVAL,
+            'policy': {
+                'base': float(INTERVAL), 'last_status': item['status'],
+                'idle_polls': 0, 'change_rate': 0.3, 'error_rate': 0.0,
+            },
+            'incidents': {},
+            'homeworks': {item['homework_name']: item},
+        }
+        if error is not None:
+            state['incidents'][tuple(map(str, fingerprint(error)))] = {
+                'message': str(error), 'opened_at': now, 'count': 1,
+            }
+        states[state['name']] = state
+    return states
+
+
+def build_engine(count, errors):
+    """Создает состояние движка для count пользователей."""
+    runtime = engine.Runtime(None, None)
+    wheel = TimingWheel(now=time.monotonic())
+    cache = StatusCache()
+    states = {}
+    for index in range(count):
+        chat_id = str(100000000 + index)
+        tenant = Tenant(f'tenant-{index}', f'y0_{index:056d}', chat_id)
+        answer = api_answer(index)
+        state = engine.make_state(tenant, runtime, INTERVAL)
+        state.current_timestamp = answer['current_date']
+        state.policy.observe(answer['homeworks'])
+        if random.random() < errors:
+            error = api_error(index)
+            state.policy.observe(failed=True)
+            state.incidents = engine.ErrorAggregator()
+            state.incidents.record(error)
+        cache.add(tenant)
+        cache.update(chat_id, answer['homeworks'], complete=True)
+        wheel.schedule(tenant.name, time.monotonic() + INTERVAL)
+        states[tenant.name] = state
+    return states, wheel, cache
+
+
+def measure(build, count, errors):
+    """Возвращает память в байтах на пользователя, занятую build."""
+    random.seed(count)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(count, errors)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return used / count
+
+
+def main():
+    """Запускает сравнение и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--tenants', type=int, nargs='+', default=[10000, 100000]
+    )
+    parser.add_argument('--errors', type=float, default=0.01)
+    args = parser.parse_args()
+
+    homework.logger.disabled = True
+    print(f'Доля пользователей с ошибкой: {args.errors:.0%}')
+    for count in args.tenants:
+        baseline = measure(build_dicts, count, args.errors)
+        compact = measure(build_engine, count, args.errors)
+        print(f'  пользователей {count}: словари {baseline:.0f} Б, '
+              f'движок {compact:.0f} Б на пользователя, '
+              f'всего {baseline * count / 2 ** 20:.1f} -> '
+              f'{compact * count / 2 ** 20:.1f} МиБ '
+              f'({compact / baseline - 1:+.0%})')
+
+
+if __name__ == '__main__':
+    main()
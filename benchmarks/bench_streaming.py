@@ -0,0 +1,76 @@
+"""Пиковая память: json() целиком против потокового разбора.
+
+Тело ответа генерируется частями на лету, как при чтении из сети.
+Запуск: python benchmarks/bench_streaming.py
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import homework  # noqa: E402
+from streaming import CHUNK_SIZE, HomeworkStream  # noqa: E402
+
+
+def generate_chunks(count):
+    """Генерирует тело ответа API с count работами частями по CHUNK_SIZE."""
+    buffer = b'{"homeworks": ['
+    for index in range(count):
+        item = json.dumps({
+            'id': index,
+            'homework_name': f'user__hw{index}.zip',
+            'status': 'approved',
+            'reviewer_comment': 'Замечаний нет. ' * 10,
+            'date_updated': '2022-01-01T00:00:00Z',
+            'lesson_name': 'Итоговый проект',
+        }, ensure_ascii=False).encode()
+        buffer += item if not index else b',' + item
+        while len(buffer) >= CHUNK_SIZE:
+            yield buffer[:CHUNK_SIZE]
+            buffer = buffer[CHUNK_SIZE:]
+    yield buffer + b'], "current_date": 1}'
+
+
+def whole(count):
+    """Текущий путь: тело целиком, затем json и проверка."""
+    body = b''.join(generate_chunks(count))
+    response = json.loads(body)
+    for item in homework.check_response(response):
+        homework.parse_status(item)
+
+
+def streamed(count):
+    """Потоковый путь: работы разбираются и проверяются по одной."""
+    for item in HomeworkStream(generate_chunks(count)):
+        homework.render_status(item)
+
+
+def measure(func, count):
+    """Возвращает пиковую память в МБ и время в секундах."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    func(count)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20, elapsed
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    homework.logger.disabled = True
+    for count in (1000, 10000, 100000):
+        for name, func in (('json()', whole), ('поток', streamed)):
+            peak, elapsed = measure(func, count)
+            print(
+                f'{count:>7} работ, {name:>7}: пик {peak:.1f} МБ, '
+                f'{elapsed:.2f} с'
+            )
+
+
+if __name__ == '__main__':
+    main()
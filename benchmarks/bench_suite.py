@@ -0,0 +1,228 @@
+"""Сквозной бенчмарк бота на локальных заменителях Практикума и Telegram.
+
+Заменители API работают в этом процессе, а движок с настоящими клиентами
+запускается в дочернем процессе, поэтому CPU и RSS относятся только к
+боту. Для каждого сценария меняет статусы работ пачками и измеряет
+пропускную способность, задержку уведомления (от изменения статуса до
+получения sendMessage), CPU и RSS. Результат дописывается строкой JSON
+в файл --output, чтобы сравнивать запуски на разных коммитах.
+Запуск: python benchmarks/bench_suite.py [--scenario burst]
+       [--duration 40] [--latency 0.02] [--error-rate 0.01]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.servers import (  # noqa: E402
+    PracticumHandler, StatusBoard, TelegramHandler, start_server,
+)
+
+SCENARIOS = {
+    'tenants-1': {
+        'tenants': 1, 'interval': 1, 'changes': 1, 'burst_interval': 3,
+        'duration': 20,
+    },
+    'tenants-100': {
+        'tenants': 100, 'interval': 2, 'changes': 5, 'burst_interval': 1,
+        'duration': 20,
+    },
+    'tenants-10k': {
+        'tenants': 10000, 'interval': 20, 'changes': 20, 'burst_interval': 1,
+        'duration': 90,
+    },
+    'burst': {
+        'tenants': 1000, 'interval': 2, 'changes': 200,
+        'burst_interval': 10, 'duration': 50,
+    },
+}
+RESULTS_FILE = os.path.join(ROOT, 'benchmarks', 'results.jsonl')
+
+
+def percentile(values, fraction):
+    """Возвращает перцентиль fraction из списка values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def commit():
+    """Возвращает хеш текущего коммита или None."""
+    result = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+        capture_output=True, text=True,
+    )
+    return result.stdout.strip() or None
+
+
+def run_child(params):
+    """Запускает движок против заменителей и печатает CPU и RSS в JSON."""
+    import engine
+    import homework
+    from botapi import BotClient
+    from checkpoint import CheckpointStore
+    from outbox import Outbox
+    from tenants import Tenant
+    from transport import Transport
+
+    homework.logger.disabled = True
+    homework.ENDPOINT = (
+        params['practicum'] + '/api/user_api/homework_statuses/'
+    )
+    transport = Transport(pool_maxsize=engine.MAX_CONCURRENCY)
+    outbox = Outbox(
+        BotClient('123:bench', transport, base_url=params['telegram'])
+    )
+    store = CheckpointStore(':memory:')
+    tenants = [
+        Tenant(f'token-{index}', f'token-{index}', index)
+        for index in range(params['tenants'])
+    ]
+
+    async def run_for_duration():
+        try:
+            await asyncio.wait_for(
+                engine.run(tenants, outbox, transport=transport, store=store,
+                           interval=params['interval']),
+                timeout=params['duration'],
+            )
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(run_for_duration())
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    print(json.dumps({
+        'cpu_seconds': usage.ru_utime + usage.ru_stime,
+        'rss_max_bytes': usage.ru_maxrss * 1024,
+    }))
+    outbox.close()
+    transport.close()
+
+
+def run_scenario(name, scenario, args):
+    """Выполняет сценарий и возвращает его показатели."""
+    board = StatusBoard(args.payload)
+    practicum, _ = start_server(
+        PracticumHandler, args.latency, error_rate=args.error_rate,
+        board=board,
+    )
+    telegram_server, _ = start_server(
+        TelegramHandler, args.telegram_latency, error_rate=args.error_rate,
+        board=board,
+    )
+    interval = str(scenario['interval'])
+    env = {
+        **os.environ,
+        'MIN_INTERVAL': interval,
+        'MAX_INTERVAL': interval,
+        'POLL_BUDGET': '0',
+        'SCHEDULER_TICK': '0.05',
+        'TELEGRAM_RATE': str(args.telegram_rate),
+        'TELEGRAM_CHAT_RATE': str(args.telegram_rate),
+    }
+    duration = args.duration or scenario['duration']
+    params = {
+        **scenario, 'duration': duration,
+        'practicum': practicum.url, 'telegram': telegram_server.url,
+    }
+    tokens = [f'token-{index}' for index in range(scenario['tenants'])]
+    started = time.monotonic()
+    child = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--child',
+         json.dumps(params)],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True,
+    )
+    warmup = scenario['interval'] + 1
+    last_burst = duration - 2 * scenario['interval'] - 10
+    changes = 0
+    next_burst = started + warmup
+    while next_burst < started + last_burst:
+        time.sleep(max(0.0, next_burst - time.monotonic()))
+        board.change(random.sample(tokens, scenario['changes']))
+        changes += scenario['changes']
+        next_burst += scenario['burst_interval']
+    output, _ = child.communicate()
+    elapsed = time.monotonic() - started
+    for server in (practicum, telegram_server):
+        server.shutdown()
+        server.server_close()
+    usage = json.loads(output.strip().splitlines()[-1])
+    latencies = board.latencies
+    return {
+        **scenario,
+        'duration': duration,
+        'polls': practicum.requests,
+        'messages': telegram_server.requests,
+        'changed': changes,
+        'undelivered': board.pending,
+        'polls_per_second': practicum.requests / elapsed,
+        'messages_per_second': telegram_server.requests / elapsed,
+        'notify_p50_seconds': percentile(latencies, 0.5),
+        'notify_p99_seconds': percentile(latencies, 0.99),
+        'cpu_seconds': usage['cpu_seconds'],
+        'cpu_per_poll_ms': (
+            usage['cpu_seconds'] / max(practicum.requests, 1) * 1000
+        ),
+        'rss_max_bytes': usage['rss_max_bytes'],
+    }
+
+
+def main():
+    """Запускает сценарии, печатает и сохраняет результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenario', action='append',
+                        choices=sorted(SCENARIOS))
+    parser.add_argument('--duration', type=float)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--telegram-latency', type=float, default=0.02)
+    parser.add_argument('--telegram-rate', type=float, default=1000.0)
+    parser.add_argument('--payload', type=int, default=512)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--output', default=RESULTS_FILE)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(json.loads(args.child))
+        return
+
+    results = {}
+    for name in args.scenario or SCENARIOS:
+        print(f'Сценарий {name}...', flush=True)
+        result = results[name] = run_scenario(name, SCENARIOS[name], args)
+        p99 = result['notify_p99_seconds']
+        print(
+            f'  опросов/с: {result["polls_per_second"]:.1f}, '
+            f'сообщений/с: {result["messages_per_second"]:.1f}, '
+            f'p99 уведомления: '
+            f'{"-" if p99 is None else f"{p99:.2f} с"}, '
+            f'CPU: {result["cpu_seconds"]:.2f} с, '
+            f'RSS: {result["rss_max_bytes"] / 2 ** 20:.1f} МБ, '
+            f'не доставлено: {result["undelivered"]}'
+        )
+    record = {
+        'commit': commit(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'parameters': {
+            key: value for key, value in vars(args).items()
+            if key not in ('child', 'output', 'scenario')
+        },
+        'scenarios': results,
+    }
+    with open(args.output, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(record, ensure_ascii=False) + '\n')
+    print(f'Результат записан в {args.output}')
+
+
+if __name__ == '__main__':
+    main()
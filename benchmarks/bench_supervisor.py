@@ -0,0 +1,114 @@
+"""Масштабирование опроса по процессам-обработчикам супервизора.
+
+Супервизор с 1, 2, 4... обработчиками опрашивает заменитель API для
+множества пользователей с коротким интервалом, так что пропускную
+способность ограничивает CPU обработчиков. Для каждого числа
+обработчиков печатается число опросов в секунду и ускорение
+относительно одного обработчика.
+Запуск: python benchmarks/bench_supervisor.py [--workers 1 2 4]
+       [--tenants 2000] [--interval 1] [--duration 15] [--payload 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.servers import (  # noqa: E402
+    PracticumHandler, StatusBoard, TelegramHandler, start_server,
+)
+
+WARMUP = 5
+
+
+def bench_worker(worker_id, control):
+    """Обработчик, направленный на заменитель API."""
+    import homework
+    import supervisor
+
+    homework.logger.disabled = True
+    homework.ENDPOINT = os.environ['BENCH_PRACTICUM_URL']
+    homework.RETRY_TIME = float(os.environ['BENCH_INTERVAL'])
+    supervisor.run_worker(worker_id, control)
+
+
+def measure(workers, args, practicum, directory):
+    """Запускает супервизор и возвращает число опросов в секунду."""
+    import homework
+    from supervisor import Supervisor
+    from tenants import Tenant
+
+    homework.logger.disabled = True
+    os.environ['CHECKPOINT_PATH'] = os.path.join(
+        directory, f'checkpoint-{workers}w.sqlite3'
+    )
+    tenants = [
+        Tenant(f'token-{index}', f'token-{index}', str(index))
+        for index in range(args.tenants)
+    ]
+    runner = Supervisor(
+        tenants, workers=workers, target=bench_worker,
+        checkpoint_path=os.environ['CHECKPOINT_PATH'],
+    )
+    runner.start()
+    try:
+        deadline = time.monotonic() + WARMUP
+        while time.monotonic() < deadline:
+            runner.step(0.1)
+        requests_before = practicum.requests
+        started = time.monotonic()
+        while time.monotonic() - started < args.duration:
+            runner.step(0.1)
+        return (practicum.requests - requests_before) / (
+            time.monotonic() - started
+        )
+    finally:
+        runner.stop()
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--tenants', type=int, default=2000)
+    parser.add_argument('--interval', type=float, default=1)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--payload', type=int, default=2000)
+    args = parser.parse_args()
+
+    board = StatusBoard(args.payload)
+    board.change(f'token-{index}' for index in range(args.tenants))
+    practicum, _ = start_server(PracticumHandler, board=board)
+    telegram, _ = start_server(TelegramHandler)
+    directory = tempfile.mkdtemp()
+    interval = str(args.interval)
+    os.environ.update({
+        'BENCH_PRACTICUM_URL':
+            practicum.url + '/api/user_api/homework_statuses/',
+        'TELEGRAM_API_URL': telegram.url,
+        'TELEGRAM_RATE': '100000',
+        'TELEGRAM_CHAT_RATE': '100000',
+        'MIN_INTERVAL': interval,
+        'MAX_INTERVAL': interval,
+        'BENCH_INTERVAL': interval,
+        'POLL_BUDGET': '0',
+        'SCHEDULER_TICK': '0.05',
+        'RESPONSE_CACHE_PATH': os.path.join(directory, 'responses.sqlite3'),
+        'RESPONSE_CACHE_TTL': '0',
+        'LOG_LEVEL': 'CRITICAL',
+    })
+    print(f'Пользователей: {args.tenants}, интервал {args.interval} с, '
+          f'ядер: {os.cpu_count()}')
+    baseline = None
+    for workers in args.workers:
+        rate = measure(workers, args, practicum, directory)
+        baseline = baseline or rate
+        print(f'  обработчиков {workers}: {rate:.0f} опросов/с, '
+              f'ускорение {rate / baseline:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Сравнение requests.get и пула соединений Transport на локальном HTTPS.
+
+Запуск: python benchmarks/bench_transport.py [--polls 300] [--tenants 8]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import homework  # noqa: E402
+from benchmarks.servers import start_server  # noqa: E402
+from transport import Transport  # noqa: E402
+
+
+def percentile(values, fraction):
+    """Возвращает перцентиль отсортированного списка."""
+    index = min(len(values) - 1, int(len(values) * fraction))
+    return values[index]
+
+
+def run(server, polls, tenants, transport):
+    """Выполняет опросы и возвращает задержки и число соединений."""
+    connections_before = server.connections
+
+    def poll(index):
+        started = time.perf_counter()
+        homework.fetch_api_answer(1, f'token-{index % tenants}', transport)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=tenants) as executor:
+        latencies = sorted(executor.map(poll, range(polls)))
+    return latencies, server.connections - connections_before
+
+
+def report(name, latencies, connections, polls):
+    """Печатает результат одного прогона."""
+    print(
+        f'{name:>10}: соединений на опрос {connections / polls:.3f}, '
+        f'p50 {statistics.median(latencies) * 1000:.2f} мс, '
+        f'p99 {percentile(latencies, 0.99) * 1000:.2f} мс'
+    )
+
+
+def main():
+    """Запускает сравнение и печатает результат."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--polls', type=int, default=300)
+    parser.add_argument('--tenants', type=int, default=8)
+    args = parser.parse_args()
+
+    homework.logger.disabled = True
+    server, cert = start_server(tls=True)
+    os.environ['REQUESTS_CA_BUNDLE'] = cert
+    homework.ENDPOINT = f'{server.url}/api/user_api/homework_statuses/'
+
+    latencies, connections = run(server, args.polls, args.tenants, None)
+    report('requests', latencies, connections, args.polls)
+
+    transport = Transport(pool_maxsize=args.tenants)
+    latencies, connections = run(server, args.polls, args.tenants, transport)
+    report('Transport', latencies, connections, args.polls)
+    transport.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
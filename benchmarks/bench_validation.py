@@ -0,0 +1,127 @@
+"""Проверка ответа API: поочередные проверки против собранной схемы.
+
+Сравнивает check_response + parse_status для каждой работы в исходном
+виде (с немедленным форматированием ошибок) и однопроходную проверку
+validate_full_response. Запуск: python benchmarks/bench_validation.py
+"""
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import homework  # noqa: E402
+
+HOMEWORK_STATUSES = homework.HOMEWORK_STATUSES
+
+
+def baseline_check_response(response):
+    """Исходная проверка ответа API."""
+    if not isinstance(response, dict):
+        raise TypeError(f'Не словарь. response = {response}.')
+    homeworks = response.get('homeworks')
+    if 'homeworks' not in response:
+        raise KeyError(f'Нет ключа "homeworks". response = {response}.')
+    if not isinstance(homeworks, list):
+        raise TypeError(f'"homeworks" не список. response = {response}.')
+    current_date = response.get('current_date')
+    if 'current_date' not in response:
+        raise KeyError(f'Нет ключа "current_date". response = {response}.')
+    if not isinstance(current_date, int):
+        raise TypeError(f'"current_date" не число. response = {response}.')
+    return homeworks
+
+
+def baseline_parse_status(homework):
+    """Исходное извлечение статуса работы."""
+    if not isinstance(homework, dict):
+        raise TypeError(f'Не словарь. homework = {homework}.')
+    homework_name = homework.get('homework_name')
+    if 'homework_name' not in homework:
+        raise KeyError(f'Нет ключа "homework_name". homework = {homework}.')
+    if not isinstance(homework_name, str):
+        raise TypeError(f'"homework_name" не строка. homework = {homework}.')
+    status = homework.get('status')
+    if 'status' not in homework:
+        raise KeyError(f'Нет ключа "status". homework = {homework}.')
+    if not isinstance(status, str):
+        raise TypeError(f'"status" не строка. homework = {homework}.')
+    if status not in HOMEWORK_STATUSES:
+        raise KeyError(f'Неизвестный статус. homework = {homework}.')
+    verdict = HOMEWORK_STATUSES[status]
+    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+
+
+def baseline(response):
+    """Проверяет ответ исходным способом."""
+    return [
+        baseline_parse_status(item)
+        for item in baseline_check_response(response)
+    ]
+
+
+def compiled(response):
+    """Проверяет ответ собранной схемой за один проход."""
+    homeworks = homework.validate_full_response(response)['homeworks']
+    render = homework.renderer.render
+    return [
+        render(item['status'], item['homework_name'])
+        for item in homeworks
+    ]
+
+
+def make_response(count):
+    """Создает ответ API с count работами."""
+    statuses = list(HOMEWORK_STATUSES)
+    return {
+        'homeworks': [
+            {
+                'id': index,
+                'homework_name': f'user__hw{index}.zip',
+                'status': statuses[index % len(statuses)],
+                'reviewer_comment': 'Комментарий ревьюера' * 5,
+                'date_updated': '2022-01-01T00:00:00Z',
+                'lesson_name': 'Урок',
+            }
+            for index in range(count)
+        ],
+        'current_date': 1,
+    }
+
+
+def error_cost(func, response):
+    """Возвращает время обработки ответа с ошибкой в конце, мкс."""
+    def run():
+        try:
+            func(response)
+        except KeyError as error:
+            return error
+
+    number = 20
+    return timeit.timeit(run, number=number) / number * 1e6
+
+
+def main():
+    """Запускает бенчмарк и печатает результат."""
+    homework.logger.disabled = True
+    for count in (1, 100, 10000):
+        response = make_response(count)
+        number = max(1, 20000 // count)
+        for name, func in (('исходная', baseline), ('схема', compiled)):
+            seconds = timeit.timeit(lambda: func(response), number=number)
+            print(
+                f'{count:>6} работ, {name:>8}: '
+                f'{seconds / number * 1e6:.1f} мкс на ответ'
+            )
+        broken = make_response(count)
+        broken['homeworks'][-1]['status'] = 'unknown'
+        for name, func in (('исходная', baseline), ('схема', compiled)):
+            print(
+                f'{count:>6} работ, {name:>8}, ошибка: '
+                f'{error_cost(func, broken):.1f} мкс'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""Локальные заменители API Практикума и Telegram для бенчмарков."""
+import json
+import os
+import random
+import re
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+STATUSES = ('reviewing', 'rejected', 'approved')
+HOMEWORK_NAME = re.compile(r'"(hw-[^"]+)"')
+
+
+class StatusBoard:
+    """Статусы работ пользователей стенда.
+
+    Каждому токену соответствует одна работа hw-<токен>. change() меняет
+    ее статус и запоминает момент изменения, а delivered() по тексту
+    сообщения находит работу и считает задержку уведомления.
+    """
+
+    def __init__(self, payload=0):
+        """Создает доску; payload — размер комментария ревьюера, байт."""
+        self.comment = 'x' * payload
+        self.homeworks = {}
+        self.changed_at = {}
+        self.latencies = []
+        self.lock = threading.Lock()
+
+    def change(self, tokens):
+        """Меняет статус работ пользователей с токенами tokens."""
+        now = time.time()
+        with self.lock:
+            for token in tokens:
+                homework = self.homeworks.get(token)
+                index = 0 if homework is None else (
+                    STATUSES.index(homework['status']) + 1
+                ) % len(STATUSES)
+                name = f'hw-{token}'
+                self.homeworks[token] = {
+                    'id': hash(token) & 0xFFFFFFFF,
+                    'homework_name': name,
+                    'status': STATUSES[index],
+                    'reviewer_comment': self.comment,
+                    'date_updated': time.strftime(
+                        '%Y-%m-%dT%H:%M:%SZ', time.gmtime(now)
+                    ),
+                    'updated': int(now),
+                }
+                self.changed_at[name] = time.monotonic()
+
+    def updated_since(self, token, from_date):
+        """Возвращает работы пользователя, измененные не раньше from_date."""
+        with self.lock:
+            homework = self.homeworks.get(token)
+        if homework is None or homework['updated'] < from_date:
+            return []
+        return [homework]
+
+    def delivered(self, text):
+        """Учитывает доставку сообщения с текстом text."""
+        match = HOMEWORK_NAME.search(text)
+        if match is None:
+            return
+        with self.lock:
+            changed_at = self.changed_at.pop(match.group(1), None)
+            if changed_at is not None:
+                self.latencies.append(time.monotonic() - changed_at)
+
+    @property
+    def pending(self):
+        """Возвращает число изменений, о которых еще не сообщили."""
+        with self.lock:
+            return len(self.changed_at)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Многопоточный HTTP-сервер, считающий принятые соединения."""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, handler_class, latency=0.0, error_rate=0.0,
+                 board=None, stall_rate=0.0, stall=0.0):
+        """Создает сервер с заданной задержкой и долей ошибок ответа.
+
+        Доля stall_rate ответов дополнительно зависает на stall секунд.
+        """
+        super().__init__(address, handler_class)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.board = board
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.connections = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def get_request(self):
+        """Принимает соединение и увеличивает счетчик соединений."""
+        request = super().get_request()
+        with self.lock:
+            self.connections += 1
+        return request
+
+    @property
+    def url(self):
+        """Возвращает базовый адрес сервера."""
+        scheme = 'https' if isinstance(self.socket, ssl.SSLSocket) else 'http'
+        host, port = self.server_address[:2]
+        return f'{scheme}://{host}:{port}'
+
+    def failed(self):
+        """Учитывает запрос, ждет задержку и решает, вернуть ли ошибку."""
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.stall_rate and random.random() < self.stall_rate:
+            time.sleep(self.stall)
+        return self.error_rate and random.random() < self.error_rate
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """Базовый обработчик стенда с ответами в JSON."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    wbufsize = 65536
+
+    def send_json(self, status, data):
+        """Отправляет ответ с кодом status и телом data."""
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Отключает журнал запросов."""
+
+
+class PracticumHandler(JSONHandler):
+    """Обработчик, имитирующий эндпоинт homework_statuses."""
+
+    def do_GET(self):
+        """Отвечает работами, измененными с from_date, или ошибкой 500."""
+        if self.server.failed():
+            self.send_json(500, {'code': 'server_error'})
+            return
+        homeworks = []
+        if self.server.board is not None:
+            query = parse_qs(urlsplit(self.path).query)
+            from_date = int(query.get('from_date', ['0'])[0])
+            token = self.headers.get('Authorization', '').split(' ')[-1]
+            homeworks = self.server.board.updated_since(token, from_date)
+        self.send_json(
+            200, {'homeworks': homeworks, 'current_date': int(time.time())}
+        )
+
+
+class TelegramHandler(JSONHandler):
+    """Обработчик, имитирующий метод sendMessage Bot API."""
+
+    def do_POST(self):
+        """Принимает сообщение или отвечает ошибкой 500."""
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length).decode()
+        if self.server.failed():
+            self.send_json(
+                500, {'ok': False, 'error_code': 500,
+                      'description': 'Internal Server Error'}
+            )
+            return
+        if self.headers.get('Content-Type', '').startswith('application/json'):
+            data = json.loads(body)
+        else:
+            data = {
+                key: values[0] for key, values in parse_qs(body).items()
+            }
+        if self.server.board is not None:
+            self.server.board.delivered(data.get('text', ''))
+        self.send_json(200, {'ok': True, 'result': {
+            'message_id': self.server.requests,
+            'date': int(time.time()),
+            'chat': {'id': int(data.get('chat_id', 0)), 'type': 'private'},
+            'text': data.get('text', ''),
+        }})
+
+
+def make_certificate(directory):
+    """Создает самоподписанный сертификат для 127.0.0.1."""
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        [
+            'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+            '-days', '1', '-subj', '/CN=127.0.0.1',
+            '-addext', 'subjectAltName=IP:127.0.0.1',
+            '-keyout', key, '-out', cert,
+        ],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def start_server(handler_class=PracticumHandler, latency=0.0, tls=False,
+                 error_rate=0.0, board=None, stall_rate=0.0, stall=0.0):
+    """Запускает сервер в фоновом потоке.
+
+    Для TLS возвращает также путь к сертификату, которому нужно доверять
+    на клиенте (например, через REQUESTS_CA_BUNDLE).
+    """
+    server = StandInServer(
+        ('127.0.0.1', 0), handler_class, latency, error_rate, board,
+        stall_rate, stall,
+    )
+    cert = None
+    if tls:
+        directory = tempfile.mkdtemp()
+        cert, key = make_certificate(directory)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, cert
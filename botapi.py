@@ -0,0 +1,78 @@
+import os
+import sys
+
+from requests import RequestException
+
+from transport import Transport
+
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+
+
+class BotAPIError(Exception):
+    """Ошибка вызова Bot API.
+
+    retry_after задан, когда Telegram просит повторить запрос позже.
+    """
+
+    def __init__(self, message, error_code=None, retry_after=None):
+        """Создает ошибку с описанием и кодом ответа."""
+        super().__init__(message)
+        self.error_code = error_code
+        self.retry_after = retry_after
+
+
+def bot_errors():
+    """Возвращает типы ошибок отправки сообщения.
+
+    TelegramError добавляется, только если python-telegram-bot уже
+    загружен: иначе такую ошибку некому выбросить.
+    """
+    telegram = sys.modules.get('telegram')
+    if telegram is None:
+        return (BotAPIError,)
+    return (BotAPIError, telegram.TelegramError)
+
+
+class BotClient:
+    """Минимальный клиент Bot API поверх общего HTTP-транспорта.
+
+    Заменяет telegram.Bot там, где нужен только sendMessage. Ответ 429
+    ограничивает один чат, поэтому автомат хоста Bot API его не считает.
+    """
+
+    def __init__(self, token, transport=None, base_url=TELEGRAM_API_URL):
+        """Создает клиент для бота с токеном token."""
+        self.token = token
+        self.url = f'{base_url}/bot{token}/'
+        self.transport = Transport() if transport is None else transport
+        breaker = self.transport.breaker(base_url)
+        if breaker is not None:
+            breaker.throttling = False
+
+    def send_message(self, chat_id, text):
+        """Отправляет сообщение и возвращает его описание от Telegram."""
+        return self.call('sendMessage', chat_id=chat_id, text=text)
+
+    def call(self, method, **params):
+        """Вызывает метод Bot API и возвращает поле result ответа."""
+        try:
+            response = self.transport.post(self.url + method, json=params)
+            data = response.json()
+        except (RequestException, ValueError) as error:
+            raise self.error(method, error) from error
+        return self.result(method, response, data)
+
+    def error(self, method, error):
+        """Возвращает BotAPIError для ошибки запроса, скрывая токен."""
+        message = str(error).replace(self.token, '***')
+        return BotAPIError(f'{method}: {message}')
+
+    def result(self, method, response, data):
+        """Возвращает поле result ответа или выбрасывает BotAPIError."""
+        if not data.get('ok'):
+            raise BotAPIError(
+                data.get('description', f'{method}: ошибка Bot API'),
+                data.get('error_code', response.status_code),
+                data.get('parameters', {}).get('retry_after'),
+            )
+        return data['result']
@@ -0,0 +1,160 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http import HTTPStatus
+
+from requests import ConnectionError
+
+import metrics
+
+BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', 0.5))
+BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', 10))
+BREAKER_WINDOW = float(os.getenv('BREAKER_WINDOW', 60))
+BREAKER_OPEN_TIMEOUT = float(os.getenv('BREAKER_OPEN_TIMEOUT', 30))
+BREAKER_PROBES = int(os.getenv('BREAKER_PROBES', 1))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+logger = logging.getLogger('homework')
+
+
+class CircuitOpenError(ConnectionError):
+    """Запрос отклонен: автомат для хоста разомкнут."""
+
+
+def is_failure_status(status_code):
+    """Проверяет, говорит ли код ответа о недоступности сервиса.
+
+    Ошибки клиента (неверный токен, неизвестный чат) сервис не
+    характеризуют и автомат не размыкают.
+    """
+    return (
+        status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+        or status_code == HTTPStatus.TOO_MANY_REQUESTS
+    )
+
+
+class CircuitBreaker:
+    """Автомат защиты вызовов одного сервиса.
+
+    Замкнут — запросы проходят, а их исходы копятся в окне window секунд.
+    Когда в окне не меньше min_calls запросов и доля неудач достигает
+    failure_rate, автомат размыкается и open_timeout секунд отклоняет
+    запросы без обращения к сети. Затем он становится полуоткрытым и
+    пропускает не больше probes пробных запросов: успех пробы замыкает
+    автомат, неудача снова размыкает. Если throttling ложно, ответ 429
+    неудачей не считается: так Telegram ограничивает отдельный чат, а не
+    сообщает о недоступности хоста.
+
+    Каждая смена состояния начинает новое поколение. allow возвращает
+    поколение, в котором запрос пропущен, и исход запроса, пропущенного
+    до последней смены состояния, record не учитывает: поздний ответ не
+    должен ни размыкать замкнутый заново автомат, ни сбивать счет проб.
+    """
+
+    def __init__(self, name, failure_rate=BREAKER_FAILURE_RATE,
+                 min_calls=BREAKER_MIN_CALLS, window=BREAKER_WINDOW,
+                 open_timeout=BREAKER_OPEN_TIMEOUT, probes=BREAKER_PROBES,
+                 clock=time.monotonic, throttling=True):
+        """Создает замкнутый автомат и публикует его состояние в метриках."""
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_timeout = open_timeout
+        self.probes = probes
+        self.clock = clock
+        self.throttling = throttling
+        self.state = CLOSED
+        self.buckets = deque()
+        self.opened_at = 0.0
+        self.probing = 0
+        self.generation = 0
+        self.lock = threading.Lock()
+        metrics.gauge(
+            'homework_breaker_state',
+            'Состояние автомата: 0 — замкнут, 1 — разомкнут, 2 — полуоткрыт.',
+            lambda: STATE_VALUES[self.state], breaker=name,
+        )
+        self.rejected = metrics.counter(
+            'homework_breaker_rejected_total',
+            'Отклоненные автоматом запросы.', breaker=name,
+        )
+
+    def allow(self):
+        """Пропускает запрос или выбрасывает CircuitOpenError.
+
+        Возвращает поколение автомата, которое нужно передать в record.
+        """
+        with self.lock:
+            if self.state == OPEN:
+                if self.clock() - self.opened_at < self.open_timeout:
+                    self._reject()
+                self.state = HALF_OPEN
+                self.probing = 0
+                self.generation += 1
+            if self.state == HALF_OPEN:
+                if self.probing >= self.probes:
+                    self._reject()
+                self.probing += 1
+            return self.generation
+
+    def failed(self, status_code):
+        """Проверяет, считается ли ответ с кодом status_code неудачей."""
+        if status_code == HTTPStatus.TOO_MANY_REQUESTS:
+            return self.throttling
+        return is_failure_status(status_code)
+
+    def record(self, failed, generation):
+        """Учитывает исход запроса, пропущенного в поколении generation."""
+        with self.lock:
+            if generation != self.generation:
+                return
+            if self.state == HALF_OPEN:
+                self.probing -= 1
+                if failed:
+                    self._open()
+                else:
+                    self._close()
+            elif self.state == CLOSED:
+                self._count(failed)
+
+    def _count(self, failed):
+        now = self.clock()
+        second = int(now)
+        if self.buckets and self.buckets[-1][0] == second:
+            self.buckets[-1][1] += 1
+            self.buckets[-1][2] += failed
+        else:
+            self.buckets.append([second, 1, int(failed)])
+        while self.buckets[0][0] <= now - self.window:
+            self.buckets.popleft()
+        calls = sum(bucket[1] for bucket in self.buckets)
+        failures = sum(bucket[2] for bucket in self.buckets)
+        if calls >= self.min_calls and failures >= self.failure_rate * calls:
+            self._open()
+
+    def _open(self):
+        if self.state != OPEN:
+            logger.warning('Автомат %s разомкнут.', self.name)
+        self.state = OPEN
+        self.opened_at = self.clock()
+        self.generation += 1
+        self.buckets.clear()
+
+    def _close(self):
+        logger.info('Автомат %s замкнут.', self.name)
+        self.state = CLOSED
+        self.generation += 1
+        self.buckets.clear()
+
+    def _reject(self):
+        self.rejected.inc()
+        raise CircuitOpenError(
+            f'Автомат {self.name} разомкнут: запросы приостановлены.'
+        )
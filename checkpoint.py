@@ -0,0 +1,229 @@
+import os
+import sqlite3
+import threading
+import time
+
+from statuses import StatusIndex
+
+CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH', 'checkpoint.sqlite3')
+CHECKPOINT_BATCH_SIZE = int(os.getenv('CHECKPOINT_BATCH_SIZE', 500))
+CHECKPOINT_FLUSH_INTERVAL = float(os.getenv('CHECKPOINT_FLUSH_INTERVAL', 1))
+
+MIGRATIONS = ('''
+CREATE TABLE IF NOT EXISTS cursors (
+    tenant TEXT PRIMARY KEY,
+    cursor INTEGER NOT NULL
+) WITHOUT ROWID;
+DROP TABLE IF EXISTS delivered;
+CREATE TABLE IF NOT EXISTS last_status (
+    tenant TEXT NOT NULL,
+    homework TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (tenant, homework)
+) WITHOUT ROWID;
+''',)
+
+
+def homework_key(homework):
+    """Возвращает ключ домашней работы: id, а при его отсутствии имя."""
+    return str(homework.get('id', homework.get('homework_name')))
+
+
+class CheckpointStore:
+    """Устойчивое к сбоям хранилище курсоров и доставленных статусов.
+
+    SQLite в режиме WAL: каждая запись обновляет одну строку, а фиксация
+    транзакции (и fsync) выполняется пачкой — по числу записей, по времени
+    или явным вызовом flush(). Незафиксированные записи теряются при
+    сбое, поэтому статус может быть отправлен повторно, но не потерян.
+    Схема обновляется миграциями из MIGRATIONS один раз: номер последней
+    примененной хранится в PRAGMA user_version.
+    """
+
+    def __init__(self, path=CHECKPOINT_PATH,
+                 batch_size=CHECKPOINT_BATCH_SIZE,
+                 flush_interval=CHECKPOINT_FLUSH_INTERVAL):
+        """Открывает или создает хранилище."""
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.flushed_at = time.monotonic()
+        self.connection = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self._migrate()
+        self.index = StatusIndex(self)
+
+    def for_tenant(self, tenant):
+        """Возвращает представление хранилища для одного пользователя."""
+        return TenantCheckpoint(self, tenant)
+
+    def load_cursor(self, tenant):
+        """Возвращает сохраненную метку времени пользователя или None."""
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT cursor FROM cursors WHERE tenant = ?',
+                (tenant,),
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_cursor(self, tenant, current_date):
+        """Сохраняет метку времени пользователя."""
+        self._write((
+            'INSERT INTO cursors (tenant, cursor) VALUES (?, ?)'
+            ' ON CONFLICT (tenant) DO UPDATE SET cursor = excluded.cursor',
+            (tenant, current_date),
+        ))
+
+    def load_status(self, tenant, homework):
+        """Возвращает последний отправленный статус работы или None."""
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT status FROM last_status'
+                ' WHERE tenant = ? AND homework = ?',
+                (tenant, homework),
+            ).fetchone()
+        return row[0] if row else None
+
+    def mark_delivered(self, tenant, homework, status):
+        """Отмечает статус домашней работы как отправленный и последний."""
+        self._write((
+            'INSERT INTO last_status (tenant, homework, status)'
+            ' VALUES (?, ?, ?) ON CONFLICT (tenant, homework)'
+            ' DO UPDATE SET status = excluded.status',
+            (tenant, homework, status),
+        ))
+
+    def export_tenants(self, tenants):
+        """Возвращает курсоры и последние статусы работ пользователей.
+
+        Результат — словарь {пользователь: (курсор, {работа: статус})}
+        только для пользователей, о которых есть записи.
+        """
+        tenants = set(tenants)
+        with self.lock:
+            cursors = self.connection.execute(
+                'SELECT tenant, cursor FROM cursors'
+            ).fetchall()
+            statuses = self.connection.execute(
+                'SELECT tenant, homework, status FROM last_status'
+            ).fetchall()
+        exported = {
+            tenant: (cursor, {})
+            for tenant, cursor in cursors if tenant in tenants
+        }
+        for tenant, homework, status in statuses:
+            if tenant in exported:
+                exported[tenant][1][homework] = status
+        return exported
+
+    def import_tenants(self, exported):
+        """Записывает курсоры и статусы, полученные от export_tenants."""
+        self.index.forget(exported)
+        for tenant, (cursor, statuses) in exported.items():
+            self.save_cursor(tenant, cursor)
+            for homework, status in statuses.items():
+                self.mark_delivered(tenant, homework, status)
+        self.flush()
+
+    def flush(self):
+        """Фиксирует накопленные записи на диске."""
+        with self.lock:
+            self._commit()
+
+    def close(self):
+        """Фиксирует записи и закрывает хранилище."""
+        self.flush()
+        self.connection.close()
+
+    def _write(self, *statements):
+        with self.lock:
+            if not self.connection.in_transaction:
+                self.connection.execute('BEGIN')
+            for sql, params in statements:
+                self.connection.execute(sql, params)
+            self.pending += 1
+            overdue = (
+                time.monotonic() - self.flushed_at >= self.flush_interval
+            )
+            if self.pending >= self.batch_size or overdue:
+                self._commit()
+
+    def _commit(self):
+        if self.connection.in_transaction:
+            self.connection.execute('COMMIT')
+        self.pending = 0
+        self.flushed_at = time.monotonic()
+
+    def _migrate(self):
+        if self._schema_version() >= len(MIGRATIONS):
+            return
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            for script in MIGRATIONS[self._schema_version():]:
+                for statement in script.split(';'):
+                    self.connection.execute(statement)
+            self.connection.execute(f'PRAGMA user_version = {len(MIGRATIONS)}')
+        except BaseException:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+
+    def _schema_version(self):
+        return self.connection.execute('PRAGMA user_version').fetchone()[0]
+
+
+class TenantCheckpoint:
+    """Курсор и доставленные статусы одного пользователя."""
+
+    __slots__ = ('store', 'tenant')
+
+    def __init__(self, store, tenant):
+        """Привязывает представление к пользователю."""
+        self.store = store
+        self.tenant = tenant
+
+    @property
+    def cursor(self):
+        """Возвращает сохраненную метку времени или None."""
+        return self.store.load_cursor(self.tenant)
+
+    def save_cursor(self, current_date):
+        """Сохраняет метку времени."""
+        self.store.save_cursor(self.tenant, current_date)
+
+    def is_delivered(self, homework):
+        """Проверяет, что статус работы не изменился с последней отправки.
+
+        Отправлять нужно только переходы: повтор или перестановка
+        записей в ответе API сообщения не порождают.
+        """
+        return not self.store.index.is_transition(
+            self.tenant, homework_key(homework), homework['status']
+        )
+
+    def reserve(self, homework):
+        """Занимает отправку статуса работы, если это новый переход.
+
+        Возвращает False, если статус уже отправлен или отправляется.
+        Занятый статус нужно подтвердить mark_delivered или вернуть
+        release.
+        """
+        return self.store.index.reserve(
+            self.tenant, homework_key(homework), homework['status']
+        )
+
+    def release(self, homework):
+        """Отменяет занятие статуса работы после неудачной отправки."""
+        self.store.index.release(
+            self.tenant, homework_key(homework), homework['status']
+        )
+
+    def mark_delivered(self, homework):
+        """Отмечает текущий статус домашней работы как отправленный."""
+        self.store.index.record(
+            self.tenant, homework_key(homework), homework['status']
+        )
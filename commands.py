@@ -0,0 +1,252 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import homework
+import metrics
+from incidents import format_duration
+from statuses import intern_status
+
+STATUS_COMMAND = os.getenv('STATUS_COMMAND', '1') not in ('', '0')
+STATUS_MAX_AGE = float(os.getenv('STATUS_MAX_AGE', 3600))
+UPDATES_TIMEOUT = int(os.getenv('UPDATES_TIMEOUT', 25))
+COMMAND_WORKERS = int(os.getenv('COMMAND_WORKERS', 4))
+UPDATES_RETRY_DELAY = 5
+
+STATUS_TITLE = 'Статусы проверки работ:'
+NO_HOMEWORKS = 'Работ на проверке пока нет.'
+NO_STATUSES = 'Не удалось получить статусы работ, попробуйте позже.'
+OUTDATED = 'Не удалось обновить статусы, данные получены {age} назад.'
+
+logger = homework.logger
+
+
+def fetch_snapshot(tenant, transport=None):
+    """Запрашивает и проверяет статусы всех работ пользователя."""
+    response = homework.load_api_answer(0, tenant.practicum_token, transport)
+    return homework.validate_full_response(response)['homeworks']
+
+
+def status_report(homeworks, locale=None):
+    """Собирает ответ на /status по статусам работ."""
+    if not homeworks:
+        return NO_HOMEWORKS
+    lines = [STATUS_TITLE]
+    for name, status in homeworks.items():
+        verdict = homework.renderer.verdict(status, locale)
+        lines.append(f'{name}: {verdict}')
+    return '\n'.join(lines)
+
+
+class CachedStatuses:
+    """Последние известные статусы работ одного чата.
+
+    homeworks сопоставляет названию работы ее статус — общую для всех
+    чатов строку, а не весь ответ API. updated_at — момент последнего
+    полного снимка или опроса после него; пока полного снимка не было,
+    он равен None.
+    """
+
+    __slots__ = ('tenant', 'homeworks', 'updated_at', 'text', 'refresh')
+
+    def __init__(self, tenant):
+        """Создает пустую запись чата пользователя."""
+        self.tenant = tenant
+        self.homeworks = {}
+        self.updated_at = None
+        self.text = None
+        self.refresh = None
+
+
+class StatusCache:
+    """Кеш проверенных статусов работ по чатам для команды /status.
+
+    Каждый опрос дописывает в кеш изменившиеся работы, поэтому ответ на
+    команду не требует запроса к API. Устаревшая запись обновляется
+    полным снимком, причем одновременные команды одного чата ждут один
+    и тот же запрос.
+    """
+
+    def __init__(self, max_age=STATUS_MAX_AGE, clock=time.monotonic):
+        """Создает пустой кеш с допустимым возрастом max_age секунд."""
+        self.max_age = max_age
+        self.clock = clock
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def add(self, tenant):
+        """Добавляет чат пользователя в кеш."""
+        self.entries[tenant.chat_id] = CachedStatuses(tenant)
+
+    def get(self, chat_id):
+        """Возвращает запись чата или None для незнакомого чата."""
+        return self.entries.get(chat_id)
+
+    def update(self, chat_id, homeworks, complete=False):
+        """Запоминает проверенные работы чата.
+
+        complete=True означает полный снимок всех работ пользователя.
+        """
+        entry = self.entries.get(chat_id)
+        if entry is None:
+            return
+        with self.lock:
+            for item in homeworks:
+                entry.homeworks[item['homework_name']] = intern_status(
+                    item['status']
+                )
+            if complete or entry.updated_at is not None:
+                entry.updated_at = self.clock()
+            entry.text = None
+
+    def is_stale(self, entry):
+        """Проверяет, нужен ли записи полный снимок."""
+        return (
+            entry.updated_at is None
+            or self.clock() - entry.updated_at > self.max_age
+        )
+
+    def report(self, entry):
+        """Возвращает ответ на /status по записи."""
+        text = entry.text
+        if text is None:
+            with self.lock:
+                text = entry.text = status_report(
+                    entry.homeworks, entry.tenant.locale
+                )
+        return text
+
+    def refresh(self, chat_id, fetch, executor):
+        """Запускает обновление записи или возвращает уже начатое.
+
+        Возвращает Future обновления.
+        """
+        with self.lock:
+            entry = self.entries[chat_id]
+            if entry.refresh is None:
+                entry.refresh = executor.submit(self._refresh, entry, fetch)
+            return entry.refresh
+
+    def _refresh(self, entry, fetch):
+        try:
+            homeworks = fetch(entry.tenant)
+            self.update(entry.tenant.chat_id, homeworks, complete=True)
+        finally:
+            with self.lock:
+                entry.refresh = None
+
+
+class StatusForwarder:
+    """Пересылает результаты опросов в кеш статусов другого процесса.
+
+    Заменяет StatusCache в обработчиках супервизора: кеш и прием команд
+    живут в супервизоре, единственном получателе getUpdates.
+    """
+
+    def __init__(self, connection):
+        """Создает пересылку через канал к супервизору.
+
+        connection должен отправлять без блокировки, как
+        engine.ControlChannel: update вызывается из цикла событий.
+        """
+        self.connection = connection
+
+    def update(self, chat_id, homeworks, complete=False):
+        """Отправляет проверенные работы чата."""
+        self.connection.send(('statuses', (chat_id, homeworks, complete)))
+
+
+class CommandPoller:
+    """Прием команд из Telegram длинным опросом getUpdates.
+
+    На /status отвечает из кеша статусов. Команды из чатов, которых нет
+    в кеше, игнорируются. Ответы отправляются через bot (по умолчанию
+    через client), поэтому подчиняются тем же ограничениям скорости, что
+    и уведомления.
+    """
+
+    def __init__(self, client, cache, transport=None, bot=None,
+                 timeout=UPDATES_TIMEOUT, workers=COMMAND_WORKERS):
+        """Создает приемник команд поверх клиента Bot API."""
+        self.client = client
+        self.cache = cache
+        self.transport = transport
+        self.bot = client if bot is None else bot
+        self.timeout = timeout
+        self.offset = None
+        self.stopped = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Запускает прием команд в фоновом потоке."""
+        self.thread.start()
+
+    def close(self):
+        """Останавливает прием команд, дожидаясь начатых ответов."""
+        self.stopped.set()
+        self.executor.shutdown()
+
+    def poll(self):
+        """Получает и обрабатывает очередную порцию обновлений."""
+        params = {'timeout': self.timeout, 'allowed_updates': ['message']}
+        if self.offset is not None:
+            params['offset'] = self.offset
+        updates = self.client.call('getUpdates', **params)
+        for update in updates:
+            self.offset = update['update_id'] + 1
+            self.handle(update)
+        return len(updates)
+
+    def handle(self, update):
+        """Отвечает на команду /status из обновления."""
+        message = update.get('message') or {}
+        text = message.get('text') or ''
+        if not text.startswith('/'):
+            return
+        command = text.split()[0].partition('@')[0]
+        chat_id = str(message.get('chat', {}).get('id'))
+        entry = self.cache.get(chat_id)
+        if command != '/status' or entry is None:
+            return
+        if not self.cache.is_stale(entry):
+            self._count('hit')
+            self.executor.submit(self._reply, chat_id, entry)
+            return
+        self._count('refresh')
+        refresh = self.cache.refresh(chat_id, self._fetch, self.executor)
+        refresh.add_done_callback(
+            lambda done: self._reply(chat_id, entry, done.exception())
+        )
+
+    def _fetch(self, tenant):
+        return fetch_snapshot(tenant, self.transport)
+
+    def _count(self, cache):
+        metrics.counter(
+            'homework_status_commands_total', 'Команды /status.', cache=cache
+        ).inc()
+
+    def _reply(self, chat_id, entry, error=None):
+        if error is not None:
+            logger.error('Не удалось обновить статусы: %s', error)
+        if entry.updated_at is None:
+            text = NO_STATUSES
+        else:
+            text = self.cache.report(entry)
+            if error is not None:
+                age = self.cache.clock() - entry.updated_at
+                text += '\n' + OUTDATED.format(age=format_duration(age))
+        try:
+            homework.send_chat_message(self.bot, chat_id, text)
+        except IOError as send_error:
+            logger.exception(send_error)
+
+    def _run(self):
+        while not self.stopped.is_set():
+            try:
+                self.poll()
+            except Exception as error:
+                logger.exception(error)
+                self.stopped.wait(UPDATES_RETRY_DELAY)
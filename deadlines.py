@@ -0,0 +1,72 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+from requests import Timeout
+
+import metrics
+
+ITERATION_DEADLINE = float(os.getenv('ITERATION_DEADLINE', 60))
+
+deadline_var = contextvars.ContextVar('deadline', default=None)
+
+
+class DeadlineExceeded(Timeout):
+    """Срок итерации опроса истек."""
+
+
+@contextmanager
+def deadline(seconds=ITERATION_DEADLINE):
+    """Ограничивает запросы внутри блока сроком seconds секунд.
+
+    Срок хранится в contextvars, поэтому действует и в задачах asyncio,
+    и в потоках, получивших копию контекста. Вложенный блок не может
+    продлить внешний срок. Без срока (seconds <= 0) блок ничего не
+    ограничивает.
+    """
+    if seconds <= 0:
+        yield None
+        return
+    at = time.monotonic() + seconds
+    outer = deadline_var.get()
+    if outer is not None:
+        at = min(at, outer)
+    token = deadline_var.set(at)
+    try:
+        yield at
+    finally:
+        deadline_var.reset(token)
+
+
+def remaining():
+    """Возвращает остаток срока в секундах или None, если срока нет."""
+    at = deadline_var.get()
+    return None if at is None else at - time.monotonic()
+
+
+def expired():
+    """Проверяет, истек ли срок."""
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def exceeded():
+    """Учитывает истекший срок и возвращает DeadlineExceeded."""
+    metrics.counter(
+        'homework_deadline_exceeded_total', 'Запросы после истечения срока.'
+    ).inc()
+    return DeadlineExceeded('Истек срок итерации опроса.')
+
+
+def timeout(connect, read):
+    """Возвращает таймауты соединения и чтения, не выходящие за срок.
+
+    Если срок уже истек, выбрасывает DeadlineExceeded.
+    """
+    left = remaining()
+    if left is None:
+        return connect, read
+    if left <= 0:
+        raise exceeded()
+    return min(connect, left), min(read, left)
@@ -0,0 +1,472 @@
+import asyncio
+import contextvars
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import deadlines
+import homework
+import metrics
+from botapi import BotClient
+from checkpoint import (
+    CHECKPOINT_FLUSH_INTERVAL, CHECKPOINT_PATH, CheckpointStore,
+)
+from commands import (
+    STATUS_COMMAND, CommandPoller, StatusCache, StatusForwarder,
+)
+from hedging import HEDGE_REQUESTS, Hedger
+from incidents import ErrorAggregator
+from logs import log_context
+from intervals import POLL_BUDGET, AdaptiveInterval, budget_floor
+from outbox import TELEGRAM_RATE, Outbox
+from pipeline import Pipeline
+from profiling import profiler
+from responses import ResponseCache
+from scheduler import TimingWheel, jittered
+from tenants import load_tenants
+from transport import Transport
+
+MAX_CONCURRENCY = int(os.getenv('MAX_CONCURRENCY', 32))
+STATS_INTERVAL = 60
+HANDOFF_TIMEOUT = 30
+HANDOFF_POLL_INTERVAL = 0.05
+
+logger = homework.logger
+
+
+class WorkerStopped(Exception):
+    """Супервизор остановил процесс-обработчик."""
+
+
+class ControlChannel:
+    """Канал к супервизору, отправка в который не блокирует цикл событий.
+
+    Сообщения уходят из фонового потока в порядке send. Пока супервизор
+    передает большой список пользователей, канал заполнен в обе стороны;
+    блокирующая отправка из цикла событий остановила бы и чтение его
+    команд, и оба процесса ждали бы друг друга.
+    """
+
+    def __init__(self, connection):
+        """Запускает поток отправки в соединение multiprocessing."""
+        self.connection = connection
+        self.outgoing = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def fileno(self):
+        """Возвращает дескриптор соединения для ожидания команд."""
+        return self.connection.fileno()
+
+    def recv(self):
+        """Читает команду супервизора."""
+        return self.connection.recv()
+
+    def send(self, message):
+        """Ставит сообщение в очередь отправки."""
+        self.outgoing.put(message)
+
+    def close(self):
+        """Дожидается отправки поставленных в очередь сообщений."""
+        self.outgoing.put(None)
+        self.thread.join(HANDOFF_TIMEOUT)
+
+    def _run(self):
+        while True:
+            message = self.outgoing.get()
+            if message is None:
+                return
+            try:
+                self.connection.send(message)
+            except OSError as error:
+                logger.error('Канал к супервизору закрыт: %s', error)
+                return
+
+
+@dataclass
+class Runtime:
+    """Общие для всех пользователей ресурсы процесса."""
+
+    bot: object
+    executor: ThreadPoolExecutor
+    transport: Transport = None
+    store: CheckpointStore = None
+    cache: StatusCache = None
+    share: int = 1
+
+    async def call(self, func, *args):
+        """Выполняет блокирующую функцию в пуле потоков.
+
+        Функция видит контекст вызывающей задачи, в том числе поля журнала.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.executor, context.run, func, *args
+        )
+
+
+class TenantState:
+    """Состояние опроса одного пользователя.
+
+    Поля хранятся в слотах, без словаря атрибутов у каждого из сотен
+    тысяч пользователей. Агрегатор инцидентов создается при первой
+    ошибке: у большинства пользователей ошибок нет. Сама ошибка не
+    хранится, чтобы не удерживать ее трассировку с кадрами стека.
+    """
+
+    __slots__ = (
+        'tenant', 'current_timestamp', 'incidents',
+        'checkpoint', 'policy', 'batch', 'polling', 'active',
+    )
+
+    def __init__(self, tenant, current_timestamp=None, policy=None,
+                 checkpoint=None):
+        """Создает состояние, по умолчанию начиная с текущего момента."""
+        self.tenant = tenant
+        self.current_timestamp = (
+            int(time.time()) if current_timestamp is None
+            else current_timestamp
+        )
+        self.incidents = None
+        self.checkpoint = checkpoint
+        self.policy = AdaptiveInterval() if policy is None else policy
+        self.batch = None
+        self.polling = False
+        self.active = True
+
+    @property
+    def busy(self):
+        """Проверяет, идет ли опрос или доставка его сообщений."""
+        return self.polling or self.batch is not None
+
+
+def make_state(tenant, runtime, interval):
+    """Создает состояние пользователя, восстанавливая курсор."""
+    state = TenantState(tenant, policy=AdaptiveInterval(base=interval))
+    if runtime.store is not None:
+        state.checkpoint = runtime.store.for_tenant(tenant.name)
+        state.current_timestamp = (
+            state.checkpoint.cursor or state.current_timestamp
+        )
+    return state
+
+
+async def report_incident(tenant, runtime, message):
+    """Отправляет пользователю уведомление об инциденте, если оно есть."""
+    if message is None:
+        return
+    await runtime.call(
+        homework.report_chat_incident, runtime.bot, tenant.chat_id, message
+    )
+
+
+async def poll_tenant_once(state, pipeline):
+    """Опрашивает API для пользователя и передает сообщения на доставку.
+
+    Пока сообщения предыдущего опроса не доставлены, опрос пропускается.
+    """
+    if state.batch is not None:
+        logger.debug('Сообщения предыдущего опроса еще отправляются.')
+        return
+    try:
+        with deadlines.deadline():
+            current_date, statuses = await pipeline.fetch(state)
+            context = contextvars.copy_context()
+    except Exception as error:
+        logger.exception(error)
+        state.policy.observe(failed=True)
+        if state.incidents is None:
+            state.incidents = ErrorAggregator()
+        await report_incident(
+            state.tenant, pipeline.runtime, state.incidents.record(error)
+        )
+    else:
+        items = [item for item, _ in statuses]
+        state.policy.observe(items)
+        cache = pipeline.runtime.cache
+        if cache is not None:
+            cache.update(state.tenant.chat_id, items)
+        if state.incidents is not None:
+            await report_incident(
+                state.tenant, pipeline.runtime, state.incidents.resolve()
+            )
+        await pipeline.submit(state, current_date, statuses, context)
+
+
+async def poll_and_reschedule(state, pipeline, wheel, floor):
+    """Опрашивает пользователя и планирует его следующий опрос.
+
+    Интервал берется из политики пользователя, но не меньше floor —
+    минимума, при котором процесс укладывается в бюджет запросов.
+    """
+    state.polling = True
+    try:
+        with profiler.iteration(), log_context(tenant=state.tenant.name):
+            await poll_tenant_once(state, pipeline)
+    finally:
+        state.polling = False
+        if state.active:
+            interval = max(state.policy.interval, floor)
+            wheel.schedule(
+                state.tenant.name, time.monotonic() + jittered(interval)
+            )
+
+
+async def dispatch(states, pipeline, wheel):
+    """Запускает опросы пользователей по мере наступления их сроков."""
+    running = set()
+    try:
+        while True:
+            floor = budget_floor(
+                len(states), POLL_BUDGET / pipeline.runtime.share
+            )
+            for name in wheel.advance(time.monotonic()):
+                task = asyncio.create_task(
+                    poll_and_reschedule(states[name], pipeline, wheel, floor)
+                )
+                running.add(task)
+                task.add_done_callback(running.discard)
+            await asyncio.sleep(wheel.tick)
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+async def log_stats_periodically(pipeline):
+    """Периодически пишет в журнал счетчики конвейера и индекса статусов."""
+    while True:
+        await asyncio.sleep(STATS_INTERVAL)
+        for stage, stats in pipeline.stats.items():
+            logger.info('Стадия %s: %s', stage, stats.summary())
+        if pipeline.runtime.store is not None:
+            index = pipeline.runtime.store.index
+            logger.info('Индекс статусов: %s', index.stats())
+
+
+def register_gauges(pipeline):
+    """Публикует глубину очередей и счетчики индекса статусов в метриках."""
+    metrics.gauge(
+        'homework_pipeline_queue_depth', 'Пачки в очереди доставки.',
+        pipeline.queue.qsize,
+    )
+    bot = pipeline.runtime.bot
+    if isinstance(bot, Outbox):
+        metrics.gauge(
+            'homework_outbox_depth', 'Сообщения в очереди отправки.',
+            lambda: bot.depth,
+        )
+    store = pipeline.runtime.store
+    if store is not None:
+        for key in ('hits', 'misses', 'suppressed'):
+            metrics.gauge(
+                'homework_status_index', 'Счетчики индекса статусов.',
+                lambda key=key: store.index.stats()[key], counter=key,
+            )
+
+
+async def flush_periodically(runtime):
+    """Периодически фиксирует контрольные точки на диске."""
+    while True:
+        await asyncio.sleep(CHECKPOINT_FLUSH_INTERVAL)
+        await runtime.call(runtime.store.flush)
+
+
+async def release_tenants(names, states, runtime, wheel):
+    """Перестает опрашивать пользователей и фиксирует их контрольные точки.
+
+    Начатые опросы и доставки их сообщений дожидаются завершения, но не
+    дольше HANDOFF_TIMEOUT секунд.
+    """
+    released = []
+    for name in names:
+        state = states.pop(name, None)
+        if state is not None:
+            state.active = False
+            wheel.cancel(name)
+            released.append(state)
+    deadline = time.monotonic() + HANDOFF_TIMEOUT
+    while any(state.busy for state in released) and (
+        time.monotonic() < deadline
+    ):
+        await asyncio.sleep(HANDOFF_POLL_INTERVAL)
+    if runtime.store is not None:
+        await runtime.call(runtime.store.flush)
+        runtime.store.index.forget(state.tenant.name for state in released)
+
+
+async def acquire_tenants(handoffs, states, runtime, wheel, interval):
+    """Начинает опрашивать пользователей с переданными контрольными точками.
+
+    handoffs — список пар (пользователь, данные export_tenants).
+    """
+    if runtime.store is not None:
+        exported = {}
+        for tenant, data in handoffs:
+            exported.update(data)
+        await runtime.call(runtime.store.import_tenants, exported)
+    now = time.monotonic()
+    for tenant, _ in handoffs:
+        states[tenant.name] = make_state(tenant, runtime, interval)
+        wheel.schedule(tenant.name, now + random.uniform(0, interval))
+
+
+def share_limits(runtime, workers):
+    """Делит ограничения бота и API поровну между workers процессами.
+
+    Скорость отправки в Telegram и бюджет запросов к API заданы на всего
+    бота, поэтому каждый обработчик получает свою долю.
+    """
+    runtime.share = max(workers, 1)
+    if isinstance(runtime.bot, Outbox):
+        runtime.bot.set_rate(TELEGRAM_RATE / runtime.share)
+
+
+async def follow_assignment(control, states, runtime, wheel, interval):
+    """Выполняет команды супервизора о передаче пользователей.
+
+    ('acquire', handoffs) — начать опрос пользователей; ('release', names)
+    — передать пользователей и ответить ('released', names); ('share',
+    workers) — взять долю ограничений скорости; ('stop', None) —
+    завершить работу. Закрытие канала тоже завершает работу.
+    """
+    loop = asyncio.get_running_loop()
+    commands = asyncio.Queue()
+
+    def receive():
+        try:
+            commands.put_nowait(control.recv())
+        except EOFError:
+            loop.remove_reader(control.fileno())
+            commands.put_nowait(('stop', None))
+
+    loop.add_reader(control.fileno(), receive)
+    try:
+        while True:
+            command, payload = await commands.get()
+            if command == 'stop':
+                raise WorkerStopped('Обработчик остановлен супервизором.')
+            if command == 'acquire':
+                await acquire_tenants(
+                    payload, states, runtime, wheel, interval
+                )
+            elif command == 'release':
+                await release_tenants(payload, states, runtime, wheel)
+                control.send(('released', payload))
+            elif command == 'share':
+                share_limits(runtime, payload)
+    finally:
+        loop.remove_reader(control.fileno())
+
+
+async def run(tenants, bot, concurrency=MAX_CONCURRENCY, transport=None,
+              store=None, interval=None, cache=None, control=None):
+    """Опрашивает API для всех пользователей по независимым расписаниям.
+
+    interval — базовый интервал опроса, дальше он подстраивается под
+    активность каждого пользователя. Первые опросы равномерно
+    распределяются по интервалу, чтобы пользователи не обращались к API
+    в одну и ту же секунду. Результаты опросов попадают в cache, если он
+    задан. С control (канал к супервизору) список пользователей меняется
+    по его командам.
+    """
+    interval = homework.RETRY_TIME if interval is None else interval
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    runtime = Runtime(bot, executor, transport, store, cache)
+    states = {
+        tenant.name: make_state(tenant, runtime, interval)
+        for tenant in tenants
+    }
+    now = time.monotonic()
+    wheel = TimingWheel(now=now)
+    for name in states:
+        wheel.schedule(name, now + random.uniform(0, interval))
+    pipeline = Pipeline(runtime)
+    register_gauges(pipeline)
+    coroutines = [
+        dispatch(states, pipeline, wheel),
+        log_stats_periodically(pipeline),
+        *pipeline.run_workers(),
+    ]
+    if store is not None:
+        coroutines.append(flush_periodically(runtime))
+    if control is not None:
+        coroutines.append(
+            follow_assignment(control, states, runtime, wheel, interval)
+        )
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        executor.shutdown(wait=False)
+
+
+def main():
+    """Запускает опрос API для всех пользователей в одном процессе."""
+    tenants = load_tenants()
+    if not (homework.TELEGRAM_TOKEN and tenants):
+        message = (
+            'Не заданы TELEGRAM_TOKEN или список пользователей'
+            ' (TENANTS_FILE либо PRACTICUM_TOKEN и TELEGRAM_CHAT_ID).'
+            '\nПрограмма принудительно остановлена.'
+        )
+        logger.critical(message)
+        sys.exit(message)
+
+    logger.info('Запуск опроса API для пользователей: %d.', len(tenants))
+    metrics.start_server()
+    serve(tenants)
+
+
+def serve(tenants, control=None, checkpoint_path=CHECKPOINT_PATH):
+    """Создает ресурсы процесса и опрашивает API до остановки.
+
+    Без control процесс сам принимает команды /status; обработчик
+    супервизора вместо этого пересылает результаты опросов по control.
+    """
+    homework.renderer.load()
+    profiler.install()
+    transport = Transport(
+        pool_maxsize=MAX_CONCURRENCY, responses=ResponseCache(),
+        hedger=Hedger() if HEDGE_REQUESTS else None,
+    )
+    client = BotClient(homework.TELEGRAM_TOKEN, transport)
+    outbox = Outbox(client)
+    store = CheckpointStore(checkpoint_path)
+    if control is None:
+        cache = StatusCache()
+        for tenant in tenants:
+            cache.add(tenant)
+    else:
+        control = ControlChannel(control)
+        cache = StatusForwarder(control)
+    poller = CommandPoller(client, cache, transport, bot=outbox)
+    if STATUS_COMMAND and control is None:
+        poller.start()
+    try:
+        asyncio.run(run(
+            tenants, outbox, transport=transport, store=store, cache=cache,
+            control=control,
+        ))
+    except WorkerStopped as error:
+        logger.info(str(error))
+    finally:
+        poller.close()
+        outbox.close()
+        transport.close()
+        store.close()
+        if control is not None:
+            control.close()
+
+
+if __name__ == '__main__':
+    main()
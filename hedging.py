@@ -0,0 +1,134 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+from breakers import is_failure_status
+
+HEDGE_REQUESTS = os.getenv('HEDGE_REQUESTS', '0') not in ('', '0')
+HEDGE_QUANTILE = float(os.getenv('HEDGE_QUANTILE', 0.95))
+HEDGE_RATIO = float(os.getenv('HEDGE_RATIO', 0.1))
+HEDGE_MIN_DELAY = float(os.getenv('HEDGE_MIN_DELAY', 0.01))
+HEDGE_WORKERS = int(os.getenv('HEDGE_WORKERS', 64))
+HEDGE_WINDOW = 1000
+HEDGE_MIN_SAMPLES = 20
+HEDGE_REFRESH = 32
+
+
+def is_failed_response(result):
+    """Проверяет, что результат — ответ о недоступности сервиса."""
+    status_code = getattr(result, 'status_code', None)
+    return status_code is not None and is_failure_status(status_code)
+
+
+class Hedger:
+    """Дублирует медленные запросы, чтобы срезать хвост задержек.
+
+    Если запрос не завершился за задержку — quantile-квантиль недавних
+    задержек (не меньше min_delay), — отправляется его копия, и побеждает
+    первый успешный ответ; ответ с кодом 5xx или 429 успешным не
+    считается. Копий не больше доли ratio от всех запросов,
+    чтобы при общей деградации API не удваивать нагрузку. Пока
+    накоплено меньше min_samples задержек, запросы не дублируются.
+    Дублировать можно только идемпотентные запросы.
+    """
+
+    def __init__(self, quantile=HEDGE_QUANTILE, ratio=HEDGE_RATIO,
+                 min_delay=HEDGE_MIN_DELAY, workers=HEDGE_WORKERS,
+                 window=HEDGE_WINDOW, min_samples=HEDGE_MIN_SAMPLES):
+        """Создает пустую историю задержек и пул потоков для попыток."""
+        self.quantile = quantile
+        self.ratio = ratio
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.samples = deque(maxlen=window)
+        self.delay = None
+        self.observed = 0
+        self.requests = 0
+        self.hedges = 0
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='hedge'
+        )
+        metrics.gauge(
+            'homework_hedge_delay_seconds',
+            'Задержка перед дублирующим запросом, с.',
+            lambda: self.delay or 0.0,
+        )
+
+    def call(self, func):
+        """Выполняет func, дублируя вызов, если он медленнее задержки.
+
+        Возвращает первый успешный результат; если неудачны все попытки,
+        выбрасывает ошибку первой из них. Попытки видят контекст
+        вызывающего потока, в том числе срок итерации.
+        """
+        with self.lock:
+            delay = self.delay
+            self.requests += 1
+            allowed = self.hedges < self.ratio * self.requests
+        if delay is None or not allowed:
+            return self._timed(func)
+        first = self._submit(func)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        with self.lock:
+            self.hedges += 1
+        self._count('sent')
+        second = self._submit(func)
+        return self._first_success(first, second)
+
+    def observe(self, seconds):
+        """Учитывает задержку успешного запроса.
+
+        Задержка перед копией пересчитывается раз в HEDGE_REFRESH
+        запросов.
+        """
+        with self.lock:
+            self.samples.append(seconds)
+            self.observed += 1
+            if len(self.samples) < self.min_samples:
+                return
+            if self.delay is None or self.observed % HEDGE_REFRESH == 0:
+                ordered = sorted(self.samples)
+                index = min(
+                    int(len(ordered) * self.quantile), len(ordered) - 1
+                )
+                self.delay = max(ordered[index], self.min_delay)
+
+    def close(self):
+        """Останавливает пул потоков, не дожидаясь проигравших попыток."""
+        self.executor.shutdown(wait=False)
+
+    def _submit(self, func):
+        context = contextvars.copy_context()
+        return self.executor.submit(context.run, self._timed, func)
+
+    def _timed(self, func):
+        started = time.monotonic()
+        result = func()
+        if not is_failed_response(result):
+            self.observe(time.monotonic() - started)
+        return result
+
+    def _first_success(self, first, second):
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and not is_failed_response(
+                    future.result()
+                ):
+                    if future is second:
+                        self._count('won')
+                    return future.result()
+        return first.result()
+
+    def _count(self, outcome):
+        metrics.counter(
+            'homework_hedges_total', 'Дублирующие запросы.', outcome=outcome
+        ).inc()
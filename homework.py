@@ -5,12 +5,33 @@ import time
 from http import HTTPStatus
 
 import requests
-import telegram
-from dotenv import load_dotenv
 from requests import RequestException
-from telegram import TelegramError
 
-load_dotenv()
+import deadlines
+import logs
+import metrics
+from botapi import BotClient, bot_errors
+from checkpoint import CheckpointStore
+from hedging import HEDGE_REQUESTS, Hedger
+from incidents import ErrorAggregator
+from logs import log_context
+from messages import LOCALES, MessageRenderer
+from metrics import measure, timed
+from profiling import profiler
+from schema import compile_schema
+from transport import CONNECT_TIMEOUT, READ_TIMEOUT, Transport
+
+ENV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+
+def load_env(path=ENV_FILE):
+    """Загружает переменные окружения из файла .env, если он есть."""
+    if os.path.isfile(path):
+        from dotenv import load_dotenv
+        load_dotenv(path)
+
+
+load_env()
 
 ENV_VARS = ['PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID']
 
@@ -20,7 +41,6 @@ TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_TIME = 600
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
-HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
 HOMEWORK_STATUSES = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
@@ -28,114 +48,244 @@ HOMEWORK_STATUSES = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+STATUS_TEMPLATE = (
+    'Изменился статус проверки работы "{homework_name}". {verdict}'
+)
+
+HOMEWORK_SCHEMA = {
+    'name': 'homework',
+    'fields': {'homework_name': str, 'status': str},
+    'choices': {
+        'status': (
+            HOMEWORK_STATUSES, 'Недокументированный статус домашней работы.'
+        ),
+    },
+}
+RESPONSE_SCHEMA = {
+    'name': 'response',
+    'fields': {'homeworks': list, 'current_date': int},
+    'items': {'homeworks': HOMEWORK_SCHEMA},
+}
+validate_homework = compile_schema(HOMEWORK_SCHEMA)
+validate_response = compile_schema(RESPONSE_SCHEMA, deep=False)
+validate_full_response = compile_schema(RESPONSE_SCHEMA)
+
+renderer = MessageRenderer()
+renderer.add_locale('ru', STATUS_TEMPLATE, HOMEWORK_STATUSES)
+for locale, entry in LOCALES.items():
+    renderer.add_locale(locale, entry['template'], entry['verdicts'])
+
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-handler = logging.StreamHandler()
-formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
-handler.setFormatter(formatter)
-logger.addHandler(handler)
+logs.setup(logger)
 
 
 def send_message(bot, message):
     """Отправляет сообщение в Telegram."""
+    send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+@timed('send_message')
+def send_chat_message(bot, chat_id, message):
+    """Отправляет сообщение в указанный чат Telegram."""
     logger.debug('Отправка сообщения в Telegram.')
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-    except TelegramError as error:
+        bot.send_message(chat_id, message)
+    except bot_errors() as error:
         raise IOError('Невозможно отправить сообщение в Telegram.') from error
     else:
-        logger.info(f'Сообщение отправлено в Telegram: "{message}"')
+        logger.info('Сообщение отправлено в Telegram: "%s"', message)
 
 
 def get_api_answer(current_timestamp):
     """Выполняет запрос к API."""
+    return fetch_api_answer(current_timestamp, PRACTICUM_TOKEN)
+
+
+def fetch_api_answer(current_timestamp, practicum_token, transport=None):
+    """Выполняет запрос к API с токеном указанного пользователя.
+
+    Без транспорта каждый запрос открывает новое соединение.
+    """
+    timestamp = current_timestamp or int(time.time())
+    return load_api_answer(timestamp, practicum_token, transport)
+
+
+def load_api_answer(from_date, practicum_token, transport=None):
+    """Возвращает ответ API, по возможности из общего кеша ответов.
+
+    Кеш берется из транспорта; без него выполняется обычный запрос.
+    """
+    cache = None if transport is None else transport.responses
+    if cache is None:
+        return request_api(from_date, practicum_token, transport).json()
+    return cache.fetch(
+        practicum_token, from_date,
+        lambda: request_api(from_date, practicum_token, transport).json(),
+    )
+
+
+@timed('get_api_answer')
+def request_api(from_date, practicum_token, transport=None, stream=False):
+    """Выполняет запрос к API и возвращает ответ с кодом 200.
+
+    С stream=True тело ответа не загружается сразу, его можно читать
+    частями.
+    """
     logger.debug('Выполнение запроса к API.')
     try:
-        timestamp = current_timestamp or int(time.time())
-        params = {'from_date': timestamp}
-        response = requests.get(ENDPOINT, headers=HEADERS, params=params)
+        params = {'from_date': from_date}
+        headers = {'Authorization': f'OAuth {practicum_token}'}
+        if transport is None:
+            response = requests.get(
+                ENDPOINT, headers=headers, params=params, stream=stream,
+                timeout=deadlines.timeout(CONNECT_TIMEOUT, READ_TIMEOUT),
+            )
+        else:
+            response = transport.get(
+                ENDPOINT, headers=headers, params=params, stream=stream
+            )
         if response.status_code != HTTPStatus.OK:
             raise RequestException(response=response)
     except RequestException as error:
-        raise IOError(
-            'Ошибка при выполнении запроса к API. Код ответа: '
-            f'{error.response.status_code}'
-        ) from error
+        raise api_error(error) from error
     else:
-        return response.json()
+        return response
 
 
+def api_error(error):
+    """Оборачивает ошибку запроса к API в IOError с кодом ответа."""
+    if error.response is None:
+        return IOError(f'Ошибка при выполнении запроса к API: {error}')
+    return IOError(
+        'Ошибка при выполнении запроса к API. Код ответа: '
+        f'{error.response.status_code}'
+    )
+
+
+@timed('check_response')
 def check_response(response):
     """Проверяет ответ от API."""
     logger.debug('Проверка ответа от API.')
-    if not isinstance(response, dict):
-        raise TypeError(
-            'В ответ на запрос от API пришел не словарь.'
-            f' response = {response}.'
-        )
-    homeworks = response.get('homeworks')
-    if 'homeworks' not in response:
-        raise KeyError(
-            'В ответе от API отсутствует ключ "homeworks".'
-            f' response = {response}.'
-        )
-    if not isinstance(homeworks, list):
-        raise TypeError(
-            'В ответе от API под ключом "homeworks" пришел не список.'
-            f' response = {response}.'
-        )
-    current_date = response.get('current_date')
-    if 'current_date' not in response:
-        raise KeyError(
-            'В ответе от API отсутствует ключ "current_date".'
-            f' response = {response}.'
-        )
-    if not isinstance(current_date, int):
-        raise TypeError(
-            'В ответе от API под ключом "current_date" пришло не число'
-            ' (целое).'
-            f' response = {response}.'
-        )
-    return homeworks
+    return validate_response(response)['homeworks']
 
 
+@timed('parse_status')
 def parse_status(homework):
     """Извлекает статус домашней работы."""
     logger.debug('Извлечение статуса домашней работы.')
-    if not isinstance(homework, dict):
-        raise TypeError(
-            'В ответ на запрос от API пришел не словарь.'
-            f' homework = {homework}.'
-        )
-    homework_name = homework.get('homework_name')
-    if 'homework_name' not in homework:
-        raise KeyError(
-            'В ответе от API отсутствует ключ "homework_name".'
-            f' homework = {homework}.'
-        )
-    if not isinstance(homework_name, str):
-        raise TypeError(
-            'В ответе от API под ключом "homework_name" пришла не строка.'
-            f' homework = {homework}.'
-        )
-    status = homework.get('status')
-    if 'status' not in homework:
-        raise KeyError(
-            'В ответе от API отсутствует ключ "status".'
-            f' homework = {homework}.'
-        )
-    if not isinstance(status, str):
-        raise TypeError(
-            'В ответе от API под ключом "status" пришла не строка.'
-            f' homework = {homework}.'
-        )
-    if status not in HOMEWORK_STATUSES:
-        raise KeyError(
-            'Недокументированный статус домашней работы.'
-            f' homework = {homework}.'
-        )
-    verdict = HOMEWORK_STATUSES[status]
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    return render_status(validate_homework(homework))
+
+
+def render_status(homework, locale=None):
+    """Собирает сообщение о статусе уже проверенной домашней работы."""
+    return renderer.render(
+        homework['status'], homework['homework_name'], locale
+    )
+
+
+def fetch_statuses(practicum_token, current_timestamp, transport=None,
+                   locale=None):
+    """Запрашивает и проверяет статусы работ.
+
+    Возвращает новую метку времени и список пар (работа, сообщение).
+    """
+    response = fetch_api_answer(current_timestamp, practicum_token, transport)
+    return parse_statuses(response, locale)
+
+
+def parse_statuses(response, locale=None):
+    """Проверяет ответ API и собирает сообщения о статусах работ.
+
+    Возвращает новую метку времени и список пар (работа, сообщение).
+    """
+    logger.debug('Проверка ответа от API.')
+    with measure('check_response'):
+        homeworks = validate_full_response(response)['homeworks']
+    render = renderer.render
+    with measure('parse_status'):
+        statuses = [
+            (homework, render(
+                homework['status'], homework['homework_name'], locale
+            ))
+            for homework in homeworks
+        ]
+    return response['current_date'], statuses
+
+
+def deliver_status(bot, chat_id, homework, message, checkpoint=None):
+    """Отправляет сообщение о статусе работы, если оно еще не отправлялось.
+
+    Статус занимается до отправки, поэтому копии одной работы в ответе
+    не порождают повторных сообщений; при ошибке занятие отменяется.
+    Возвращает True, если сообщение было отправлено.
+    """
+    if checkpoint is not None and not checkpoint.reserve(homework):
+        logger.debug('Статус работы уже был отправлен.')
+        return False
+    try:
+        send_chat_message(bot, chat_id, message)
+    except BaseException:
+        if checkpoint is not None:
+            checkpoint.release(homework)
+        raise
+    if checkpoint is not None:
+        checkpoint.mark_delivered(homework)
+    return True
+
+
+def poll_once(bot, practicum_token, chat_id, current_timestamp,
+              transport=None, checkpoint=None):
+    """Выполняет один опрос API.
+
+    Возвращает новую метку времени и список полученных работ.
+    С checkpoint уже отправленные статусы пропускаются, а новая метка
+    времени сохраняется после отправки всех сообщений. Ошибка отправки
+    одного сообщения не мешает отправить остальные, но метка времени
+    тогда не сдвигается, и первая ошибка пробрасывается.
+    """
+    current_date, statuses = fetch_statuses(
+        practicum_token, current_timestamp, transport
+    )
+    return current_date, deliver_statuses(
+        bot, chat_id, current_date, statuses, checkpoint
+    )
+
+
+def deliver_statuses(bot, chat_id, current_date, statuses, checkpoint=None):
+    """Отправляет сообщения опроса и сохраняет новую метку времени.
+
+    statuses — список пар (работа, сообщение). Возвращает список работ.
+    """
+    errors = []
+    for homework, message in statuses:
+        try:
+            deliver_status(bot, chat_id, homework, message, checkpoint)
+        except IOError as error:
+            errors.append(error)
+    if errors:
+        raise errors[0]
+
+    if not len(statuses):
+        logger.debug('Статус проверки работ не изменился.')
+
+    if checkpoint is not None:
+        checkpoint.save_cursor(current_date)
+    return [homework for homework, _ in statuses]
+
+
+def report_incident(bot, message):
+    """Отправляет уведомление об инциденте, если оно есть."""
+    report_chat_incident(bot, TELEGRAM_CHAT_ID, message)
+
+
+def report_chat_incident(bot, chat_id, message):
+    """Отправляет уведомление об инциденте в чат, если оно есть."""
+    if message is None:
+        return
+    try:
+        send_chat_message(bot, chat_id, message)
+    except IOError as error:
+        logger.exception(error)
 
 
 def check_tokens():
@@ -155,35 +305,36 @@ def main():
         logger.critical(message)
         sys.exit(message)
 
-    bot = telegram.Bot(token=TELEGRAM_TOKEN)
-    current_timestamp = int(time.time())
+    renderer.load()
+    metrics.start_server()
+    profiler.install()
+    transport = Transport(hedger=Hedger() if HEDGE_REQUESTS else None)
+    bot = BotClient(TELEGRAM_TOKEN, transport)
+    checkpoint = CheckpointStore().for_tenant(str(TELEGRAM_CHAT_ID))
+    current_timestamp = checkpoint.cursor or int(time.time())
 
-    latest_error = None
+    incidents = ErrorAggregator()
 
     while True:
         try:
-            response = get_api_answer(current_timestamp)
-            homeworks = check_response(response)
-
-            for homework in homeworks:
-                message = parse_status(homework)
-                send_message(bot, message)
-
-            if not len(homeworks):
-                logger.debug('Статус проверки работ не изменился.')
-
-            current_timestamp = response['current_date']
+            with profiler.iteration(), log_context(tenant=TELEGRAM_CHAT_ID):
+                with deadlines.deadline():
+                    current_timestamp, _ = poll_once(
+                        bot, PRACTICUM_TOKEN, TELEGRAM_CHAT_ID,
+                        current_timestamp, transport, checkpoint
+                    )
 
         except Exception as error:
             logger.exception(error)
+            report_incident(bot, incidents.record(error))
 
-            if latest_error != error:
-                message = f'Сбой в работе программы: {error}'
-                send_message(bot, message)
-                latest_error = error
+        else:
+            report_incident(bot, incidents.resolve())
 
         finally:
-            time.sleep(RETRY_TIME)
+            checkpoint.store.flush()
+            with measure('sleep'):
+                time.sleep(RETRY_TIME)
 
 
 if __name__ == '__main__':
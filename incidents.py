@@ -0,0 +1,137 @@
+import os
+import time
+from dataclasses import dataclass
+
+import metrics
+
+INCIDENT_WINDOW = float(os.getenv('INCIDENT_WINDOW', 3600))
+
+FINGERPRINTS = {}
+
+
+def causes(error):
+    """Возвращает цепочку ошибки: саму ошибку и все ее причины."""
+    chain = []
+    while error is not None and error not in chain:
+        chain.append(error)
+        error = error.__cause__ or error.__context__
+    return chain
+
+
+def error_status(error):
+    """Возвращает HTTP-код или код Bot API из цепочки ошибки, если он есть."""
+    for cause in causes(error):
+        response = getattr(cause, 'response', None)
+        status = getattr(response, 'status_code', None)
+        if status is None:
+            status = getattr(cause, 'error_code', None)
+        if status is not None:
+            return status
+    return None
+
+
+def error_origin(error):
+    """Возвращает модуль и функцию, где была выброшена ошибка."""
+    traceback = error.__traceback__
+    if traceback is None:
+        return None
+    while traceback.tb_next is not None:
+        traceback = traceback.tb_next
+    frame = traceback.tb_frame
+    return f'{frame.f_globals.get("__name__")}.{frame.f_code.co_name}'
+
+
+def fingerprint(error):
+    """Возвращает отпечаток ошибки: тип первопричины, место и код ответа.
+
+    Экземпляры одной и той же ошибки с разным текстом (например, с
+    меткой времени) получают одинаковый отпечаток. Отпечаток хранится в
+    единственном экземпляре, сколько бы пользователей ни получили ошибку.
+    """
+    root = causes(error)[-1]
+    key = type(root).__name__, error_origin(error), error_status(error)
+    return FINGERPRINTS.setdefault(key, key)
+
+
+def format_duration(seconds):
+    """Форматирует длительность в минутах и секундах."""
+    minutes, seconds = divmod(int(seconds), 60)
+    return f'{minutes} мин {seconds} с' if minutes else f'{seconds} с'
+
+
+@dataclass
+class Incident:
+    """Повторяющаяся ошибка с одним отпечатком."""
+
+    message: str
+    opened_at: float
+    count: int = 1
+    notified_at: float = None
+
+
+class ErrorAggregator:
+    """Сводит повторяющиеся ошибки в инциденты.
+
+    О новом инциденте сообщается один раз, пока он открыт — не чаще раза
+    в window секунд, а при успешном опросе отправляется сводка с числом
+    повторов. Если та же ошибка возвращается в течение window после
+    сообщения о ней, инцидент открывается снова без уведомления, а
+    напоминание придет через window после прошлого сообщения; сводку
+    получают только инциденты, о которых сообщалось после открытия.
+    """
+
+    __slots__ = ('window', 'clock', 'open', 'notified')
+
+    def __init__(self, window=INCIDENT_WINDOW, clock=time.monotonic):
+        """Создает агрегатор с окном window секунд."""
+        self.window = window
+        self.clock = clock
+        self.open = {}
+        self.notified = {}
+
+    def record(self, error):
+        """Учитывает ошибку и возвращает текст уведомления или None."""
+        now = self.clock()
+        key = fingerprint(error)
+        incident = self.open.get(key)
+        if incident is None:
+            incident = self.open[key] = Incident(str(error), now)
+            metrics.counter(
+                'homework_incidents_total', 'Инциденты.', event='opened'
+            ).inc()
+            notified_at = self.notified.get(key, -self.window)
+            if now - notified_at < self.window:
+                incident.notified_at = notified_at
+                return None
+            incident.notified_at = self.notified[key] = now
+            return f'Сбой в работе программы: {incident.message}'
+        incident.count += 1
+        if (incident.notified_at is not None
+                and now - incident.notified_at >= self.window):
+            incident.notified_at = self.notified[key] = now
+            return (
+                f'Сбой в работе программы продолжается: {incident.message} '
+                f'(повторов: {incident.count} за '
+                f'{format_duration(now - incident.opened_at)})'
+            )
+        return None
+
+    def resolve(self):
+        """Закрывает открытые инциденты и возвращает сводку или None."""
+        if not self.open:
+            return None
+        now = self.clock()
+        lines = [
+            f'{incident.message} — повторов: {incident.count} за '
+            f'{format_duration(now - incident.opened_at)}.'
+            for incident in self.open.values()
+            if incident.notified_at is not None
+            and incident.notified_at >= incident.opened_at
+        ]
+        metrics.counter(
+            'homework_incidents_total', 'Инциденты.', event='resolved'
+        ).inc(len(self.open))
+        self.open.clear()
+        if not lines:
+            return None
+        return '\n'.join(['Работа программы восстановлена.', *lines])
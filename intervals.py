@@ -0,0 +1,77 @@
+import os
+
+from homework import HOMEWORK_STATUSES, RETRY_TIME
+from statuses import intern_status
+
+MIN_INTERVAL = float(os.getenv('MIN_INTERVAL', 60))
+MAX_INTERVAL = float(os.getenv('MAX_INTERVAL', 3600))
+POLL_BUDGET = float(os.getenv('POLL_BUDGET', 10))
+BACKOFF = 2.0
+MAX_IDLE_STEPS = 16
+ERROR_BACKOFF_STEPS = 4
+SMOOTHING = 0.3
+
+HOT_STATUSES = {'reviewing'}
+STATUS_INTERVALS = {
+    status: MIN_INTERVAL if status in HOT_STATUSES else RETRY_TIME
+    for status in HOMEWORK_STATUSES
+}
+
+
+def budget_floor(tenant_count, budget=POLL_BUDGET):
+    """Возвращает минимальный интервал, при котором укладываемся в бюджет.
+
+    budget — допустимое число запросов к API в секунду на процесс, то
+    есть доля POLL_BUDGET этого процесса.
+    """
+    if budget <= 0:
+        return 0.0
+    return tenant_count / budget
+
+
+class AdaptiveInterval:
+    """Адаптивный интервал опроса одного пользователя.
+
+    Базовый интервал зависит от последнего известного статуса: работа на
+    проверке опрашивается чаще всего. Пока статус не меняется, интервал
+    экспоненциально растет; частые изменения его сокращают, а ошибки API
+    увеличивают.
+    """
+
+    __slots__ = (
+        'base', 'minimum', 'maximum', 'last_status', 'idle_polls',
+        'change_rate', 'error_rate',
+    )
+
+    def __init__(self, base=RETRY_TIME, minimum=MIN_INTERVAL,
+                 maximum=MAX_INTERVAL):
+        """Создает политику с интервалом base."""
+        self.base = base
+        self.minimum = minimum
+        self.maximum = maximum
+        self.last_status = None
+        self.idle_polls = 0
+        self.change_rate = 0.0
+        self.error_rate = 0.0
+
+    def observe(self, homeworks=(), failed=False):
+        """Учитывает результат опроса и возвращает следующий интервал."""
+        changed = bool(homeworks)
+        self.change_rate += SMOOTHING * (changed - self.change_rate)
+        self.error_rate += SMOOTHING * (failed - self.error_rate)
+        if changed:
+            self.last_status = intern_status(homeworks[0].get('status'))
+            self.idle_polls = 0
+        elif not failed:
+            self.idle_polls += 1
+        return self.interval
+
+    @property
+    def interval(self):
+        """Возвращает текущий интервал опроса в секундах."""
+        interval = STATUS_INTERVALS.get(self.last_status, self.base)
+        if self.last_status not in HOT_STATUSES:
+            interval *= BACKOFF ** min(self.idle_polls, MAX_IDLE_STEPS)
+        interval *= 1 - self.change_rate / 2
+        interval *= BACKOFF ** (self.error_rate * ERROR_BACKOFF_STEPS)
+        return min(max(interval, self.minimum), self.maximum)
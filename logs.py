@@ -0,0 +1,180 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'DEBUG')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+LOG_DEDUP_INTERVAL = float(os.getenv('LOG_DEDUP_INTERVAL', 60))
+TEXT_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+DEDUP_MAX_KEYS = 1024
+
+tenant_var = ContextVar('tenant', default=None)
+stage_var = ContextVar('stage', default=None)
+
+
+@contextmanager
+def log_context(tenant=None, stage=None):
+    """Добавляет пользователя и стадию к записям журнала внутри блока.
+
+    Значения хранятся в contextvars и наследуются задачами asyncio.
+    """
+    tokens = []
+    if tenant is not None:
+        tokens.append((tenant_var, tenant_var.set(tenant)))
+    if stage is not None:
+        tokens.append((stage_var, stage_var.set(stage)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Переносит пользователя и стадию из контекста в запись."""
+
+    def filter(self, record):
+        """Дополняет запись полями tenant и stage."""
+        if getattr(record, 'tenant', None) is None:
+            record.tenant = tenant_var.get()
+        if getattr(record, 'stage', None) is None:
+            record.stage = stage_var.get()
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """Передает записи в очередь, не форматируя их.
+
+    Подстановка аргументов и форматирование исключений выполняются
+    в фоновом потоке. Если очередь переполнена, запись отбрасывается,
+    а не блокирует вызывающий поток.
+    """
+
+    def __init__(self, queue):
+        """Создает обработчик поверх очереди queue."""
+        super().__init__(queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        """Возвращает запись без изменений."""
+        return record
+
+    def enqueue(self, record):
+        """Кладет запись в очередь или учитывает ее как отброшенную."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DuplicateFilter(logging.Filter):
+    """Подавляет повторы одной и той же записи в течение interval секунд.
+
+    Первая запись проходит сразу, следующая после окна получает поле
+    suppressed с числом подавленных повторов.
+    """
+
+    def __init__(self, interval=LOG_DEDUP_INTERVAL, max_keys=DEDUP_MAX_KEYS):
+        """Создает фильтр с окном interval."""
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self.seen = {}
+
+    def filter(self, record):
+        """Пропускает запись, если такой не было в последнем окне."""
+        if self.interval <= 0:
+            return True
+        key = (
+            record.levelno, record.getMessage(),
+            getattr(record, 'tenant', None),
+        )
+        now = time.monotonic()
+        entry = self.seen.get(key)
+        if entry is not None and now - entry[0] < self.interval:
+            entry[1] += 1
+            return False
+        if entry is not None and entry[1]:
+            record.suppressed = entry[1]
+        if len(self.seen) >= self.max_keys:
+            self.seen = {
+                seen_key: value for seen_key, value in self.seen.items()
+                if now - value[0] < self.interval
+            }
+            if len(self.seen) >= self.max_keys:
+                self.seen.clear()
+        self.seen[key] = [now, 0]
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Форматирует запись как объект JSON в одну строку."""
+
+    def format(self, record):
+        """Возвращает запись в виде строки JSON."""
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'message': record.getMessage(),
+            'tenant': getattr(record, 'tenant', None),
+            'stage': getattr(record, 'stage', None),
+        }
+        suppressed = getattr(record, 'suppressed', None)
+        if suppressed:
+            data['suppressed'] = suppressed
+        if record.exc_info:
+            data['exc'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def make_formatter(log_format=LOG_FORMAT):
+    """Возвращает форматтер для json или text."""
+    if log_format == 'text':
+        return logging.Formatter(TEXT_FORMAT)
+    return JSONFormatter()
+
+
+def setup(logger, level=LOG_LEVEL, log_format=LOG_FORMAT, stream=None):
+    """Настраивает запись журнала logger через очередь.
+
+    Записи пишет в stream (по умолчанию stderr) фоновый поток, который
+    останавливается при выходе из программы.
+    """
+    logger.setLevel(level)
+    output = logging.StreamHandler(stream)
+    output.setFormatter(make_formatter(log_format))
+    output.addFilter(DuplicateFilter())
+    records = queue.Queue(LOG_QUEUE_SIZE)
+    handler = LazyQueueHandler(records)
+    handler.addFilter(ContextFilter())
+    handler.listener = QueueListener(records, output)
+    handler.listener.start()
+    atexit.register(handler.listener.stop)
+    logger.addHandler(handler)
+
+
+def close(logger):
+    """Отключает от logger запись через очередь, дописав накопленное."""
+    for handler in list(logger.handlers):
+        if isinstance(handler, LazyQueueHandler):
+            logger.removeHandler(handler)
+            handler.listener.stop()
+            atexit.unregister(handler.listener.stop)
+
+
+def flush(logger, timeout=1.0):
+    """Ждет, пока фоновый поток запишет накопленные записи."""
+    for handler in logger.handlers:
+        if isinstance(handler, LazyQueueHandler):
+            finish = time.monotonic() + timeout
+            while handler.queue.unfinished_tasks and (
+                time.monotonic() < finish
+            ):
+                time.sleep(0.001)
@@ -0,0 +1,111 @@
+import json
+import os
+from string import Formatter
+
+DEFAULT_LOCALE = 'ru'
+MESSAGES_FILE = os.getenv('MESSAGES_FILE')
+NAME_MARK = '\0'
+
+LOCALES = {
+    'en': {
+        'template': 'The review status of "{homework_name}" has changed.'
+                    ' {verdict}',
+        'verdicts': {
+            'approved': 'The reviewer approved the work. Hooray!',
+            'reviewing': 'The reviewer has started reviewing the work.',
+            'rejected': 'The reviewer has left some comments.',
+        },
+    },
+}
+
+
+def check_template(locale, template):
+    """Проверяет, что имя работы встречается в шаблоне ровно один раз."""
+    names = [
+        field for _, field, _, _ in Formatter().parse(template)
+        if field == 'homework_name'
+    ]
+    if len(names) != 1:
+        raise ValueError(
+            f'Шаблон локали "{locale}" должен содержать {{homework_name}} '
+            f'ровно один раз, а содержит {len(names)}.'
+        )
+
+
+class MessageRenderer:
+    """Сборка сообщений о статусе работы по каталогу локалей.
+
+    Шаблон для пары (локаль, статус) собирается один раз: вердикт
+    подставляется заранее, и остается склеить начало, имя работы и
+    конец. Имена работ почти не повторяются, поэтому готовые сообщения
+    не кешируются.
+    """
+
+    def __init__(self, default_locale=DEFAULT_LOCALE):
+        """Создает пустой каталог с локалью по умолчанию."""
+        self.default_locale = default_locale
+        self.locales = {}
+        self.compiled = {}
+
+    def add_locale(self, locale, template=None, verdicts=None):
+        """Добавляет локаль или переопределяет шаблон и вердикты в ней.
+
+        Чего нет в локали, берется из локали по умолчанию. Шаблон должен
+        содержать {homework_name} ровно один раз, иначе ValueError.
+        """
+        if template is not None:
+            check_template(locale, template)
+        entry = self.locales.setdefault(locale, {'verdicts': {}})
+        if template is not None:
+            entry['template'] = template
+        entry['verdicts'].update(verdicts or {})
+        self.compiled.clear()
+
+    def load(self, path=MESSAGES_FILE):
+        """Загружает переопределения локалей из JSON-файла.
+
+        Формат: {"локаль": {"template": "...", "verdicts": {...}}}.
+        """
+        if not path:
+            return
+        with open(path, encoding='utf-8') as file:
+            catalog = json.load(file)
+        for locale, entry in catalog.items():
+            self.add_locale(
+                locale, entry.get('template'), entry.get('verdicts')
+            )
+
+    def render(self, status, homework_name, locale=None):
+        """Собирает сообщение о статусе работы в локали."""
+        locale = locale or self.default_locale
+        parts = self.compiled.get((status, locale))
+        if parts is None:
+            parts = self.compile(status, locale)
+        return parts[0] + homework_name + parts[1]
+
+    def verdict(self, status, locale=None):
+        """Возвращает вердикт для статуса в локали."""
+        return self._lookup(
+            locale or self.default_locale, 'verdicts', status
+        )
+
+    def compile(self, status, locale):
+        """Возвращает начало и конец сообщения вокруг имени работы."""
+        key = (status, locale)
+        parts = self.compiled.get(key)
+        if parts is None:
+            template = self._lookup(locale, 'template')
+            verdict = self._lookup(locale, 'verdicts', status)
+            text = template.format(homework_name=NAME_MARK, verdict=verdict)
+            prefix, _, suffix = text.partition(NAME_MARK)
+            parts = self.compiled[key] = (prefix, suffix)
+        return parts
+
+    def _lookup(self, locale, field, status=None):
+        for name in (locale, self.default_locale):
+            value = self.locales.get(name, {}).get(field)
+            if status is not None and value is not None:
+                value = value.get(status)
+            if value is not None:
+                return value
+        raise KeyError(f'Нет сообщения для статуса "{status}".')
@@ -0,0 +1,281 @@
+import os
+import threading
+import time
+from functools import lru_cache, wraps
+
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+BUCKET_COUNT = SUB_BUCKETS * 40
+EXPORT_BOUNDS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600,
+)
+
+
+def bucket_index(micros):
+    """Возвращает номер логарифмически-линейного интервала для значения.
+
+    Как в HDR-гистограмме: каждая степень двойки делится на SUB_BUCKETS
+    равных частей, так что относительная погрешность не больше 1/16.
+    """
+    if micros < SUB_BUCKETS:
+        return micros
+    exponent = micros.bit_length() - SUB_BUCKET_BITS - 1
+    mantissa = micros >> exponent
+    index = SUB_BUCKETS * (exponent + 1) + mantissa - SUB_BUCKETS
+    return min(index, BUCKET_COUNT - 1)
+
+
+def bucket_upper(index):
+    """Возвращает верхнюю границу интервала в микросекундах."""
+    if index < SUB_BUCKETS:
+        return index + 1
+    exponent = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return (mantissa + 1) << exponent
+
+
+class Counter:
+    """Монотонный счетчик."""
+
+    kind = 'counter'
+
+    def __init__(self):
+        """Создает счетчик с нулевым значением."""
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Увеличивает счетчик."""
+        with self.lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        """Возвращает строки значения в текстовом формате Prometheus."""
+        return [f'{name}{format_labels(labels)} {self.value}']
+
+
+class Gauge:
+    """Значение, которое вычисляется при каждом чтении метрик."""
+
+    kind = 'gauge'
+
+    def __init__(self, func):
+        """Создает показатель, читающий значение из func."""
+        self.func = func
+
+    def samples(self, name, labels):
+        """Возвращает строки значения в текстовом формате Prometheus."""
+        return [f'{name}{format_labels(labels)} {self.func()}']
+
+
+class Histogram:
+    """Гистограмма задержек с логарифмически-линейными интервалами."""
+
+    kind = 'histogram'
+
+    def __init__(self):
+        """Создает пустую гистограмму."""
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Учитывает одно значение в секундах."""
+        index = bucket_index(int(seconds * 1_000_000))
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, fraction):
+        """Возвращает верхнюю оценку квантиля в секундах."""
+        with self.lock:
+            counts, total = list(self.counts), self.count
+        rank = fraction * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if count and seen >= rank:
+                return bucket_upper(index) / 1_000_000
+        return 0.0
+
+    def samples(self, name, labels):
+        """Возвращает строки значения в текстовом формате Prometheus."""
+        with self.lock:
+            counts, total, value_sum = list(self.counts), self.count, self.sum
+        lines = []
+        index = seen = 0
+        for bound in EXPORT_BOUNDS:
+            while index < BUCKET_COUNT and bucket_upper(index) <= bound * 1e6:
+                seen += counts[index]
+                index += 1
+            bound_labels = {**labels, 'le': repr(float(bound))}
+            lines.append(f'{name}_bucket{format_labels(bound_labels)} {seen}')
+        inf_labels = {**labels, 'le': '+Inf'}
+        lines.append(f'{name}_bucket{format_labels(inf_labels)} {total}')
+        lines.append(f'{name}_sum{format_labels(labels)} {value_sum}')
+        lines.append(f'{name}_count{format_labels(labels)} {total}')
+        return lines
+
+
+def format_labels(labels):
+    """Форматирует метки в виде {key="value",...}."""
+    if not labels:
+        return ''
+    pairs = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    return '{' + pairs + '}'
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        """Создает пустой набор."""
+        self.families = {}
+        self.lock = threading.Lock()
+
+    def get(self, cls, name, help, labels, *args):
+        """Возвращает метрику с именем и метками, создавая ее."""
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            family = self.families.setdefault(
+                name, {'kind': cls.kind, 'help': help, 'metrics': {}}
+            )
+            metric = family['metrics'].get(key)
+            if metric is None:
+                metric = family['metrics'][key] = cls(*args)
+        return metric
+
+    def render(self):
+        """Возвращает все метрики в текстовом формате Prometheus."""
+        lines = []
+        with self.lock:
+            families = [
+                (name, family, list(family['metrics'].items()))
+                for name, family in sorted(self.families.items())
+            ]
+        for name, family, metrics in families:
+            lines.append(f'# HELP {name} {family["help"]}')
+            lines.append(f'# TYPE {name} {family["kind"]}')
+            for key, metric in metrics:
+                lines.extend(metric.samples(name, dict(key)))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name, help, **labels):
+    """Возвращает счетчик из общего набора."""
+    return REGISTRY.get(Counter, name, help, labels)
+
+
+def histogram(name, help, **labels):
+    """Возвращает гистограмму из общего набора."""
+    return REGISTRY.get(Histogram, name, help, labels)
+
+
+def gauge(name, help, func, **labels):
+    """Регистрирует показатель, значение которого вычисляет func.
+
+    Повторная регистрация заменяет функцию прежнего показателя.
+    """
+    metric = REGISTRY.get(Gauge, name, help, labels, func)
+    metric.func = func
+    return metric
+
+
+@lru_cache(maxsize=None)
+def stage_metrics(stage):
+    """Возвращает гистограмму длительности и счетчик ошибок стадии."""
+    return (
+        histogram(
+            'homework_stage_seconds', 'Длительность стадии, с.', stage=stage
+        ),
+        counter(
+            'homework_stage_errors_total', 'Ошибки стадии.', stage=stage
+        ),
+    )
+
+
+class measure:
+    """Измеряет длительность блока with как стадии stage."""
+
+    def __init__(self, stage):
+        """Находит метрики стадии."""
+        self.seconds, self.errors = stage_metrics(stage)
+
+    def __enter__(self):
+        """Засекает время начала."""
+        self.started = time.perf_counter()
+
+    def __exit__(self, error_type, error, traceback):
+        """Учитывает длительность и ошибку, не подавляя ее."""
+        self.seconds.observe(time.perf_counter() - self.started)
+        if error_type is not None:
+            self.errors.inc()
+
+
+def timed(stage):
+    """Декоратор: измеряет длительность и ошибки функции как стадии."""
+    def decorator(func):
+        seconds, errors = stage_metrics(stage)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                errors.inc()
+                raise
+            finally:
+                seconds.observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def metrics_handler():
+    """Возвращает класс обработчика /metrics.
+
+    http.server импортируется только при запуске сервера метрик.
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        """Отдает метрики по адресу /metrics."""
+
+        def do_GET(self):
+            """Отвечает текстом метрик или 404."""
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            """Отключает журнал запросов."""
+
+    return MetricsHandler
+
+
+def start_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Запускает сервер метрик в фоновом потоке, если задан порт."""
+    if not port:
+        return None
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), metrics_handler())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
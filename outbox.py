@@ -0,0 +1,196 @@
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from botapi import BotAPIError
+
+TELEGRAM_RATE = float(os.getenv('TELEGRAM_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+OUTBOX_WORKERS = int(os.getenv('OUTBOX_WORKERS', 4))
+OUTBOX_MAX_RETRIES = 5
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity."""
+
+    def __init__(self, rate, capacity=1.0, now=None):
+        """Создает полное ведро."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic() if now is None else now
+        self.blocked_until = 0.0
+
+    def available_at(self, now):
+        """Возвращает момент, когда в ведре появится целый токен."""
+        self._refill(now)
+        ready = now
+        if self.tokens < 1:
+            ready = now + (1 - self.tokens) / self.rate
+        return max(ready, self.blocked_until)
+
+    def consume(self, now):
+        """Забирает токен из ведра."""
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, until):
+        """Запрещает отправку до момента until."""
+        self.blocked_until = max(self.blocked_until, until)
+
+    def _refill(self, now):
+        elapsed = max(now - self.updated, 0.0)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+
+class Outbox:
+    """Очередь исходящих сообщений Telegram с ограничением скорости.
+
+    Сообщения одного чата отправляются строго по порядку, не чаще
+    chat_rate в секунду, а все вместе — не чаще rate в секунду. Ответ 429
+    с retry_after приостанавливает чат на указанное время, после чего
+    сообщение отправляется повторно. Снаружи Outbox выглядит как бот:
+    send_message блокируется до доставки и пробрасывает ошибку Telegram.
+    Отправка идет в копии контекста, в котором сообщение поставлено в
+    очередь, поэтому на нее распространяется срок итерации.
+    """
+
+    def __init__(self, bot, rate=TELEGRAM_RATE, chat_rate=TELEGRAM_CHAT_RATE,
+                 workers=OUTBOX_WORKERS):
+        """Создает очередь поверх бота и запускает диспетчер."""
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.bucket = TokenBucket(rate)
+        self.chat_buckets = {}
+        self.queues = {}
+        self.in_flight = set()
+        self.schedule = []
+        self.counter = itertools.count()
+        self.depth = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self.dispatcher.start()
+
+    def send_message(self, chat_id, text):
+        """Отправляет сообщение и ждет доставки."""
+        return self.submit(chat_id, text).result()
+
+    def submit(self, chat_id, text):
+        """Ставит сообщение в очередь и возвращает Future доставки."""
+        future = Future()
+        with self.condition:
+            queue = self.queues.setdefault(chat_id, deque())
+            queue.append([text, future, 0, contextvars.copy_context()])
+            self.depth += 1
+            if len(queue) == 1 and chat_id not in self.in_flight:
+                self._wake(chat_id, time.monotonic())
+        return future
+
+    def set_rate(self, rate):
+        """Меняет общее ограничение скорости отправки."""
+        with self.condition:
+            self.bucket.rate = rate
+            self.condition.notify()
+
+    def chat_depth(self, chat_id):
+        """Возвращает число сообщений в очереди чата."""
+        with self.condition:
+            return len(self.queues.get(chat_id, ()))
+
+    def close(self):
+        """Останавливает диспетчер, дожидаясь начатых отправок.
+
+        Сообщения, которые не успели уйти, завершаются ошибкой.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.dispatcher.join()
+        self.executor.shutdown()
+        with self.condition:
+            for queue in self.queues.values():
+                for _, future, _, _ in queue:
+                    future.set_exception(
+                        BotAPIError('Очередь сообщений закрыта.')
+                    )
+            self.queues.clear()
+            self.depth = 0
+
+    def _wake(self, chat_id, now):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.chat_buckets[chat_id] = TokenBucket(
+                self.chat_rate, now=now
+            )
+        heapq.heappush(
+            self.schedule,
+            (bucket.available_at(now), next(self.counter), chat_id),
+        )
+        self.condition.notify()
+
+    def _dispatch(self):
+        with self.condition:
+            while not self.closed:
+                timeout = self._dispatch_ready(time.monotonic())
+                self.condition.wait(timeout)
+
+    def _dispatch_ready(self, now):
+        while self.schedule:
+            ready_at, _, chat_id = self.schedule[0]
+            ready_at = max(ready_at, self.bucket.available_at(now))
+            if ready_at > now:
+                return ready_at - now
+            heapq.heappop(self.schedule)
+            self.bucket.consume(now)
+            self.chat_buckets[chat_id].consume(now)
+            self.in_flight.add(chat_id)
+            item = self.queues[chat_id][0]
+            self.executor.submit(
+                item[3].copy().run, self._deliver, chat_id, item
+            )
+        return None
+
+    def _deliver(self, chat_id, item):
+        text, future, attempts, _ = item
+        try:
+            result = self.bot.send_message(chat_id, text)
+        except Exception as error:
+            if getattr(error, 'retry_after', None) is not None:
+                self._retry(chat_id, item, error)
+            else:
+                self._finish(chat_id)
+                future.set_exception(error)
+        else:
+            self._finish(chat_id)
+            future.set_result(result)
+
+    def _retry(self, chat_id, item, error):
+        item[2] += 1
+        if item[2] > OUTBOX_MAX_RETRIES:
+            self._finish(chat_id)
+            item[1].set_exception(error)
+            return
+        with self.condition:
+            now = time.monotonic()
+            self.chat_buckets[chat_id].block(now + error.retry_after)
+            self.in_flight.discard(chat_id)
+            self._wake(chat_id, now)
+
+    def _finish(self, chat_id):
+        with self.condition:
+            queue = self.queues[chat_id]
+            queue.popleft()
+            self.depth -= 1
+            self.in_flight.discard(chat_id)
+            if queue:
+                self._wake(chat_id, time.monotonic())
+            else:
+                del self.queues[chat_id]
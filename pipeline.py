@@ -0,0 +1,167 @@
+import asyncio
+import contextvars
+import os
+import time
+from dataclasses import dataclass
+
+import homework
+from logs import log_context
+
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 1000))
+DELIVERY_WORKERS = int(os.getenv('DELIVERY_WORKERS', 8))
+
+logger = homework.logger
+
+
+class StageStats:
+    """Счетчики пропускной способности и задержки одной стадии."""
+
+    def __init__(self):
+        """Создает обнуленные счетчики."""
+        self.started = time.monotonic()
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds, failed=False):
+        """Учитывает одно выполнение стадии."""
+        self.count += 1
+        self.errors += failed
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def summary(self):
+        """Возвращает счетчики в виде словаря."""
+        uptime = max(time.monotonic() - self.started, 1e-9)
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'per_second': self.count / uptime,
+            'mean_seconds': self.seconds / self.count if self.count else 0.0,
+            'max_seconds': self.max_seconds,
+        }
+
+
+@dataclass
+class Batch:
+    """Сообщения одного опроса, после доставки которых сдвигается курсор.
+
+    Доставка идет в контексте context, поэтому на нее распространяется
+    срок итерации опроса.
+    """
+
+    state: object
+    current_date: int
+    statuses: list
+    context: contextvars.Context
+    failed: bool = False
+
+
+class Pipeline:
+    """Конвейер: опрос API отдельно, доставка сообщений отдельно.
+
+    Опрос кладет готовые сообщения одной пачкой в ограниченную очередь и
+    ждет, только если она заполнена. Пачки разбирает пул доставщиков:
+    разные пользователи доставляются параллельно, а сообщения одной
+    пачки — одним доставщиком по порядку, поэтому порядок сообщений в
+    чате сохраняется. Курсор
+    пользователя сдвигается, лишь когда доставлены все сообщения опроса:
+    при сбое доставки следующий опрос получит их снова (не меньше одной
+    доставки), а уже отправленные пропустит контрольная точка.
+    """
+
+    def __init__(self, runtime, maxsize=PIPELINE_QUEUE_SIZE,
+                 workers=DELIVERY_WORKERS):
+        """Создает конвейер поверх общих ресурсов процесса."""
+        self.runtime = runtime
+        self.queue = asyncio.Queue(maxsize)
+        self.workers = workers
+        self.stats = {
+            'fetch': StageStats(),
+            'queue': StageStats(),
+            'deliver': StageStats(),
+        }
+
+    async def fetch(self, state):
+        """Запрашивает и проверяет статусы работ пользователя."""
+        started = time.perf_counter()
+        try:
+            with log_context(stage='fetch'):
+                result = await self.runtime.call(
+                    homework.fetch_statuses, state.tenant.practicum_token,
+                    state.current_timestamp, self.runtime.transport,
+                    state.tenant.locale
+                )
+        except Exception:
+            self.stats['fetch'].record(time.perf_counter() - started, True)
+            raise
+        self.stats['fetch'].record(time.perf_counter() - started)
+        return result
+
+    async def submit(self, state, current_date, statuses, context=None):
+        """Ставит сообщения опроса в очередь доставки.
+
+        context — контекст опроса со сроком итерации, по умолчанию текущий.
+        """
+        if context is None:
+            context = contextvars.copy_context()
+        batch = Batch(state, current_date, statuses, context)
+        state.batch = batch
+        if not statuses:
+            await self._commit(batch)
+            return
+        await self.queue.put((batch, time.perf_counter()))
+
+    def run_workers(self):
+        """Возвращает корутины доставщиков для запуска."""
+        return [self._work() for _ in range(self.workers)]
+
+    async def _work(self):
+        while True:
+            batch, queued_at = await self.queue.get()
+            self.stats['queue'].record(time.perf_counter() - queued_at)
+            try:
+                await asyncio.create_task(
+                    self._deliver_batch(batch), context=batch.context
+                )
+            except asyncio.CancelledError:
+                batch.failed = True
+                raise
+            finally:
+                self.queue.task_done()
+                await self._commit(batch)
+
+    async def _deliver_batch(self, batch):
+        for item, message in batch.statuses:
+            await self._deliver_logged(batch, item, message)
+
+    async def _deliver_logged(self, batch, item, message):
+        started = time.perf_counter()
+        fields = {'tenant': batch.state.tenant.name, 'stage': 'deliver'}
+        try:
+            with log_context(**fields):
+                await self._deliver(batch.state, item, message)
+        except Exception as error:
+            logger.exception(error, extra=fields)
+            batch.failed = True
+            self.stats['deliver'].record(time.perf_counter() - started, True)
+        else:
+            self.stats['deliver'].record(time.perf_counter() - started)
+
+    async def _deliver(self, state, item, message):
+        await self.runtime.call(
+            homework.deliver_status, self.runtime.bot, state.tenant.chat_id,
+            item, message, state.checkpoint
+        )
+
+    async def _commit(self, batch):
+        state = batch.state
+        state.batch = None
+        if batch.failed:
+            return
+        state.current_timestamp = batch.current_date
+        if state.checkpoint is not None:
+            await self.runtime.call(
+                state.checkpoint.save_cursor, batch.current_date
+            )
@@ -0,0 +1,142 @@
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+PROFILE = os.getenv('PROFILE', '0') not in ('', '0')
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_SAMPLE_INTERVAL = float(os.getenv('PROFILE_SAMPLE_INTERVAL', 0.01))
+PROFILE_ROLL_INTERVAL = float(os.getenv('PROFILE_ROLL_INTERVAL', 60))
+PROFILE_TOP = int(os.getenv('PROFILE_TOP', 25))
+
+
+def collapse(frame):
+    """Возвращает стек кадра в свернутом виде: от корня к вершине через ;."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        filename = os.path.basename(code.co_filename)
+        names.append(f'{code.co_name} ({filename}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Profiler:
+    """Выборочный профилировщик стеков и выделений памяти.
+
+    Пока режим выключен, фоновый поток спит на событии, а iteration()
+    только меняет счетчик. Во включенном режиме раз в interval снимаются
+    стеки всех потоков (если идет итерация опроса), а раз в roll_interval
+    в каталог directory пишутся файл стеков для flamegraph и отчет о
+    top строках с наибольшим ростом памяти по tracemalloc.
+    """
+
+    def __init__(self, directory=PROFILE_DIR,
+                 interval=PROFILE_SAMPLE_INTERVAL,
+                 roll_interval=PROFILE_ROLL_INTERVAL, top=PROFILE_TOP):
+        """Создает выключенный профилировщик."""
+        self.directory = directory
+        self.interval = interval
+        self.roll_interval = roll_interval
+        self.top = top
+        self.requested = False
+        self.enabled = False
+        self.active = 0
+        self.stacks = Counter()
+        self.baseline = None
+        self.rolled_at = 0.0
+        self.owns_tracemalloc = False
+        self.changed = threading.Event()
+        self.thread = None
+
+    def install(self, enabled=PROFILE):
+        """Запускает фоновый поток и переключение режима по SIGUSR1."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        signum = getattr(signal, 'SIGUSR1', None)
+        if (signum is not None
+                and threading.current_thread() is threading.main_thread()):
+            signal.signal(signum, lambda *args: self.toggle())
+        if enabled:
+            self.toggle(True)
+
+    def toggle(self, enabled=None):
+        """Включает или выключает режим; без аргумента переключает его."""
+        self.requested = not self.requested if enabled is None else enabled
+        self.changed.set()
+
+    @contextmanager
+    def iteration(self):
+        """Отмечает итерацию опроса, во время которой снимаются стеки."""
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+
+    def sample(self):
+        """Снимает стеки всех потоков, кроме своего."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident != own:
+                thread = names.get(ident, str(ident))
+                self.stacks[f'{thread};{collapse(frame)}'] += 1
+
+    def roll(self):
+        """Пишет накопленные стеки и отчет о памяти и начинает новый период."""
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        if self.stacks:
+            path = os.path.join(self.directory, f'stacks-{stamp}.folded')
+            with open(path, 'w', encoding='utf-8') as file:
+                for stack, count in self.stacks.most_common():
+                    file.write(f'{stack} {count}\n')
+            self.stacks.clear()
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        path = os.path.join(self.directory, f'alloc-{stamp}.txt')
+        stats = snapshot.compare_to(self.baseline, 'lineno')[:self.top]
+        with open(path, 'w', encoding='utf-8') as file:
+            for stat in stats:
+                file.write(f'{stat}\n')
+        self.baseline = snapshot
+        self.rolled_at = time.monotonic()
+
+    def _run(self):
+        while True:
+            self.changed.wait(self.interval if self.enabled else None)
+            self.changed.clear()
+            if self.requested and not self.enabled:
+                self._start()
+            elif not self.requested and self.enabled:
+                self._stop()
+            if self.enabled:
+                if self.active:
+                    self.sample()
+                if time.monotonic() - self.rolled_at >= self.roll_interval:
+                    self.roll()
+
+    def _start(self):
+        self.owns_tracemalloc = not tracemalloc.is_tracing()
+        if self.owns_tracemalloc:
+            tracemalloc.start()
+        self.baseline = tracemalloc.take_snapshot()
+        self.rolled_at = time.monotonic()
+        self.enabled = True
+
+    def _stop(self):
+        self.roll()
+        if self.owns_tracemalloc:
+            tracemalloc.stop()
+        self.baseline = None
+        self.enabled = False
+
+
+profiler = Profiler()
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import metrics
+
+RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', 'responses.sqlite3')
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 30))
+RESPONSE_CACHE_WINDOW = int(os.getenv('RESPONSE_CACHE_WINDOW', 60))
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', 10000))
+RESPONSE_CACHE_LEASE = float(os.getenv('RESPONSE_CACHE_LEASE', 40))
+LEASE_POLL_INTERVAL = 0.05
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    token TEXT NOT NULL,
+    window INTEGER NOT NULL,
+    from_date INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (token, window)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_fetched_at ON responses (fetched_at);
+CREATE TABLE IF NOT EXISTS leases (
+    token TEXT NOT NULL,
+    window INTEGER NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (token, window)
+) WITHOUT ROWID;
+'''
+
+
+def token_digest(token):
+    """Возвращает отпечаток токена: сам токен в кеше не хранится."""
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+class ResponseCache:
+    """Общий для процессов хоста кеш ответов API в файле SQLite.
+
+    Ответ хранится ttl секунд под ключом (токен, окно from_date шириной
+    window секунд) и подходит любому запросу из того же окна с from_date
+    не меньше, чем у закешированного: такой ответ содержит все нужные
+    изменения, а повторы отсеивают контрольные точки. Одновременные
+    запросы с одним ключом выполняются один раз: потоки процесса ждут
+    общий Future, а другие процессы — пока владелец аренды ключа не
+    запишет ответ. Кеш хранит не больше size ответов, вытесняя самые
+    старые.
+    """
+
+    def __init__(self, path=RESPONSE_CACHE_PATH, ttl=RESPONSE_CACHE_TTL,
+                 window=RESPONSE_CACHE_WINDOW, size=RESPONSE_CACHE_SIZE,
+                 lease=RESPONSE_CACHE_LEASE, clock=time.time):
+        """Открывает или создает кеш."""
+        self.ttl = ttl
+        self.window = window
+        self.size = size
+        self.lease = lease
+        self.clock = clock
+        self.owner = f'{os.getpid()}-{id(self)}'
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0}
+        self.connection = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def fetch(self, token, from_date, request):
+        """Возвращает ответ API из кеша или выполняет request().
+
+        request вызывается без аргументов и возвращает разобранный ответ.
+        Ошибки запроса не кешируются и пробрасываются всем, кто его ждал.
+        """
+        key = (token_digest(token), from_date // self.window)
+        response = self._load(key, from_date)
+        if response is not None:
+            self._count('hits')
+            return response
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is None:
+                flight = self.flights[key] = (from_date, Future())
+                leader = True
+            else:
+                leader = False
+        if not leader and flight[0] <= from_date:
+            self._count('coalesced')
+            return flight[1].result()
+        if not leader:
+            return self._fetch_shared(key, from_date, request)
+        try:
+            response = self._fetch_shared(key, from_date, request)
+        except BaseException as error:
+            flight[1].set_exception(error)
+            raise
+        else:
+            flight[1].set_result(response)
+            return response
+        finally:
+            with self.lock:
+                del self.flights[key]
+
+    def close(self):
+        """Закрывает кеш."""
+        self.connection.close()
+
+    def _fetch_shared(self, key, from_date, request):
+        while not self._acquire(key):
+            time.sleep(LEASE_POLL_INTERVAL)
+            response = self._load(key, from_date)
+            if response is not None:
+                self._count('coalesced')
+                return response
+        try:
+            self._count('misses')
+            response = request()
+            self._store(key, from_date, response)
+            return response
+        finally:
+            self._release(key)
+
+    def _load(self, key, from_date):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT body FROM responses WHERE token = ? AND window = ?'
+                ' AND from_date <= ? AND fetched_at > ?',
+                (*key, from_date, self.clock() - self.ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _store(self, key, from_date, response):
+        now = self.clock()
+        with self.lock:
+            self.connection.execute(
+                'INSERT INTO responses'
+                ' (token, window, from_date, fetched_at, body)'
+                ' VALUES (?, ?, ?, ?, ?) ON CONFLICT (token, window)'
+                ' DO UPDATE SET from_date = excluded.from_date,'
+                ' fetched_at = excluded.fetched_at, body = excluded.body',
+                (*key, from_date, now, json.dumps(response)),
+            )
+            self.connection.execute(
+                'DELETE FROM responses WHERE fetched_at <= ?',
+                (now - self.ttl,),
+            )
+            self.connection.execute(
+                'DELETE FROM responses WHERE (token, window) IN ('
+                ' SELECT token, window FROM responses'
+                ' ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)',
+                (self.size,),
+            )
+
+    def _acquire(self, key):
+        now = self.clock()
+        with self.lock:
+            cursor = self.connection.execute(
+                'INSERT INTO leases (token, window, owner, expires_at)'
+                ' VALUES (?, ?, ?, ?) ON CONFLICT (token, window)'
+                ' DO UPDATE SET owner = excluded.owner,'
+                ' expires_at = excluded.expires_at'
+                ' WHERE leases.expires_at <= ?',
+                (*key, self.owner, now + self.lease, now),
+            )
+        return cursor.rowcount == 1
+
+    def _release(self, key):
+        with self.lock:
+            self.connection.execute(
+                'DELETE FROM leases'
+                ' WHERE token = ? AND window = ? AND owner = ?',
+                (*key, self.owner),
+            )
+
+    def _count(self, result):
+        with self.lock:
+            self.stats[result] += 1
+        metrics.counter(
+            'homework_response_cache_total', 'Обращения к кешу ответов API.',
+            result=result,
+        ).inc()
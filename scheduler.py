@@ -0,0 +1,95 @@
+import os
+import random
+
+SCHEDULER_TICK = float(os.getenv('SCHEDULER_TICK', 1))
+SCHEDULER_JITTER = float(os.getenv('SCHEDULER_JITTER', 0.1))
+
+
+def jittered(interval, jitter=SCHEDULER_JITTER):
+    """Возвращает интервал со случайным отклонением в пределах ±jitter."""
+    return interval * (1 + random.uniform(-jitter, jitter))
+
+
+class TimingWheel:
+    """Иерархическое колесо таймеров для сроков опроса пользователей.
+
+    Уровень 0 хранит сроки на ближайшие slots тиков, каждый следующий
+    уровень — в slots раз дальше. При переходе через границу уровня его
+    ячейка раскладывается по нижним уровням. Добавление и отмена срока
+    выполняются за O(1), продвижение — за O(1) на тик плюс число
+    сработавших и перенесенных сроков.
+    """
+
+    def __init__(self, tick=SCHEDULER_TICK, slots=64, levels=4, now=0.0):
+        """Создает пустое колесо, начиная отсчет с момента now."""
+        self.tick = tick
+        self.slots = slots
+        self.wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.ready = {}
+        self.current = int(now // tick)
+        self.locations = {}
+
+    def __len__(self):
+        """Возвращает число запланированных сроков."""
+        return len(self.locations)
+
+    def __contains__(self, key):
+        """Проверяет, запланирован ли срок для ключа."""
+        return key in self.locations
+
+    def schedule(self, key, deadline):
+        """Планирует срок для ключа, заменяя ранее запланированный."""
+        self.cancel(key)
+        self._insert(key, int(deadline // self.tick))
+
+    def cancel(self, key):
+        """Отменяет срок для ключа, если он запланирован."""
+        bucket = self.locations.pop(key, None)
+        if bucket is not None:
+            del bucket[key]
+
+    def advance(self, now):
+        """Продвигает колесо до момента now и возвращает наступившие ключи."""
+        due = list(self._pop(self.ready))
+        target = int(now // self.tick)
+        while self.current < target:
+            self.current += 1
+            self._cascade()
+            slot = self.wheels[0][self.current % self.slots]
+            due.extend(self._pop(slot))
+            due.extend(self._pop(self.ready))
+        return due
+
+    def _insert(self, key, due_tick):
+        delta = due_tick - self.current
+        if delta <= 0:
+            bucket = self.ready
+        else:
+            level = 0
+            span = self.slots
+            while delta >= span and level < len(self.wheels) - 1:
+                level += 1
+                span *= self.slots
+            index = (due_tick // (span // self.slots)) % self.slots
+            bucket = self.wheels[level][index]
+        bucket[key] = due_tick
+        self.locations[key] = bucket
+
+    def _cascade(self):
+        span = 1
+        for level in range(1, len(self.wheels)):
+            span *= self.slots
+            if self.current % span:
+                return
+            index = (self.current // span) % self.slots
+            bucket = self.wheels[level][index]
+            self.wheels[level][index] = {}
+            for key, due_tick in bucket.items():
+                self._insert(key, due_tick)
+
+    def _pop(self, bucket):
+        keys = list(bucket)
+        for key in keys:
+            del self.locations[key]
+        bucket.clear()
+        return keys
@@ -0,0 +1,113 @@
+import reprlib
+
+ERROR_REPR = reprlib.Repr()
+ERROR_REPR.maxlevel = 3
+ERROR_REPR.maxdict = 8
+ERROR_REPR.maxlist = 8
+ERROR_REPR.maxstring = 80
+ERROR_REPR.maxother = 80
+
+TYPE_ERRORS = {
+    dict: 'пришел не словарь',
+    list: 'пришел не список',
+    int: 'пришло не число (целое)',
+    str: 'пришла не строка',
+}
+
+
+class LazyMessage:
+    """Текст ошибки проверки, который собирается только при выводе.
+
+    Проверенное значение выводится в сокращенном виде, чтобы длинная
+    история работ не раздувала журнал.
+    """
+
+    __slots__ = ('text', 'name', 'value')
+
+    def __init__(self, text, name, value):
+        """Запоминает части сообщения без форматирования."""
+        self.text = text
+        self.name = name
+        self.value = value
+
+    def __str__(self):
+        """Собирает сообщение с сокращенным представлением значения."""
+        return f'{self.text} {self.name} = {ERROR_REPR.repr(self.value)}.'
+
+    def __repr__(self):
+        """Возвращает представление сообщения как строки."""
+        return repr(str(self))
+
+
+def compile_schema(schema, deep=True):
+    """Собирает функцию проверки по декларативному описанию схемы.
+
+    Схема — словарь с ключами name (имя значения в тексте ошибки), fields
+    (ключ -> ожидаемый тип), choices (ключ -> (допустимые значения, текст
+    ошибки)) и items (ключ списка -> схема его элементов). Если deep,
+    элементы вложенных списков проверяются в том же проходе. Функция
+    возвращает проверенное значение, а при ошибке бросает KeyError для
+    отсутствующего ключа или недопустимого значения и TypeError для
+    неверного типа.
+
+    Для каждой схемы генерируется отдельная функция, в которой проверки
+    всех полей и вложенных элементов записаны подряд, без обхода
+    описания схемы во время проверки.
+    """
+    namespace = {'LazyMessage': LazyMessage}
+    lines = ['def validate(value):']
+    _emit_checks(schema, 'value', deep, lines, namespace, 1)
+    lines.append('    return value')
+    exec('\n'.join(lines), namespace)
+    return namespace['validate']
+
+
+def _emit_checks(schema, value, deep, lines, namespace, depth):
+    indent = '    ' * depth
+    prefix = f'_{len(namespace)}'
+    namespace[f'{prefix}_name'] = schema['name']
+    namespace[f'{prefix}_not_dict'] = (
+        'В ответ на запрос от API пришел не словарь.'
+    )
+    lines += [
+        f'{indent}if not isinstance({value}, dict):',
+        f'{indent}    raise TypeError(LazyMessage('
+        f'{prefix}_not_dict, {prefix}_name, {value}))',
+    ]
+    choices = schema.get('choices', {})
+    items = schema.get('items', {}) if deep else {}
+    for index, (key, expected) in enumerate(schema['fields'].items()):
+        field = f'{prefix}_{index}'
+        namespace[f'{field}_type'] = expected
+        namespace[f'{field}_missing'] = (
+            f'В ответе от API отсутствует ключ "{key}".'
+        )
+        namespace[f'{field}_wrong_type'] = (
+            f'В ответе от API под ключом "{key}" {TYPE_ERRORS[expected]}.'
+        )
+        error = f'LazyMessage({{}}, {prefix}_name, {value})'
+        lines += [
+            f'{indent}try:',
+            f'{indent}    {field} = {value}[{key!r}]',
+            f'{indent}except KeyError:',
+            f'{indent}    raise KeyError('
+            + error.format(f'{field}_missing') + ') from None',
+            f'{indent}if not isinstance({field}, {field}_type):',
+            f'{indent}    raise TypeError('
+            + error.format(f'{field}_wrong_type') + ')',
+        ]
+        if key in choices:
+            allowed, message = choices[key]
+            namespace[f'{field}_allowed'] = allowed
+            namespace[f'{field}_not_allowed'] = message
+            lines += [
+                f'{indent}if {field} not in {field}_allowed:',
+                f'{indent}    raise KeyError('
+                + error.format(f'{field}_not_allowed') + ')',
+            ]
+        if key in items:
+            item = f'{field}_item'
+            lines.append(f'{indent}for {item} in {field}:')
+            _emit_checks(
+                items[key], item, deep, lines, namespace, depth + 1
+            )
@@ -0,0 +1,130 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+STATUS_INDEX_SIZE = int(os.getenv('STATUS_INDEX_SIZE', 100000))
+
+
+def intern_status(status):
+    """Возвращает общий для всех пользователей экземпляр строки статуса.
+
+    Статусов всего несколько, а строки из JSON и SQLite у каждого ответа
+    свои, поэтому без интернирования каждая запись хранила бы копию.
+    """
+    return sys.intern(status) if isinstance(status, str) else status
+
+
+class StatusIndex:
+    """Индекс последних отправленных статусов работ в памяти.
+
+    Хранит не больше maxsize работ, вытесняя давно не использованные;
+    при промахе статус читается из хранилища контрольных точек. Переход
+    занимается до отправки (reserve), поэтому параллельные отправки
+    одного статуса не дублируются. Работы индексируются и по
+    пользователю, чтобы забывать пользователей без обхода всего индекса.
+    Считает попадания, промахи и подавленные повторы.
+    """
+
+    def __init__(self, store, maxsize=STATUS_INDEX_SIZE):
+        """Создает пустой индекс поверх хранилища."""
+        self.store = store
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.by_tenant = {}
+        self.reserved = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.suppressed = 0
+
+    def last_status(self, tenant, homework):
+        """Возвращает последний отправленный статус работы или None."""
+        key = (tenant, homework)
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+        status = self.store.load_status(tenant, homework)
+        with self.lock:
+            if key in self.entries:
+                return self.entries[key]
+            self._set(key, status)
+        return status
+
+    def is_transition(self, tenant, homework, status):
+        """Проверяет, отличается ли статус от последнего отправленного."""
+        if self.last_status(tenant, homework) != status:
+            return True
+        with self.lock:
+            self.suppressed += 1
+        return False
+
+    def reserve(self, tenant, homework, status):
+        """Занимает переход к статусу перед отправкой.
+
+        Проверка и запись выполняются под одной блокировкой. Возвращает
+        False, если статус уже отправлен или занят другой отправкой.
+        """
+        key = (tenant, homework)
+        loaded = self.last_status(tenant, homework)
+        with self.lock:
+            previous = self.entries.get(key, loaded)
+            if previous == status:
+                self.suppressed += 1
+                return False
+            self.reserved[key + (status,)] = previous
+            self._set(key, status)
+        return True
+
+    def release(self, tenant, homework, status):
+        """Возвращает предыдущий статус после неудачной отправки."""
+        key = (tenant, homework)
+        with self.lock:
+            previous = self.reserved.pop(key + (status,), None)
+            if self.entries.get(key) == status:
+                if previous is None:
+                    self._delete(key)
+                else:
+                    self._set(key, previous)
+
+    def record(self, tenant, homework, status):
+        """Запоминает отправленный статус в индексе и хранилище."""
+        self.store.mark_delivered(tenant, homework, status)
+        with self.lock:
+            self.reserved.pop((tenant, homework, status), None)
+            self._set((tenant, homework), status)
+
+    def forget(self, tenants):
+        """Удаляет из индекса работы пользователей tenants."""
+        with self.lock:
+            for tenant in tenants:
+                for homework in self.by_tenant.pop(tenant, ()):
+                    del self.entries[(tenant, homework)]
+
+    def stats(self):
+        """Возвращает счетчики индекса."""
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'suppressed': self.suppressed,
+            }
+
+    def _set(self, key, status):
+        self.entries[key] = intern_status(status)
+        self.entries.move_to_end(key)
+        self.by_tenant.setdefault(key[0], set()).add(key[1])
+        while len(self.entries) > self.maxsize:
+            self._delete(next(iter(self.entries)))
+
+    def _delete(self, key):
+        del self.entries[key]
+        tenant, homework = key
+        homeworks = self.by_tenant[tenant]
+        homeworks.discard(homework)
+        if not homeworks:
+            del self.by_tenant[tenant]
@@ -0,0 +1,145 @@
+import codecs
+import json
+
+import homework
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+
+
+class HomeworkStream:
+    """Потоковый разбор ответа API по частям.
+
+    Работы из списка homeworks проверяются и отдаются по одной по мере
+    чтения, поэтому в памяти одновременно находится только одна работа
+    и непрочитанный остаток текущей части. Метка времени current_date
+    доступна после того, как поток прочитан до конца.
+    """
+
+    def __init__(self, chunks, on_close=None):
+        """Создает поток поверх итератора частей тела ответа в байтах."""
+        self.chunks = iter(chunks)
+        self.on_close = on_close
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.exhausted = False
+        self.current_date = None
+
+    def __iter__(self):
+        """Отдает проверенные работы по одной."""
+        try:
+            yield from self._parse()
+        finally:
+            if self.on_close is not None:
+                self.on_close()
+
+    def _parse(self):
+        if self._peek() != '{':
+            homework.validate_response(json.loads(self._rest()))
+        self.pos += 1
+        summary = {}
+        if self._peek() == '}':
+            self.pos += 1
+        else:
+            yield from self._members(summary)
+        homework.validate_response(summary)
+        self.current_date = summary['current_date']
+
+    def _members(self, summary):
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == 'homeworks' and self._peek() == '[':
+                self.pos += 1
+                summary[key] = []
+                yield from self._homeworks()
+            elif key in homework.RESPONSE_SCHEMA['fields']:
+                summary[key] = self._value()
+            else:
+                self._value()
+            if self._separator('}'):
+                return
+
+    def _homeworks(self):
+        if self._peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield homework.validate_homework(self._value())
+            if self._separator(']'):
+                return
+
+    def _separator(self, closing):
+        char = self._peek()
+        self.pos += 1
+        if char == closing:
+            return True
+        if char != ',':
+            raise json.JSONDecodeError(
+                f'Ожидалась "," или "{closing}"', self.buffer, self.pos - 1
+            )
+        return False
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise json.JSONDecodeError(
+                f'Ожидался "{char}"', self.buffer, self.pos
+            )
+        self.pos += 1
+
+    def _peek(self):
+        while True:
+            while self.pos < len(self.buffer):
+                if self.buffer[self.pos] not in WHITESPACE:
+                    return self.buffer[self.pos]
+                self.pos += 1
+            if not self._fill():
+                return ''
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            if end < len(self.buffer) or not self._fill():
+                self.pos = end
+                return value
+
+    def _fill(self):
+        if self.exhausted:
+            return False
+        if self.pos > CHUNK_SIZE and self.pos * 2 > len(self.buffer):
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        for chunk in self.chunks:
+            text = self.decoder.decode(chunk)
+            if text:
+                self.buffer += text
+                return True
+        self.buffer += self.decoder.decode(b'', final=True)
+        self.exhausted = True
+        return False
+
+    def _rest(self):
+        while self._fill():
+            pass
+        return self.buffer[self.pos:]
+
+
+def stream_homeworks(practicum_token, from_date, transport=None):
+    """Запрашивает API и возвращает поток проверенных работ.
+
+    В отличие от get_api_answer, from_date=0 запрашивает всю историю.
+    """
+    response = homework.request_api(
+        from_date, practicum_token, transport, stream=True
+    )
+    return HomeworkStream(
+        response.iter_content(CHUNK_SIZE), on_close=response.close
+    )
@@ -0,0 +1,414 @@
+import bisect
+import glob
+import hashlib
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from multiprocessing.connection import wait
+
+import engine
+import homework
+import metrics
+from botapi import BotClient
+from checkpoint import CHECKPOINT_PATH, CheckpointStore
+from commands import STATUS_COMMAND, CommandPoller, StatusCache
+from outbox import Outbox
+from responses import ResponseCache
+from tenants import load_tenants
+from transport import Transport
+
+SUPERVISOR_WORKERS = int(
+    os.getenv('SUPERVISOR_WORKERS', os.cpu_count() or 1)
+)
+SHARD_VNODES = int(os.getenv('SHARD_VNODES', 64))
+WORKER_RESTART_DELAY = float(os.getenv('WORKER_RESTART_DELAY', 5))
+STOP_TIMEOUT = 30
+WAIT_INTERVAL = 1.0
+SEND_POLL_INTERVAL = 0.01
+
+logger = homework.logger
+
+
+def ring_hash(key):
+    """Возвращает устойчивый между процессами хеш строки."""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class HashRing:
+    """Кольцо согласованного хеширования с виртуальными узлами.
+
+    Каждый узел занимает vnodes точек кольца, пользователь принадлежит
+    узлу первой точки после своего хеша. При добавлении или потере узла
+    переезжают только пользователи, чьи точки сменили владельца, — в
+    среднем доля 1/N.
+    """
+
+    def __init__(self, nodes=(), vnodes=SHARD_VNODES):
+        """Создает кольцо из узлов nodes."""
+        self.vnodes = vnodes
+        self.points = []
+        self.owners = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        """Добавляет узел на кольцо."""
+        for index in range(self.vnodes):
+            point = ring_hash(f'{node}#{index}')
+            position = bisect.bisect(self.points, point)
+            self.points.insert(position, point)
+            self.owners.insert(position, node)
+
+    def remove(self, node):
+        """Убирает узел с кольца."""
+        kept = [
+            (point, owner) for point, owner in zip(self.points, self.owners)
+            if owner != node
+        ]
+        self.points = [point for point, _ in kept]
+        self.owners = [owner for _, owner in kept]
+
+    def owner(self, key):
+        """Возвращает узел, которому принадлежит ключ, или None."""
+        if not self.points:
+            return None
+        position = bisect.bisect(self.points, ring_hash(key))
+        return self.owners[position % len(self.owners)]
+
+
+def worker_checkpoint_path(worker_id, path=CHECKPOINT_PATH):
+    """Возвращает путь к контрольным точкам обработчика."""
+    root, extension = os.path.splitext(path)
+    return f'{root}-{worker_id}{extension}'
+
+
+def checkpoint_paths(path=CHECKPOINT_PATH):
+    """Возвращает общий файл контрольных точек и файлы обработчиков."""
+    root, extension = os.path.splitext(path)
+    paths = sorted(glob.glob(f'{glob.escape(root)}-*{extension}'))
+    if os.path.exists(path):
+        paths.insert(0, path)
+    return paths
+
+
+def collect_checkpoints(names, paths):
+    """Собирает самые свежие контрольные точки пользователей из файлов.
+
+    Для каждого пользователя берется файл с наибольшим курсором: он
+    принадлежал последнему обработчику, который опрашивал пользователя.
+    """
+    latest = {}
+    for path in paths:
+        store = CheckpointStore(path)
+        try:
+            exported = store.export_tenants(names)
+        finally:
+            store.close()
+        for name, data in exported.items():
+            if name not in latest or data[0] > latest[name][0]:
+                latest[name] = data
+    return latest
+
+
+def run_worker(worker_id, control):
+    """Точка входа процесса-обработчика."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if metrics.METRICS_PORT:
+        metrics.start_server(metrics.METRICS_PORT + 1 + worker_id)
+    engine.serve(
+        [], control=control,
+        checkpoint_path=worker_checkpoint_path(worker_id),
+    )
+
+
+class Worker:
+    """Процесс-обработчик и его канал управления."""
+
+    def __init__(self, worker_id, process, control):
+        """Запоминает процесс обработчика."""
+        self.id = worker_id
+        self.process = process
+        self.control = control
+        self.released = None
+
+
+class Supervisor:
+    """Распределяет пользователей по процессам-обработчикам.
+
+    Каждому обработчику принадлежит доля пользователей на кольце
+    согласованного хеширования. Когда обработчик добавляется, теряется
+    или убирается, переезжают только пользователи, сменившие владельца:
+    прежний владелец перестает их опрашивать и фиксирует контрольные
+    точки, а новый получает самые свежие курсоры и статусы из файлов
+    контрольных точек. Упавший обработчик перезапускается через
+    restart_delay секунд. Скорость отправки в Telegram и бюджет запросов
+    к API делятся между обработчиками поровну. Пока большой список
+    пользователей уходит обработчику, супервизор продолжает читать
+    каналы, чтобы не ждать обработчик, который сам пишет в канал.
+    """
+
+    def __init__(self, tenants, workers=SUPERVISOR_WORKERS,
+                 target=run_worker, cache=None,
+                 restart_delay=WORKER_RESTART_DELAY,
+                 checkpoint_path=CHECKPOINT_PATH):
+        """Создает супервизор для списка пользователей."""
+        self.tenants = {tenant.name: tenant for tenant in tenants}
+        self.size = workers
+        self.target = target
+        self.cache = cache
+        self.restart_delay = restart_delay
+        self.checkpoint_path = checkpoint_path
+        self.context = multiprocessing.get_context('spawn')
+        self.workers = {}
+        self.ring = HashRing()
+        self.owners = {}
+        self.restarts = {}
+        self.wanted = workers
+        self.stopping = False
+
+    def start(self):
+        """Запускает обработчики и раздает им пользователей."""
+        for worker_id in range(self.size):
+            self._spawn(worker_id)
+        self.rebalance()
+
+    def run(self):
+        """Следит за обработчиками до остановки."""
+        while not self.stopping:
+            self.step(WAIT_INTERVAL)
+        self.stop()
+
+    def step(self, timeout=0):
+        """Обрабатывает сообщения и смену состава обработчиков.
+
+        Число обработчиков меняется на wanted, если его изменили.
+        """
+        self._receive(timeout)
+        if self.wanted != self.size:
+            self.scale(self.wanted)
+        lost = [
+            worker for worker in self.workers.values()
+            if not worker.process.is_alive()
+        ]
+        for worker in lost:
+            logger.error(
+                'Обработчик %d завершился с кодом %s.',
+                worker.id, worker.process.exitcode,
+            )
+            self._forget(worker)
+            self.restarts[worker.id] = time.monotonic() + self.restart_delay
+        if lost:
+            self.rebalance()
+        due = [
+            worker_id for worker_id, at in self.restarts.items()
+            if at <= time.monotonic()
+        ]
+        for worker_id in due:
+            del self.restarts[worker_id]
+            if worker_id < self.size:
+                self._spawn(worker_id)
+        if due:
+            self.rebalance()
+
+    def scale(self, workers):
+        """Меняет число обработчиков."""
+        workers = max(workers, 1)
+        logger.info('Число обработчиков: %d -> %d.', self.size, workers)
+        previous, self.size = self.size, workers
+        self.wanted = workers
+        for worker_id in range(previous, workers):
+            self.restarts.pop(worker_id, None)
+            self._spawn(worker_id)
+        retired = [
+            worker for worker in self.workers.values()
+            if worker.id >= workers
+        ]
+        for worker in retired:
+            self.ring.remove(worker.id)
+        for worker in self.workers.values():
+            if worker.id < min(previous, workers):
+                self._send(worker, ('share', workers))
+        self.rebalance()
+        for worker in retired:
+            self._stop_worker(worker)
+
+    def rebalance(self):
+        """Переносит пользователей на их владельцев по кольцу."""
+        assignment = {
+            name: self.ring.owner(name) for name in self.tenants
+        }
+        moved = [
+            name for name, owner in assignment.items()
+            if self.owners.get(name) != owner
+        ]
+        if not moved:
+            return
+        releasing = {}
+        for name in moved:
+            worker = self.workers.get(self.owners.get(name))
+            if worker is not None:
+                releasing.setdefault(worker, []).append(name)
+        for worker, names in releasing.items():
+            worker.released = None
+            self._send(worker, ('release', names))
+        self._wait_released(releasing)
+        latest = collect_checkpoints(
+            moved, checkpoint_paths(self.checkpoint_path)
+        )
+        acquiring = {}
+        for name in moved:
+            owner = assignment[name]
+            if owner is None:
+                continue
+            data = {name: latest[name]} if name in latest else {}
+            acquiring.setdefault(owner, []).append(
+                (self.tenants[name], data)
+            )
+        for owner, handoffs in acquiring.items():
+            self._send(self.workers[owner], ('acquire', handoffs))
+        self.owners = assignment
+        logger.info(
+            'Перераспределение: переехало пользователей %d из %d.',
+            len(moved), len(assignment),
+        )
+
+    def stop(self):
+        """Останавливает все обработчики."""
+        self.stopping = True
+        for worker in list(self.workers.values()):
+            self._send(worker, ('stop', None))
+        deadline = time.monotonic() + STOP_TIMEOUT
+        for worker in list(self.workers.values()):
+            worker.process.join(max(deadline - time.monotonic(), 0))
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+            self._forget(worker)
+
+    def shard(self, worker_id):
+        """Возвращает имена пользователей обработчика."""
+        return sorted(
+            name for name, owner in self.owners.items() if owner == worker_id
+        )
+
+    def _spawn(self, worker_id):
+        control, child = self.context.Pipe()
+        process = self.context.Process(
+            target=self.target, args=(worker_id, child),
+            name=f'worker-{worker_id}', daemon=True,
+        )
+        process.start()
+        child.close()
+        self.workers[worker_id] = Worker(worker_id, process, control)
+        self._send(self.workers[worker_id], ('share', self.size))
+        self.ring.add(worker_id)
+        logger.info('Запущен обработчик %d (pid %d).', worker_id, process.pid)
+
+    def _forget(self, worker):
+        self.workers.pop(worker.id, None)
+        self.ring.remove(worker.id)
+        worker.control.close()
+
+    def _stop_worker(self, worker):
+        self._send(worker, ('stop', None))
+        worker.process.join(STOP_TIMEOUT)
+        if worker.process.is_alive():
+            worker.process.terminate()
+            worker.process.join()
+        self._forget(worker)
+
+    def _send(self, worker, message):
+        sending = threading.Thread(
+            target=self._send_now, args=(worker, message), daemon=True
+        )
+        sending.start()
+        while sending.is_alive():
+            self._receive(SEND_POLL_INTERVAL)
+
+    def _send_now(self, worker, message):
+        try:
+            worker.control.send(message)
+        except OSError as error:
+            logger.error('Обработчик %d недоступен: %s', worker.id, error)
+
+    def _wait_released(self, releasing):
+        deadline = time.monotonic() + engine.HANDOFF_TIMEOUT + STOP_TIMEOUT
+        while time.monotonic() < deadline and any(
+            worker.released is None and worker.process.is_alive()
+            for worker in releasing
+        ):
+            self._receive(min(WAIT_INTERVAL, deadline - time.monotonic()))
+
+    def _receive(self, timeout):
+        workers = {
+            worker.control: worker for worker in self.workers.values()
+        }
+        for control in wait(list(workers), timeout):
+            try:
+                command, payload = control.recv()
+            except (EOFError, OSError):
+                continue
+            worker = workers[control]
+            if command == 'released':
+                worker.released = payload
+            elif command == 'statuses' and self.cache is not None:
+                self.cache.update(*payload)
+
+
+def main():
+    """Запускает супервизор и обработчики."""
+    tenants = load_tenants()
+    if not (homework.TELEGRAM_TOKEN and tenants):
+        message = (
+            'Не заданы TELEGRAM_TOKEN или список пользователей'
+            ' (TENANTS_FILE либо PRACTICUM_TOKEN и TELEGRAM_CHAT_ID).'
+            '\nПрограмма принудительно остановлена.'
+        )
+        logger.critical(message)
+        sys.exit(message)
+
+    logger.info(
+        'Запуск супервизора: пользователей %d, обработчиков %d.',
+        len(tenants), SUPERVISOR_WORKERS,
+    )
+    homework.renderer.load()
+    metrics.start_server()
+    transport = Transport(responses=ResponseCache())
+    client = BotClient(homework.TELEGRAM_TOKEN, transport)
+    outbox = Outbox(client)
+    cache = StatusCache()
+    for tenant in tenants:
+        cache.add(tenant)
+    poller = CommandPoller(client, cache, transport, bot=outbox)
+    supervisor = Supervisor(tenants, cache=cache)
+
+    def stop(signum, frame):
+        supervisor.stopping = True
+
+    def grow(signum, frame):
+        supervisor.wanted += 1
+
+    def shrink(signum, frame):
+        supervisor.wanted = max(supervisor.wanted - 1, 1)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTTIN, grow)
+    signal.signal(signal.SIGTTOU, shrink)
+    supervisor.start()
+    if STATUS_COMMAND:
+        poller.start()
+    try:
+        supervisor.run()
+    finally:
+        poller.close()
+        outbox.close()
+        transport.close()
+
+
+if __name__ == '__main__':
+    main()
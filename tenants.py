@@ -0,0 +1,57 @@
+import json
+import os
+from typing import NamedTuple
+
+import homework
+
+TENANTS_FILE = os.getenv('TENANTS_FILE')
+
+
+class Tenant(NamedTuple):
+    """Пользователь бота: токен API Практикума и чат в Telegram.
+
+    Неизменяемый кортеж без словаря атрибутов: пользователей могут быть
+    сотни тысяч.
+    """
+
+    name: str
+    practicum_token: str
+    chat_id: str
+    locale: str = None
+
+
+def parse_tenant(entry):
+    """Проверяет описание пользователя и создает Tenant."""
+    if not isinstance(entry, dict):
+        raise TypeError(
+            'Описание пользователя должно быть словарем.'
+            f' entry = {entry}.'
+        )
+    for key in ('practicum_token', 'chat_id'):
+        if key not in entry:
+            raise KeyError(
+                f'В описании пользователя отсутствует ключ "{key}".'
+            )
+    chat_id = str(entry['chat_id'])
+    return Tenant(
+        name=str(entry.get('name', chat_id)),
+        practicum_token=entry['practicum_token'],
+        chat_id=chat_id,
+        locale=entry.get('locale'),
+    )
+
+
+def load_tenants(path=TENANTS_FILE):
+    """Загружает список пользователей из файла или окружения."""
+    if not path:
+        if not (homework.PRACTICUM_TOKEN and homework.TELEGRAM_CHAT_ID):
+            return []
+        return [parse_tenant({
+            'practicum_token': homework.PRACTICUM_TOKEN,
+            'chat_id': homework.TELEGRAM_CHAT_ID,
+        })]
+    with open(path, encoding='utf-8') as file:
+        entries = json.load(file)
+    if not isinstance(entries, list):
+        raise TypeError('Файл пользователей должен содержать список.')
+    return [parse_tenant(entry) for entry in entries]
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import asyncapi
+import homework
+from asyncapi import AsyncBotClient, AsyncTransport, LoopBot
+from checkpoint import CheckpointStore
+from incidents import fingerprint
+from outbox import Outbox
+from tenants import Tenant
+
+pytest.importorskip('aiohttp')
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(
+                self.server.max_in_flight, self.server.in_flight
+            )
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.in_flight -= 1
+        token = self.headers['Authorization'].split()[-1]
+        self.send_json(self.server.status, {
+            'homeworks': [
+                {'homework_name': f'{token}.zip', 'status': 'approved'}
+            ],
+            'current_date': 1000,
+        })
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if self.server.flood:
+            self.server.flood -= 1
+            self.send_json(429, {
+                'ok': False, 'error_code': 429,
+                'description': 'Too Many Requests: retry after 0.1',
+                'parameters': {'retry_after': 0.1},
+            })
+            return
+        if self.server.status != 200:
+            self.send_json(self.server.status, {
+                'ok': False, 'error_code': self.server.status,
+                'description': 'Bad Request: chat not found',
+            })
+            return
+        self.server.messages.append((body['chat_id'], body['text']))
+        self.send_json(200, {'ok': True, 'result': {}})
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.requests = 0
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.lock = threading.Lock()
+    server.latency = 0
+    server.status = 200
+    server.messages = []
+    server.flood = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    server.url = f'http://{host}:{port}'
+    monkeypatch.setattr(
+        homework, 'ENDPOINT', f'{server.url}/homework_statuses/'
+    )
+    monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+async def with_transport(func, *args):
+    transport = AsyncTransport()
+    try:
+        return await func(*args, transport)
+    finally:
+        await transport.close()
+
+
+class TestAsyncAPI:
+
+    def test_get_api_answer(self, server):
+        answer = asyncio.run(asyncapi.get_api_answer(0))
+
+        assert answer['homeworks'][0]['homework_name'] == 'token.zip'
+        assert server.requests == 1
+
+    def test_status_code_error(self, server):
+        server.status = 500
+
+        with pytest.raises(IOError, match='Код ответа: 500') as error:
+            asyncio.run(asyncapi.get_api_answer(0))
+
+        assert fingerprint(error.value)[2] == 500, (
+            'Код ответа должен попадать в отпечаток ошибки'
+        )
+
+    def test_connection_error(self, monkeypatch):
+        monkeypatch.setattr(homework, 'ENDPOINT', 'http://127.0.0.1:9/')
+
+        with pytest.raises(IOError, match='Ошибка при выполнении запроса'):
+            asyncio.run(asyncapi.get_api_answer(0))
+
+    def test_shared_validation(self, server):
+        current_date, statuses = asyncio.run(
+            with_transport(asyncapi.fetch_statuses, 'alice', 0)
+        )
+
+        assert current_date == 1000
+        assert statuses == [(
+            {'homework_name': 'alice.zip', 'status': 'approved'},
+            homework.parse_status(
+                {'homework_name': 'alice.zip', 'status': 'approved'}
+            ),
+        )]
+
+    def test_send_message(self, server):
+        async def send():
+            transport = AsyncTransport()
+            bot = AsyncBotClient('secret', transport, server.url)
+            try:
+                await asyncapi.send_chat_message(bot, '1', 'Привет')
+                server.status = 400
+                await asyncapi.send_chat_message(bot, '1', 'Привет')
+            finally:
+                await transport.close()
+
+        with pytest.raises(IOError, match='Невозможно отправить сообщение'):
+            asyncio.run(send())
+
+        assert server.messages == [('1', 'Привет')]
+
+    def test_requests_in_flight(self, server):
+        server.latency = 0.2
+
+        async def poll_all():
+            return await asyncio.gather(*(
+                with_transport(asyncapi.fetch_api_answer, 0, str(index))
+                for index in range(100)
+            ))
+
+        answers = asyncio.run(poll_all())
+
+        assert len(answers) == 100
+        assert server.max_in_flight >= 20, (
+            'Запросы должны выполняться одновременно'
+        )
+
+
+async def drive(server, tenants, store, requests):
+    loop = asyncio.get_running_loop()
+    transport = AsyncTransport()
+    outbox = Outbox(LoopBot(
+        AsyncBotClient('secret', transport, server.url), loop
+    ))
+    task = asyncio.ensure_future(asyncapi.run(
+        tenants, outbox, transport, store, interval=0.05, in_flight=5
+    ))
+    while server.requests < requests:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await loop.run_in_executor(None, outbox.close)
+    await transport.close()
+
+
+class TestDriver:
+
+    def test_run_delivers_once(self, server, tmp_path):
+        tenants = [Tenant(str(index), f'token{index}', str(index))
+                   for index in range(20)]
+        store = CheckpointStore(str(tmp_path / 'checkpoint.sqlite3'))
+        write = store._write
+        writers = set()
+
+        def recording_write(*statements):
+            writers.add(threading.get_ident())
+            return write(*statements)
+
+        store._write = recording_write
+
+        asyncio.run(drive(server, tenants, store, 3 * len(tenants)))
+
+        assert sorted(chat_id for chat_id, _ in server.messages) == sorted(
+            tenant.chat_id for tenant in tenants
+        ), 'Каждый пользователь должен получить статус ровно один раз'
+        assert store.load_cursor('0') == 1000
+        assert writers and threading.get_ident() not in writers, (
+            'Запись контрольных точек не должна блокировать цикл событий'
+        )
+        store.close()
+
+    def test_retry_after(self, server, tmp_path):
+        server.flood = 1
+        store = CheckpointStore(str(tmp_path / 'checkpoint.sqlite3'))
+
+        asyncio.run(drive(server, [Tenant('alice', 'token', '1')], store, 5))
+
+        assert server.messages == [('1', homework.parse_status(
+            {'homework_name': 'token.zip', 'status': 'approved'}
+        ))], 'После 429 сообщение должно уйти повторно через retry_after'
+        store.close()
@@ -0,0 +1,153 @@
+import pytest
+
+import backfill
+import streaming
+from checkpoint import CheckpointStore
+from tenants import Tenant
+from utils import MockBot
+
+DAY = 24 * 3600
+
+
+def make_homework(id, status, day):
+    return {
+        'id': id,
+        'homework_name': f'hw{id}',
+        'status': status,
+        'date_updated': f'2022-01-{day:02d}T00:00:00Z',
+    }
+
+
+HISTORY = [
+    make_homework(1, 'reviewing', 1),
+    make_homework(1, 'rejected', 2),
+    make_homework(2, 'reviewing', 3),
+    make_homework(1, 'approved', 5),
+]
+START = backfill.updated_at(HISTORY[0])
+
+
+class FakeStream:
+
+    def __init__(self, items, current_date):
+        self.items = items
+        self.current_date = current_date
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    requests = []
+
+    def stream_homeworks(practicum_token, from_date, transport=None):
+        requests.append(from_date)
+        if practicum_token == 'bad':
+            raise IOError('Неверный токен')
+        items = [
+            item for item in HISTORY
+            if backfill.updated_at(item) >= from_date
+        ]
+        return FakeStream(items, START + 10 * DAY)
+
+    monkeypatch.setattr(streaming, 'stream_homeworks', stream_homeworks)
+    return requests
+
+
+class TestBackfill:
+    tenant = Tenant('alice', 'token', '1')
+
+    def test_backfill_keeps_latest_transition(self, fake_api):
+        current_date, items = backfill.backfill_tenant(
+            self.tenant, START, START + 7 * DAY
+        )
+
+        assert fake_api == [START], (
+            'Промежуток должен запрашиваться одним запросом'
+        )
+        assert current_date == START + 10 * DAY
+        assert [(item['id'], item['status']) for item in items] == [
+            (2, 'reviewing'), (1, 'approved')
+        ], 'Для каждой работы должен остаться только последний статус'
+
+    def test_until_drops_later_changes(self, fake_api):
+        _, items = backfill.backfill_tenant(
+            self.tenant, START, START + 3 * DAY
+        )
+
+        assert [(item['id'], item['status']) for item in items] == [
+            (1, 'rejected'), (2, 'reviewing')
+        ], 'Изменения после конца промежутка не должны попадать в выборку'
+
+    def test_backfill_tenants(self, fake_api):
+        tenants = [self.tenant, Tenant('bob', 'other', '2')]
+        results = backfill.backfill_tenants(
+            tenants, START, START + 7 * DAY, parallel=2
+        )
+
+        assert [tenant.name for tenant, _ in results] == ['alice', 'bob']
+        assert len(fake_api) == 2, (
+            'Каждый пользователь должен запрашиваться один раз'
+        )
+
+    def test_failing_tenant_does_not_stop_others(self, fake_api,
+                                                 monkeypatch, capsys):
+        tenants = [
+            Tenant('bad', 'bad', '3'), self.tenant, Tenant('bob', 'b', '2')
+        ]
+        monkeypatch.setattr(backfill, 'load_tenants', lambda: tenants)
+
+        with pytest.raises(SystemExit) as error:
+            backfill.main([
+                '--since', str(START), '--until', str(START + 7 * DAY),
+                '--dry-run',
+            ])
+
+        assert 'bad' in str(error.value) and '1 из 3' in str(error.value), (
+            'Команда должна завершаться ошибкой со сводкой'
+        )
+        chats = [
+            line.split(':')[0]
+            for line in capsys.readouterr().out.splitlines()
+        ]
+        assert chats == ['1', '1', '2', '2'], (
+            'Статусы остальных пользователей должны быть отправлены'
+        )
+
+    def test_deliver_backfill(self, fake_api, tmp_path):
+        store = CheckpointStore(str(tmp_path / 'checkpoint.sqlite3'))
+        checkpoint = store.for_tenant(self.tenant.name)
+        bot = MockBot()
+        current_date, items = backfill.backfill_tenant(
+            self.tenant, START, START + 7 * DAY
+        )
+
+        assert backfill.deliver_backfill(
+            bot, self.tenant, items, checkpoint, current_date
+        ) == 2
+        assert backfill.deliver_backfill(
+            bot, self.tenant, items, checkpoint, current_date
+        ) == 0, 'Повторный запуск не должен отправлять статусы снова'
+        assert len(bot.messages) == 2
+        assert checkpoint.cursor == current_date
+
+    def test_cursor_stops_at_until(self, fake_api, tmp_path):
+        store = CheckpointStore(str(tmp_path / 'checkpoint.sqlite3'))
+        checkpoint = store.for_tenant(self.tenant.name)
+        until = START + 2 * DAY
+        current_date, items = backfill.backfill_tenant(
+            self.tenant, START, until
+        )
+
+        backfill.deliver_backfill(
+            MockBot(), self.tenant, items, checkpoint, current_date, until
+        )
+        assert checkpoint.cursor == until, (
+            'Курсор не должен уходить дальше --until: '
+            'более поздние изменения не были отправлены'
+        )
+
+    def test_date_argument(self):
+        assert backfill.date_argument('2022-01-01') == START
+        assert backfill.date_argument('123') == 123
@@ -0,0 +1,113 @@
+import json
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import homework
+from botapi import BotAPIError, BotClient
+from outbox import Outbox
+from transport import Transport
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        data = json.loads(self.rfile.read(length))
+        self.server.received.append((self.path, data))
+        if self.server.replies:
+            status, reply = self.server.replies.pop(0)
+        else:
+            status, reply = 200, {'ok': True, 'result': {'text': data['text']}}
+        body = json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.received = []
+    server.replies = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    host, port = server.server_address
+    transport = Transport()
+    yield BotClient('123:secret', transport, f'http://{host}:{port}')
+    transport.close()
+
+
+class TestBotClient:
+
+    def test_send_message(self, server, client):
+        assert client.send_message(42, 'Привет') == {'text': 'Привет'}
+        assert server.received == [
+            ('/bot123:secret/sendMessage', {'chat_id': 42, 'text': 'Привет'})
+        ]
+
+    def test_error_description(self, server, client):
+        server.replies.append((429, {
+            'ok': False, 'error_code': 429,
+            'description': 'Too Many Requests',
+            'parameters': {'retry_after': 3},
+        }))
+        with pytest.raises(BotAPIError) as error:
+            client.send_message(42, 'Привет')
+        assert error.value.error_code == 429
+        assert error.value.retry_after == 3
+
+    def test_connection_error_hides_token(self):
+        client = BotClient('123:secret', base_url='http://127.0.0.1:1')
+        with pytest.raises(BotAPIError) as error:
+            client.send_message(42, 'Привет')
+        assert 'secret' not in str(error.value), (
+            'Токен бота не должен попадать в текст ошибки'
+        )
+
+    def test_send_chat_message_raises_ioerror(self, server, client):
+        server.replies.append((400, {
+            'ok': False, 'error_code': 400,
+            'description': 'Bad Request: chat not found',
+        }))
+        with pytest.raises(IOError):
+            homework.send_chat_message(client, 42, 'Привет')
+
+    def test_outbox_retries_after_flood_wait(self, server, client):
+        server.replies.append((429, {
+            'ok': False, 'error_code': 429,
+            'description': 'Too Many Requests',
+            'parameters': {'retry_after': 0.1},
+        }))
+        outbox = Outbox(client, rate=100, chat_rate=100)
+        try:
+            outbox.send_message(42, 'Привет')
+        finally:
+            outbox.close()
+        assert len(server.received) == 2
+
+    def test_homework_does_not_import_telegram(self):
+        code = 'import sys, homework; print("telegram" in sys.modules)'
+        output = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True,
+            check=True, cwd=homework.os.path.dirname(homework.__file__),
+        ).stdout
+        assert output.strip() == 'False', (
+            'homework не должен импортировать python-telegram-bot'
+        )
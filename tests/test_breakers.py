@@ -0,0 +1,203 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import homework
+import metrics
+from botapi import BotAPIError, BotClient
+from breakers import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from transport import Transport
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests += 1
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def do_POST(self):
+        self.server.requests += 1
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = (
+            b'{"ok": false, "error_code": 429,'
+            b' "parameters": {"retry_after": 1}}'
+        )
+        self.send_response(429)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.requests = 0
+    server.status = 500
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    monkeypatch.setattr(
+        homework, 'ENDPOINT', f'http://{host}:{port}/homework_statuses/'
+    )
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_breaker(clock, **kwargs):
+    options = {'failure_rate': 0.5, 'min_calls': 4, 'window': 10,
+               'open_timeout': 30, 'probes': 1, 'clock': clock}
+    options.update(kwargs)
+    return CircuitBreaker('test', **options)
+
+
+class TestCircuitBreaker:
+
+    def test_opens_on_failure_rate(self):
+        clock = Clock()
+        breaker = make_breaker(clock)
+        for failed in (False, True, False):
+            breaker.record(failed, breaker.allow())
+        assert breaker.state == CLOSED
+        breaker.record(True, breaker.allow())
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+
+    def test_old_failures_leave_window(self):
+        clock = Clock()
+        breaker = make_breaker(clock)
+        for _ in range(3):
+            breaker.record(True, breaker.allow())
+        clock.now += 11
+        breaker.record(True, breaker.allow())
+        assert breaker.state == CLOSED, (
+            'Неудачи вне окна не должны размыкать автомат'
+        )
+
+    def test_half_open_probe(self):
+        clock = Clock()
+        breaker = make_breaker(clock)
+        for _ in range(4):
+            breaker.record(True, breaker.allow())
+        clock.now += 30
+
+        generation = breaker.allow()
+        assert breaker.state == HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+        breaker.record(True, generation)
+        assert breaker.state == OPEN, 'Неудачная проба должна размыкать'
+
+        clock.now += 30
+        breaker.record(False, breaker.allow())
+        assert breaker.state == CLOSED, 'Успешная проба должна замыкать'
+        breaker.allow()
+
+    def test_late_results_are_ignored(self):
+        clock = Clock()
+        breaker = make_breaker(clock)
+        late = [breaker.allow() for _ in range(4)]
+        for _ in range(4):
+            breaker.record(True, breaker.allow())
+        clock.now += 30
+
+        probe = breaker.allow()
+        breaker.record(False, late.pop())
+        assert breaker.state == HALF_OPEN, (
+            'Исход запроса до размыкания не должен решать судьбу пробы'
+        )
+        with pytest.raises(CircuitOpenError):
+            breaker.allow()
+        breaker.record(False, probe)
+        assert breaker.state == CLOSED
+
+        for generation in late:
+            breaker.record(True, generation)
+        breaker.record(True, breaker.allow())
+        assert breaker.state == CLOSED, (
+            'Поздние неудачи не должны размыкать замкнутый заново автомат'
+        )
+
+
+class TestTransportBreaker:
+
+    def test_outage_stops_requests(self, server):
+        transport = Transport()
+        for _ in range(20):
+            with pytest.raises(IOError):
+                homework.fetch_api_answer(1, 'token', transport)
+        transport.close()
+
+        assert server.requests == 10, (
+            'После размыкания автомата запросы не должны уходить в сеть'
+        )
+        breaker, = transport.breakers.values()
+        assert breaker.state == OPEN
+        assert 'homework_breaker_state{breaker="%s"} 1' % breaker.name in (
+            metrics.REGISTRY.render()
+        )
+
+    def test_client_errors_do_not_open(self, server):
+        server.status = 401
+        transport = Transport()
+        for _ in range(20):
+            with pytest.raises(IOError):
+                homework.fetch_api_answer(1, 'token', transport)
+        transport.close()
+
+        assert server.requests == 20
+        assert all(
+            breaker.state == CLOSED for breaker in transport.breakers.values()
+        )
+
+    def test_shared_by_tenants(self, server):
+        transport = Transport()
+        for index in range(10):
+            with pytest.raises(IOError):
+                homework.fetch_api_answer(1, f'token-{index}', transport)
+        with pytest.raises(IOError, match='разомкнут'):
+            homework.fetch_api_answer(1, 'other-token', transport)
+        transport.close()
+
+    def test_telegram_flood_does_not_open(self, server):
+        transport = Transport()
+        host, port = server.server_address
+        bot = BotClient('token', transport, f'http://{host}:{port}')
+        for _ in range(20):
+            with pytest.raises(BotAPIError):
+                bot.send_message(1, 'text')
+        transport.close()
+
+        assert server.requests == 20, (
+            'Ответ 429 от Bot API не должен размыкать автомат хоста'
+        )
+        breaker, = transport.breakers.values()
+        assert breaker.state == CLOSED
+
+    def test_api_flood_opens(self, server):
+        server.status = 429
+        transport = Transport()
+        for _ in range(20):
+            with pytest.raises(IOError):
+                homework.fetch_api_answer(1, 'token', transport)
+        transport.close()
+
+        assert server.requests == 10
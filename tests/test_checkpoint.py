@@ -0,0 +1,122 @@
+import sqlite3
+
+import pytest
+
+import homework
+from checkpoint import CheckpointStore, homework_key
+from utils import MockBot
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'checkpoint.sqlite3')
+
+
+class TestCheckpoint:
+
+    def test_cursor_survives_restart(self, path):
+        store = CheckpointStore(path)
+        store.save_cursor('alice', 100)
+        store.save_cursor('alice', 200)
+        store.close()
+
+        store = CheckpointStore(path)
+        assert store.load_cursor('alice') == 200, (
+            'Проверьте, что метка времени сохраняется между запусками'
+        )
+        assert store.load_cursor('bob') is None
+
+    def test_unflushed_writes_are_lost(self, path):
+        store = CheckpointStore(path, batch_size=10, flush_interval=60)
+        store.save_cursor('alice', 100)
+        store.flush()
+        store.save_cursor('alice', 200)
+        store.connection.close()
+
+        store = CheckpointStore(path)
+        assert store.load_cursor('alice') == 100, (
+            'Незафиксированная запись не должна попадать на диск'
+        )
+
+    def test_batch_commits(self, path):
+        store = CheckpointStore(path, batch_size=2, flush_interval=60)
+        store.save_cursor('alice', 100)
+        assert store.connection.in_transaction
+        store.mark_delivered('alice', '1', 'approved')
+        assert not store.connection.in_transaction, (
+            'Проверьте, что записи фиксируются пачками'
+        )
+
+    def test_only_last_status_is_stored(self, path):
+        store = CheckpointStore(path)
+        for status in ('reviewing', 'rejected', 'approved'):
+            store.mark_delivered('alice', '1', status)
+        store.flush()
+
+        tables = {
+            name for name, in store.connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+        assert tables == {'cursors', 'last_status'}, (
+            'Хранилище не должно копить историю отправленных статусов'
+        )
+        assert store.load_status('alice', '1') == 'approved'
+        store.close()
+
+    def test_migration_runs_once(self, path):
+        connection = sqlite3.connect(path)
+        connection.execute('CREATE TABLE delivered (tenant TEXT)')
+        connection.commit()
+        connection.close()
+
+        store = CheckpointStore(path)
+        tables = {row[0] for row in store.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )}
+        assert 'delivered' not in tables, (
+            'Старая таблица должна удаляться при первом открытии'
+        )
+        store.connection.execute('CREATE TABLE delivered (tenant TEXT)')
+        store.close()
+
+        store = CheckpointStore(path)
+        tables = {row[0] for row in store.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )}
+        assert 'delivered' in tables, (
+            'Миграция не должна повторяться при каждом открытии'
+        )
+        store.close()
+
+    def test_homework_key(self):
+        assert homework_key({'id': 7, 'homework_name': 'hw'}) == '7'
+        assert homework_key({'homework_name': 'hw'}) == 'hw'
+
+    def test_poll_once_skips_delivered(self, monkeypatch, path):
+        response = {
+            'homeworks': [
+                {'id': 1, 'homework_name': 'hw1', 'status': 'approved'},
+                {'id': 2, 'homework_name': 'hw2', 'status': 'reviewing'},
+            ],
+            'current_date': 300,
+        }
+        monkeypatch.setattr(
+            homework, 'fetch_api_answer', lambda *args: response
+        )
+        checkpoint = CheckpointStore(path).for_tenant('alice')
+        checkpoint.mark_delivered(response['homeworks'][0])
+        bot = MockBot()
+
+        result, homeworks = homework.poll_once(
+            bot, 'token', 1, 100, None, checkpoint
+        )
+
+        assert result == 300 and homeworks == response['homeworks']
+        assert checkpoint.cursor == 300, (
+            'Проверьте, что новая метка времени сохраняется'
+        )
+        assert len(bot.messages) == 1 and 'hw2' in bot.messages[0], (
+            'Уже отправленный статус не должен отправляться повторно'
+        )
+        assert checkpoint.is_delivered(response['homeworks'][1])
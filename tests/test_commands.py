@@ -0,0 +1,216 @@
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import commands
+import engine
+import homework
+from commands import CommandPoller, StatusCache
+from pipeline import Pipeline
+from tenants import Tenant
+
+TENANT = Tenant('alice', 'token', '1')
+HOMEWORKS = [
+    {'homework_name': 'hw1', 'status': 'approved'},
+    {'homework_name': 'hw2', 'status': 'reviewing'},
+]
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class MockClient:
+
+    def __init__(self, updates=()):
+        self.updates = list(updates)
+        self.calls = []
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def call(self, method, **params):
+        self.calls.append((method, params))
+        updates, self.updates = self.updates, []
+        return updates
+
+    def send_message(self, chat_id, text):
+        with self.lock:
+            self.sent.append((chat_id, text))
+
+
+def status_update(update_id, chat_id='1', text='/status'):
+    return {
+        'update_id': update_id,
+        'message': {'chat': {'id': int(chat_id)}, 'text': text},
+    }
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def cache(clock):
+    cache = StatusCache(max_age=60, clock=clock)
+    cache.add(TENANT)
+    return cache
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    fetches = []
+
+    def fetch_snapshot(tenant, transport=None):
+        fetches.append(tenant)
+        return HOMEWORKS
+
+    monkeypatch.setattr(commands, 'fetch_snapshot', fetch_snapshot)
+    return fetches
+
+
+def answer(poller, *updates):
+    poller.client.updates = list(updates)
+    poller.poll()
+    poller.close()
+    return poller.client.sent
+
+
+class TestStatusCache:
+
+    def test_staleness(self, cache, clock):
+        entry = cache.get('1')
+        cache.update('1', HOMEWORKS[:1])
+        assert cache.is_stale(entry), (
+            'Без полного снимка запись должна считаться устаревшей'
+        )
+        cache.update('1', HOMEWORKS, complete=True)
+        assert not cache.is_stale(entry)
+        clock.now += 61
+        assert cache.is_stale(entry)
+        cache.update('1', [])
+        assert not cache.is_stale(entry), (
+            'Опрос после полного снимка должен обновлять запись'
+        )
+
+    def test_report(self, cache):
+        entry = cache.get('1')
+        cache.update('1', HOMEWORKS, complete=True)
+        cache.update('1', [{'homework_name': 'hw1', 'status': 'rejected'}])
+
+        report = cache.report(entry)
+
+        assert report.splitlines() == [
+            commands.STATUS_TITLE,
+            'hw1: ' + homework.HOMEWORK_STATUSES['rejected'],
+            'hw2: ' + homework.HOMEWORK_STATUSES['reviewing'],
+        ]
+        assert cache.report(entry) is report
+
+    def test_statuses_are_interned(self, cache):
+        status = ''.join(['appr', 'oved'])
+        cache.update('1', [{'homework_name': 'hw1', 'status': status}])
+
+        assert cache.get('1').homeworks['hw1'] is sys.intern(status), (
+            'Кеш должен хранить общую строку статуса, а не ответ API'
+        )
+
+
+class TestCommandPoller:
+
+    def test_fresh_cache(self, cache, fetches):
+        cache.update('1', HOMEWORKS, complete=True)
+        poller = CommandPoller(MockClient(), cache)
+
+        sent = answer(poller, status_update(1), status_update(2, text='hi'))
+
+        assert fetches == [], 'Свежий кеш не должен обращаться к API'
+        assert sent == [('1', cache.report(cache.get('1')))]
+        assert poller.offset == 3
+
+    def test_unknown_chat(self, cache, fetches):
+        poller = CommandPoller(MockClient(), cache)
+
+        assert answer(poller, status_update(1, chat_id='2')) == []
+        assert fetches == []
+
+    def test_coalesced_refresh(self, monkeypatch, cache):
+        started = threading.Event()
+        release = threading.Event()
+        fetches = []
+
+        def fetch_snapshot(tenant, transport=None):
+            fetches.append(tenant)
+            started.set()
+            release.wait(5)
+            return HOMEWORKS
+
+        monkeypatch.setattr(commands, 'fetch_snapshot', fetch_snapshot)
+        poller = CommandPoller(MockClient(), cache)
+        poller.client.updates = [status_update(1)]
+        poller.poll()
+        started.wait(5)
+        poller.client.updates = [status_update(2), status_update(3)]
+        poller.poll()
+        release.set()
+        poller.close()
+
+        assert fetches == [TENANT], (
+            'Одновременные команды должны ждать одно обновление'
+        )
+        assert len(poller.client.sent) == 3
+        assert not cache.is_stale(cache.get('1'))
+
+    def test_refresh_failure(self, monkeypatch, cache, clock):
+        cache.update('1', HOMEWORKS, complete=True)
+        clock.now += 120
+
+        def fetch_snapshot(tenant, transport=None):
+            raise IOError('Ошибка')
+
+        monkeypatch.setattr(commands, 'fetch_snapshot', fetch_snapshot)
+        poller = CommandPoller(MockClient(), cache)
+
+        (chat_id, text), = answer(poller, status_update(1))
+
+        assert text.startswith(commands.STATUS_TITLE)
+        assert text.endswith(
+            commands.OUTDATED.format(age='2 мин 0 с')
+        ), 'При сбое обновления нужно ответить устаревшими данными'
+
+    def test_no_data(self, monkeypatch, cache):
+        def fetch_snapshot(tenant, transport=None):
+            raise IOError('Ошибка')
+
+        monkeypatch.setattr(commands, 'fetch_snapshot', fetch_snapshot)
+        poller = CommandPoller(MockClient(), cache)
+
+        assert answer(poller, status_update(1)) == [
+            ('1', commands.NO_STATUSES)
+        ]
+
+    def test_engine_fills_cache(self, monkeypatch, cache, fetches):
+        def fetch_statuses(*args):
+            return 11, [(item, 'msg') for item in HOMEWORKS]
+
+        monkeypatch.setattr(homework, 'fetch_statuses', fetch_statuses)
+        cache.update('1', [], complete=True)
+        state = engine.TenantState(TENANT, current_timestamp=10)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            runtime = engine.Runtime(MockClient(), executor, cache=cache)
+            asyncio.run(engine.poll_tenant_once(state, Pipeline(runtime)))
+
+        poller = CommandPoller(MockClient(), cache)
+        (chat_id, text), = answer(poller, status_update(1))
+        assert fetches == []
+        assert 'hw2: ' + homework.HOMEWORK_STATUSES['reviewing'] in text, (
+            'Ответ на /status должен учитывать результат опроса'
+        )
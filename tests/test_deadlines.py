@@ -0,0 +1,180 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import deadlines
+import engine
+import homework
+import metrics
+from botapi import BotAPIError, BotClient
+from deadlines import DeadlineExceeded, deadline
+from outbox import Outbox
+from pipeline import Pipeline
+from tenants import Tenant
+from transport import Transport
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(self.server.stall)
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        time.sleep(self.server.stall)
+        body = b'{"ok": true, "result": {}}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.stall = 5
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    monkeypatch.setattr(
+        homework, 'ENDPOINT', f'http://{host}:{port}/homework_statuses/'
+    )
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def exceeded_total():
+    return metrics.counter(
+        'homework_deadline_exceeded_total', 'Запросы после истечения срока.'
+    ).value
+
+
+class TestDeadline:
+
+    def test_caps_timeouts(self):
+        assert deadlines.timeout(5, 30) == (5, 30), (
+            'Без срока таймауты не меняются'
+        )
+        with deadline(2):
+            connect, read = deadlines.timeout(5, 30)
+            with deadline(60):
+                assert deadlines.remaining() <= 2, (
+                    'Вложенный срок не должен продлевать внешний'
+                )
+        assert connect <= 2 and read <= 2, (
+            'Таймауты не должны выходить за срок'
+        )
+        assert deadlines.remaining() is None
+
+    def test_expired(self):
+        with deadline(0.01):
+            time.sleep(0.02)
+            with pytest.raises(DeadlineExceeded):
+                deadlines.timeout(5, 30)
+
+    def test_propagates_to_threads(self):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with deadline(10):
+                context = contextvars.copy_context()
+                left = executor.submit(
+                    context.run, deadlines.remaining
+                ).result()
+
+        assert 0 < left <= 10, 'Срок должен передаваться в поток с контекстом'
+
+
+class TestTransportDeadline:
+
+    def test_stalled_request(self, server):
+        transport = Transport(breakers=False)
+        before = exceeded_total()
+        started = time.monotonic()
+
+        with pytest.raises(IOError, match='Истек срок'):
+            with deadline(0.3):
+                homework.fetch_api_answer(1, 'token', transport)
+
+        assert time.monotonic() - started < 2, (
+            'Зависший запрос должен прерываться по сроку итерации'
+        )
+        assert exceeded_total() == before + 1
+        transport.close()
+
+    def test_without_transport(self, server):
+        started = time.monotonic()
+
+        with pytest.raises(IOError):
+            with deadline(0.3):
+                homework.fetch_api_answer(1, 'token')
+
+        assert time.monotonic() - started < 2
+
+
+class TestSendDeadline:
+
+    def make_bot(self, server):
+        host, port = server.server_address
+        return BotClient(
+            'token', Transport(breakers=False), f'http://{host}:{port}'
+        )
+
+    def test_outbox_send(self, server):
+        outbox = Outbox(self.make_bot(server))
+        started = time.monotonic()
+
+        with pytest.raises(BotAPIError, match='Истек срок'):
+            with deadline(0.3):
+                outbox.send_message(1, 'text')
+
+        assert time.monotonic() - started < 2, (
+            'Отправка через очередь должна прерываться по сроку итерации'
+        )
+        outbox.close()
+
+    def test_pipeline_delivery(self, server, monkeypatch):
+        monkeypatch.setattr(
+            homework, 'fetch_statuses', lambda *args: (
+                20, [({'homework_name': 'hw', 'status': 'approved'}, 'hw')]
+            )
+        )
+        original = deadlines.deadline
+        monkeypatch.setattr(
+            deadlines, 'deadline', lambda: original(0.3)
+        )
+        state = engine.TenantState(Tenant('alice', 'token', '1'), 10)
+
+        async def poll():
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                pipeline = Pipeline(
+                    engine.Runtime(self.make_bot(server), executor)
+                )
+                workers = [
+                    asyncio.create_task(work)
+                    for work in pipeline.run_workers()
+                ]
+                await engine.poll_tenant_once(state, pipeline)
+                await pipeline.queue.join()
+                for worker in workers:
+                    worker.cancel()
+
+        started = time.monotonic()
+        asyncio.run(poll())
+
+        assert time.monotonic() - started < 2, (
+            'Доставка конвейером должна прерываться по сроку итерации'
+        )
+        assert state.current_timestamp == 10
@@ -0,0 +1,149 @@
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import engine
+import homework
+from checkpoint import CheckpointStore
+from pipeline import Pipeline
+from tenants import Tenant
+from utils import MockBot
+
+
+@pytest.fixture
+def runtime():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield engine.Runtime(MockBot(), executor)
+
+
+async def poll_and_deliver(state, pipeline):
+    workers = [asyncio.create_task(work) for work in pipeline.run_workers()]
+    await engine.poll_tenant_once(state, pipeline)
+    await pipeline.queue.join()
+    for worker in workers:
+        worker.cancel()
+
+
+class TestEngine:
+    tenant = Tenant('alice', 'token', '1')
+
+    def test_poll_tenant_once(self, monkeypatch, runtime):
+        def fetch_statuses(practicum_token, current_timestamp, transport,
+                           locale):
+            assert practicum_token == 'token'
+            return current_timestamp + 1, [({'status': 'reviewing'}, 'msg')]
+
+        monkeypatch.setattr(homework, 'fetch_statuses', fetch_statuses)
+        state = engine.TenantState(self.tenant, current_timestamp=10)
+
+        asyncio.run(poll_and_deliver(state, Pipeline(runtime)))
+
+        assert state.current_timestamp == 11, (
+            'Проверьте, что после доставки сохраняется новая метка времени'
+        )
+        assert state.policy.last_status == 'reviewing', (
+            'Проверьте, что политика интервалов учитывает статус'
+        )
+        assert runtime.bot.sent == [('1', 'msg')]
+
+    def test_poll_tenant_once_error(self, monkeypatch, runtime):
+        error = IOError('Ошибка')
+
+        def fetch_statuses(*args):
+            raise error
+
+        monkeypatch.setattr(homework, 'fetch_statuses', fetch_statuses)
+        state = engine.TenantState(self.tenant, current_timestamp=10)
+
+        asyncio.run(poll_and_deliver(state, Pipeline(runtime)))
+
+        assert state.current_timestamp == 10, (
+            'При ошибке метка времени не должна меняться'
+        )
+        assert state.incidents.open, 'Ошибка должна открыть инцидент'
+        assert state.policy.error_rate > 0
+        assert runtime.bot.sent == [('1', 'Сбой в работе программы: Ошибка')]
+
+    def test_duplicates_in_response_sent_once(self, monkeypatch, runtime,
+                                              tmp_path):
+        item = {'id': 1, 'status': 'approved'}
+
+        def fetch_statuses(practicum_token, current_timestamp, transport,
+                           locale):
+            return current_timestamp + 1, [(dict(item), 'msg')] * 2
+
+        monkeypatch.setattr(homework, 'fetch_statuses', fetch_statuses)
+        store = CheckpointStore(str(tmp_path / 'checkpoint.sqlite3'))
+        state = engine.TenantState(
+            self.tenant, current_timestamp=10,
+            checkpoint=store.for_tenant(self.tenant.name),
+        )
+
+        asyncio.run(poll_and_deliver(state, Pipeline(runtime, workers=8)))
+        store.close()
+
+        assert runtime.bot.sent == [('1', 'msg')], (
+            'Копии одной работы в ответе не должны отправляться повторно'
+        )
+
+    def test_state_is_compact(self, monkeypatch, runtime):
+        def fetch_statuses(practicum_token, current_timestamp, transport,
+                           locale):
+            return current_timestamp, [
+                ({'status': ''.join(['rev', 'iewing'])}, 'msg')
+            ]
+
+        monkeypatch.setattr(homework, 'fetch_statuses', fetch_statuses)
+        state = engine.TenantState(self.tenant, current_timestamp=10)
+
+        asyncio.run(poll_and_deliver(state, Pipeline(runtime)))
+
+        assert not hasattr(state, '__dict__'), (
+            'Состояние пользователя должно храниться в слотах'
+        )
+        assert state.incidents is None, (
+            'Агрегатор инцидентов нужен только после ошибки'
+        )
+        assert not hasattr(state, 'latest_error'), (
+            'Состояние не должно удерживать ошибку с ее трассировкой'
+        )
+        assert state.policy.last_status is sys.intern('reviewing')
+
+    def test_run_polls_all_tenants(self, monkeypatch):
+        polled = []
+        tenants = [Tenant(str(i), str(i), str(i)) for i in range(10)]
+        sleep = asyncio.sleep
+
+        def fetch_statuses(practicum_token, current_timestamp, transport,
+                           locale):
+            polled.append(practicum_token)
+            return current_timestamp, []
+
+        async def fast_sleep(delay):
+            if len(polled) >= 2 * len(tenants):
+                raise asyncio.CancelledError
+            await sleep(0.001)
+
+        monkeypatch.setattr(homework, 'fetch_statuses', fetch_statuses)
+        monkeypatch.setattr(engine.asyncio, 'sleep', fast_sleep)
+        monkeypatch.setattr(engine.time, 'monotonic', self.fake_clock())
+
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(engine.run(tenants, MockBot(), interval=5))
+
+        assert sorted(set(polled)) == sorted(t.name for t in tenants), (
+            'Проверьте, что опрашиваются все пользователи'
+        )
+
+    @staticmethod
+    def fake_clock():
+        now = 0.0
+
+        def monotonic():
+            nonlocal now
+            now += 0.5
+            return now
+
+        return monotonic
@@ -0,0 +1,127 @@
+import threading
+import time
+
+import pytest
+
+import metrics
+from hedging import Hedger
+
+
+class MockResponse:
+
+    def __init__(self, status_code, stall):
+        self.status_code = status_code
+        self.stall = stall
+
+
+class Backend:
+
+    def __init__(self, stalls=(), failures=(), statuses=None):
+        self.stalls = list(stalls)
+        self.failures = set(failures)
+        self.statuses = statuses
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            call = self.calls
+            self.calls += 1
+            stall = self.stalls.pop(0) if self.stalls else 0.001
+        time.sleep(stall)
+        if call in self.failures:
+            raise IOError('Ошибка')
+        if self.statuses is not None:
+            return MockResponse(self.statuses[call], stall)
+        return stall
+
+
+def hedges(outcome):
+    return metrics.counter(
+        'homework_hedges_total', 'Дублирующие запросы.', outcome=outcome
+    ).value
+
+
+@pytest.fixture
+def hedger():
+    hedger = Hedger(min_samples=5, min_delay=0.01, ratio=0.5)
+    for _ in range(5):
+        hedger.observe(0.001)
+    yield hedger
+    hedger.close()
+
+
+class TestHedger:
+
+    def test_no_hedging_without_history(self):
+        hedger = Hedger(min_samples=5)
+        backend = Backend([0.05])
+
+        assert hedger.call(backend) == 0.05
+        assert backend.calls == 1, (
+            'Пока задержек мало, запросы не должны дублироваться'
+        )
+        hedger.close()
+
+    def test_delay_from_quantile(self, hedger):
+        assert hedger.delay == 0.01, (
+            'Задержка перед копией не должна быть меньше min_delay'
+        )
+        for _ in range(100):
+            hedger.observe(0.2)
+        assert hedger.delay == pytest.approx(0.2)
+
+    def test_hedge_wins_on_stall(self, hedger):
+        backend = Backend([2, 0.001])
+        sent, won = hedges('sent'), hedges('won')
+        started = time.monotonic()
+
+        assert hedger.call(backend) == 0.001
+        assert time.monotonic() - started < 1, (
+            'Копия зависшего запроса должна отвечать первой'
+        )
+        assert backend.calls == 2
+        assert hedges('sent') == sent + 1
+        assert hedges('won') == won + 1
+
+    def test_failed_attempt_waits_for_other(self, hedger):
+        backend = Backend([0.05, 0.2], failures={0})
+
+        assert hedger.call(backend) == 0.2, (
+            'Неудачная попытка не должна скрывать успешную'
+        )
+
+    def test_failed_response_does_not_win(self, hedger):
+        backend = Backend([0.2, 0.001], statuses=[200, 503])
+
+        response = hedger.call(backend)
+
+        assert response.status_code == 200, (
+            'Быстрый ответ 503 копии не должен побеждать ответ 200'
+        )
+        assert hedger.delay == 0.01, (
+            'Задержка неудачного ответа не должна учитываться'
+        )
+
+    def test_all_responses_fail(self, hedger):
+        response = hedger.call(
+            Backend([0.05, 0.001], statuses=[503, 429])
+        )
+
+        assert response.status_code == 503, (
+            'Если неудачны все попытки, возвращается ответ первой'
+        )
+
+    def test_all_attempts_fail(self, hedger):
+        with pytest.raises(IOError):
+            hedger.call(Backend([0.05, 0.05], failures={0, 1}))
+
+    def test_ratio_limits_hedges(self, hedger):
+        hedger.ratio = 0.1
+        backend = Backend([0.05] * 20)
+        for _ in range(10):
+            hedger.call(backend)
+
+        assert backend.calls <= 11, (
+            'Копий не должно быть больше заданной доли запросов'
+        )
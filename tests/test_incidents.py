@@ -0,0 +1,182 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+import engine
+import homework
+from incidents import ErrorAggregator, fingerprint
+from pipeline import Pipeline
+from tenants import Tenant
+from utils import MockBot
+
+
+class MockResponse:
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class MockTransport:
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def get(self, *args, **kwargs):
+        return MockResponse(self.status_code)
+
+
+def api_error(status_code, timestamp):
+    try:
+        homework.request_api(timestamp, 'token', MockTransport(status_code))
+    except IOError as error:
+        return error
+
+
+def connection_error():
+    try:
+        try:
+            raise requests.ConnectionError('Нет соединения')
+        except requests.ConnectionError as error:
+            raise IOError(f'Ошибка при выполнении запроса: {error}') from error
+    except IOError as error:
+        return error
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestFingerprint:
+
+    def test_same_failure_same_fingerprint(self):
+        first, second = api_error(500, 1), api_error(500, 2)
+        assert first is not second
+        assert fingerprint(first) == fingerprint(second), (
+            'Одинаковые сбои должны иметь одинаковый отпечаток'
+        )
+        assert fingerprint(first) == (
+            'RequestException', 'homework.request_api', 500
+        )
+
+    def test_fingerprint_is_shared(self):
+        assert fingerprint(api_error(500, 1)) is fingerprint(
+            api_error(500, 2)
+        ), 'Одинаковые отпечатки должны храниться в одном экземпляре'
+
+    def test_status_and_type_distinguish(self):
+        assert fingerprint(api_error(500, 1)) != fingerprint(api_error(503, 1))
+        assert fingerprint(connection_error())[0] == 'ConnectionError'
+
+
+class TestErrorAggregator:
+
+    def test_outage_sends_open_and_resolve(self):
+        clock = Clock()
+        incidents = ErrorAggregator(window=600, clock=clock)
+
+        opened = incidents.record(api_error(500, 1))
+        repeats = []
+        for second in range(1, 10):
+            clock.now = second * 60
+            repeats.append(incidents.record(api_error(500, second)))
+        clock.now = 600
+        resolved = incidents.resolve()
+
+        assert opened.startswith('Сбой в работе программы: ')
+        assert repeats == [None] * 9, (
+            'Повторы открытого инцидента не должны отправляться'
+        )
+        assert resolved.startswith('Работа программы восстановлена.')
+        assert 'повторов: 10 за 10 мин 0 с' in resolved
+        assert incidents.resolve() is None
+
+    def test_reminder_after_window(self):
+        clock = Clock()
+        incidents = ErrorAggregator(window=600, clock=clock)
+        incidents.record(api_error(500, 1))
+        clock.now = 600
+        reminder = incidents.record(api_error(500, 2))
+        assert 'продолжается' in reminder
+        assert 'повторов: 2' in reminder
+
+    def test_flapping_reopens_silently(self):
+        clock = Clock()
+        incidents = ErrorAggregator(window=600, clock=clock)
+        assert incidents.record(api_error(500, 1)) is not None
+        clock.now = 60
+        assert incidents.resolve() is not None
+        clock.now = 120
+        assert incidents.record(api_error(500, 2)) is None, (
+            'Повтор сбоя внутри окна не должен открывать новый инцидент'
+        )
+        assert incidents.resolve() is None
+        clock.now = 1000
+        assert incidents.record(api_error(500, 3)) is not None
+
+    def test_reopened_incident_gets_reminder(self):
+        clock = Clock()
+        incidents = ErrorAggregator(window=600, clock=clock)
+        incidents.record(api_error(500, 1))
+        clock.now = 60
+        incidents.resolve()
+        clock.now = 120
+        assert incidents.record(api_error(500, 2)) is None
+        clock.now = 599
+        assert incidents.record(api_error(500, 3)) is None
+
+        clock.now = 600
+        reminder = incidents.record(api_error(500, 4))
+        assert reminder is not None and 'продолжается' in reminder, (
+            'Снова открытый инцидент должен напоминать о себе после окна'
+        )
+        clock.now = 700
+        assert incidents.resolve().startswith(
+            'Работа программы восстановлена.'
+        )
+
+    def test_success_without_errors(self):
+        assert ErrorAggregator().resolve() is None
+
+
+@pytest.fixture
+def runtime():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        yield engine.Runtime(MockBot(), executor)
+
+
+class TestEngineIncidents:
+
+    def test_outage_does_not_flood_chat(self, monkeypatch, runtime):
+        failures = iter([True] * 5 + [False])
+
+        def fetch_statuses(practicum_token, current_timestamp, transport,
+                           locale):
+            if next(failures):
+                return homework.fetch_api_answer(
+                    current_timestamp, practicum_token
+                )
+            return current_timestamp, []
+
+        monkeypatch.setattr(homework, 'fetch_statuses', fetch_statuses)
+        monkeypatch.setattr(homework.requests, 'get',
+                            lambda *args, **kwargs: MockResponse(500))
+        state = engine.TenantState(Tenant('alice', 'token', '1'))
+        pipeline = Pipeline(runtime)
+
+        async def poll(times):
+            for _ in range(times):
+                await engine.poll_tenant_once(state, pipeline)
+
+        asyncio.run(poll(6))
+
+        assert len(runtime.bot.messages) == 2, (
+            'За сбой должно отправляться одно сообщение и одна сводка'
+        )
+        assert 'повторов: 5' in runtime.bot.messages[1]
@@ -0,0 +1,58 @@
+import pytest
+
+from intervals import AdaptiveInterval, budget_floor
+
+
+class TestAdaptiveInterval:
+
+    def test_reviewing_is_polled_often(self):
+        policy = AdaptiveInterval(base=600, minimum=60, maximum=3600)
+
+        interval = policy.observe([{'status': 'reviewing'}])
+
+        assert interval == 60, (
+            'Работа на проверке должна опрашиваться с минимальным интервалом'
+        )
+        for _ in range(5):
+            assert policy.observe() == 60
+
+    def test_idle_backs_off_exponentially(self):
+        policy = AdaptiveInterval(base=600, minimum=60, maximum=3600)
+        policy.observe([{'status': 'approved'}])
+
+        intervals = [policy.observe() for _ in range(6)]
+
+        assert intervals == sorted(intervals), (
+            'Интервал простаивающего пользователя должен расти'
+        )
+        assert intervals[-1] == 3600, 'Интервал не должен превышать максимум'
+
+    def test_errors_back_off(self):
+        policy = AdaptiveInterval(base=600, minimum=60, maximum=36000)
+        healthy = policy.interval
+
+        policy.observe(failed=True)
+
+        assert policy.interval > healthy
+        assert policy.idle_polls == 0, (
+            'Ошибка не должна считаться опросом без изменений'
+        )
+
+    def test_change_shortens_interval(self):
+        policy = AdaptiveInterval(base=600, minimum=60, maximum=3600)
+        for _ in range(3):
+            policy.observe()
+        idle = policy.interval
+
+        policy.observe([{'status': 'rejected'}])
+
+        assert policy.interval < idle
+        assert policy.interval < 600
+
+    @pytest.mark.parametrize('tenants, budget, expected', [
+        (1000, 10, 100),
+        (10, 10, 1),
+        (1000, 0, 0),
+    ])
+    def test_budget_floor(self, tenants, budget, expected):
+        assert budget_floor(tenants, budget) == expected
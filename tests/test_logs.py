@@ -0,0 +1,111 @@
+import asyncio
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import logs
+from engine import Runtime
+from logs import DuplicateFilter, log_context
+
+
+class Recorder:
+
+    def __init__(self):
+        self.threads = []
+
+    def __str__(self):
+        self.threads.append(threading.current_thread())
+        return 'значение'
+
+
+def make_logger(name, **kwargs):
+    stream = io.StringIO()
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logs.setup(logger, stream=stream, **kwargs)
+    return logger, stream
+
+
+def read(logger, stream):
+    logs.flush(logger)
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+class TestLogs:
+
+    def test_json_record_with_context(self):
+        logger, stream = make_logger('test_logs.json')
+        with log_context(tenant='alice', stage='fetch'):
+            logger.info('Опрос %s', 'выполнен')
+        logger.info('Вне контекста')
+
+        first, second = read(logger, stream)
+        assert first['message'] == 'Опрос выполнен'
+        assert first['tenant'] == 'alice'
+        assert first['stage'] == 'fetch'
+        assert second['tenant'] is None, (
+            'Поля контекста не должны переживать блок log_context'
+        )
+
+    def test_formatting_happens_in_background(self):
+        logger, stream = make_logger('test_logs.lazy')
+        value = Recorder()
+        logger.info('Значение: %s', value)
+        records = read(logger, stream)
+
+        assert records[0]['message'] == 'Значение: значение'
+        assert threading.current_thread() not in value.threads, (
+            'Аргументы записи должны форматироваться в фоновом потоке'
+        )
+
+    def test_exception_is_formatted(self):
+        logger, stream = make_logger('test_logs.exception')
+        try:
+            raise ValueError('Ошибка')
+        except ValueError as error:
+            logger.exception(error)
+        record, = read(logger, stream)
+        assert record['message'] == 'Ошибка'
+        assert 'ValueError' in record['exc']
+
+    def test_duplicates_are_suppressed(self, monkeypatch):
+        now = [0.0]
+        monkeypatch.setattr(logs.time, 'monotonic', lambda: now[0])
+        duplicate_filter = DuplicateFilter(interval=60)
+
+        def record(message):
+            return logging.LogRecord(
+                'test', logging.ERROR, __file__, 1, message, (), None
+            )
+
+        assert duplicate_filter.filter(record('Сбой'))
+        assert not duplicate_filter.filter(record('Сбой'))
+        assert not duplicate_filter.filter(record('Сбой'))
+        assert duplicate_filter.filter(record('Другой сбой'))
+        now[0] = 61.0
+        repeated = record('Сбой')
+        assert duplicate_filter.filter(repeated)
+        assert repeated.suppressed == 2, (
+            'После окна запись должна сообщать число подавленных повторов'
+        )
+
+    def test_full_queue_drops_records(self):
+        handler = logs.LazyQueueHandler(logs.queue.Queue(1))
+        record = logging.LogRecord(
+            'test', logging.INFO, __file__, 1, 'Запись', (), None
+        )
+        handler.handle(record)
+        handler.handle(record)
+        assert handler.dropped == 1
+
+    def test_context_reaches_executor(self):
+        async def tenant_in_thread():
+            runtime = Runtime(None, ThreadPoolExecutor(max_workers=1))
+            with log_context(tenant='bob'):
+                return await runtime.call(logs.tenant_var.get)
+
+        assert asyncio.run(tenant_in_thread()) == 'bob', (
+            'Поля журнала должны передаваться в пул потоков'
+        )
@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+import homework
+from messages import MessageRenderer
+from tenants import parse_tenant
+
+HOMEWORK = {'homework_name': 'hw1', 'status': 'approved'}
+
+
+@pytest.fixture
+def renderer():
+    renderer = MessageRenderer()
+    renderer.add_locale('ru', homework.STATUS_TEMPLATE,
+                        homework.HOMEWORK_STATUSES)
+    renderer.add_locale('en', 'Status of "{homework_name}": {verdict}',
+                        {'approved': 'approved'})
+    return renderer
+
+
+class TestMessages:
+
+    def test_default_message_unchanged(self):
+        assert homework.render_status(HOMEWORK) == (
+            'Изменился статус проверки работы "hw1". '
+            'Работа проверена: ревьюеру всё понравилось. Ура!'
+        )
+
+    def test_locale(self):
+        assert homework.render_status(HOMEWORK, 'en').startswith(
+            'The review status of "hw1" has changed.'
+        )
+
+    def test_fallback_to_default_locale(self, renderer):
+        assert renderer.render('rejected', 'hw1', 'en') == (
+            'Status of "hw1": '
+            'Работа проверена: у ревьюера есть замечания.'
+        ), 'Недостающий вердикт должен браться из локали по умолчанию'
+        assert renderer.render('approved', 'hw1', 'de') == (
+            renderer.render('approved', 'hw1')
+        )
+
+    def test_templates_compiled_once(self, renderer):
+        for name in ('hw1', 'hw2', 'hw3'):
+            renderer.render('approved', name, 'en')
+
+        assert renderer.compiled == {
+            ('approved', 'en'): ('Status of "', '": approved')
+        }, 'Кешироваться должны только шаблоны, а не готовые сообщения'
+
+    @pytest.mark.parametrize('template', [
+        'Статус изменился: {verdict}',
+        '{homework_name}: {verdict} ({homework_name})',
+    ])
+    def test_template_needs_one_name(self, renderer, tmp_path, template):
+        path = tmp_path / 'messages.json'
+        path.write_text(json.dumps({'mentor': {'template': template}}))
+
+        with pytest.raises(ValueError, match='homework_name'):
+            renderer.load(str(path))
+        assert 'mentor' not in renderer.locales, (
+            'Неверный шаблон не должен попадать в каталог'
+        )
+
+    def test_load_overrides(self, renderer, tmp_path):
+        path = tmp_path / 'messages.json'
+        path.write_text(json.dumps({
+            'en': {'verdicts': {'approved': 'done'}},
+            'mentor': {'template': '{homework_name}: {verdict}'},
+        }))
+        renderer.render('approved', 'hw1', 'en')
+
+        renderer.load(str(path))
+
+        assert renderer.render('approved', 'hw1', 'en') == (
+            'Status of "hw1": done'
+        ), 'Переопределение должно сбрасывать кеш'
+        assert renderer.render('reviewing', 'hw1', 'mentor') == (
+            'hw1: Работа взята на проверку ревьюером.'
+        )
+
+    def test_tenant_locale(self):
+        tenant = parse_tenant(
+            {'practicum_token': 't', 'chat_id': 1, 'locale': 'en'}
+        )
+
+        assert tenant.locale == 'en'
@@ -0,0 +1,90 @@
+import socket
+import urllib.request
+
+import pytest
+
+import homework
+import metrics
+from metrics import Histogram, bucket_index, bucket_upper
+
+
+class MockResponse:
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+    def json(self):
+        return {'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 1}
+
+
+class TestMetrics:
+
+    @pytest.mark.parametrize('micros', [0, 15, 16, 100, 12345, 10 ** 9])
+    def test_bucket_relative_error(self, micros):
+        upper = bucket_upper(bucket_index(micros))
+        assert micros < upper <= max(micros * 1.07, micros + 1), (
+            'Верхняя граница интервала должна быть не дальше 1/16 от значения'
+        )
+
+    def test_quantile(self):
+        histogram = Histogram()
+        for millis in range(1, 101):
+            histogram.observe(millis / 1000)
+        assert histogram.count == 100
+        assert 0.099 <= histogram.quantile(0.99) <= 0.106
+        assert 0.050 <= histogram.quantile(0.5) <= 0.054
+
+    def test_timed_keeps_signature(self):
+        assert homework.get_api_answer.__code__.co_argcount == 1
+        assert homework.request_api.__wrapped__.__code__.co_argcount == 4
+
+    def test_stages_are_measured(self, monkeypatch):
+        seconds, errors = metrics.stage_metrics('get_api_answer')
+        count, failed = seconds.count, errors.value
+        monkeypatch.setattr(homework.requests, 'get',
+                            lambda *args, **kwargs: MockResponse())
+        homework.get_api_answer(0)
+        monkeypatch.setattr(homework.requests, 'get',
+                            lambda *args, **kwargs: MockResponse(500))
+        with pytest.raises(IOError):
+            homework.get_api_answer(0)
+        assert seconds.count == count + 2
+        assert errors.value == failed + 1, (
+            'Ошибки стадии должны учитываться в счетчике'
+        )
+
+    def test_endpoint(self):
+        metrics.gauge('test_gauge', 'Проверочный показатель.', lambda: 7)
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        server = metrics.start_server(port, host='127.0.0.1')
+        try:
+            url = f'http://127.0.0.1:{port}/metrics'
+            body = urllib.request.urlopen(url).read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert 'test_gauge 7' in body
+        assert '# TYPE homework_stage_seconds histogram' in body
+        assert (
+            'homework_stage_seconds_bucket{stage="get_api_answer",le="+Inf"}'
+        ) in body
+
+    def test_local_by_default(self):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+        server = metrics.start_server(port)
+        try:
+            host = server.server_address[0]
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert host == '127.0.0.1', (
+            'Сервер метрик не должен по умолчанию слушать все интерфейсы'
+        )
+
+    def test_disabled_without_port(self):
+        assert metrics.start_server(port=0) is None
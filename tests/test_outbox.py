@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+from telegram.error import BadRequest, RetryAfter
+
+from outbox import Outbox, TokenBucket
+
+
+class MockBot:
+
+    def __init__(self, failures=None):
+        self.sent = []
+        self.failures = failures or {}
+        self.lock = threading.Lock()
+
+    def send_message(self, chat_id, text):
+        with self.lock:
+            error = self.failures.pop(text, None)
+            if error is not None:
+                raise error
+            self.sent.append((time.monotonic(), chat_id, text))
+        return text
+
+
+@pytest.fixture
+def bot():
+    return MockBot()
+
+
+class TestTokenBucket:
+
+    def test_rate(self):
+        bucket = TokenBucket(rate=2, capacity=1, now=0)
+
+        assert bucket.available_at(0) == 0
+        bucket.consume(0)
+        assert bucket.available_at(0) == 0.5, (
+            'Следующий токен должен появиться через 1 / rate секунд'
+        )
+        assert bucket.available_at(1) == 1
+
+    def test_block(self):
+        bucket = TokenBucket(rate=10, now=0)
+        bucket.block(3)
+
+        assert bucket.available_at(1) == 3
+
+
+class TestOutbox:
+
+    def test_chat_order_and_rate(self, bot):
+        outbox = Outbox(bot, rate=1000, chat_rate=20)
+        futures = [outbox.submit(1, str(i)) for i in range(5)]
+
+        assert [future.result(timeout=5) for future in futures] == [
+            '0', '1', '2', '3', '4'
+        ]
+        outbox.close()
+        assert [text for _, _, text in bot.sent] == ['0', '1', '2', '3', '4'], (
+            'Сообщения одного чата должны уходить по порядку'
+        )
+        times = [sent_at for sent_at, _, _ in bot.sent]
+        assert times[-1] - times[0] >= 4 / 20 * 0.9, (
+            'Сообщения одного чата не должны уходить чаще chat_rate'
+        )
+
+    def test_global_rate(self, bot):
+        outbox = Outbox(bot, rate=50, chat_rate=1000)
+        futures = [outbox.submit(chat, 'text') for chat in range(10)]
+
+        for future in futures:
+            future.result(timeout=5)
+        outbox.close()
+
+        times = sorted(sent_at for sent_at, _, _ in bot.sent)
+        assert times[-1] - times[0] >= 9 / 50 * 0.9, (
+            'Все сообщения вместе не должны уходить чаще rate'
+        )
+
+    def test_retry_after(self):
+        bot = MockBot({'first': RetryAfter(0.2)})
+        outbox = Outbox(bot, rate=1000, chat_rate=1000)
+        started = time.monotonic()
+
+        first = outbox.submit(1, 'first')
+        second = outbox.submit(1, 'second')
+
+        assert first.result(timeout=5) == 'first'
+        assert second.result(timeout=5) == 'second'
+        outbox.close()
+        assert [text for _, _, text in bot.sent] == ['first', 'second'], (
+            'После 429 порядок сообщений чата должен сохраняться'
+        )
+        assert bot.sent[0][0] - started >= 0.2 * 0.9, (
+            'Повторная отправка должна ждать retry_after'
+        )
+
+    def test_error_is_propagated(self):
+        bot = MockBot({'bad': BadRequest('Ошибка')})
+        outbox = Outbox(bot, rate=1000, chat_rate=1000)
+
+        with pytest.raises(BadRequest):
+            outbox.send_message(1, 'bad')
+        assert outbox.send_message(1, 'good') == 'good'
+        assert outbox.depth == 0
+        outbox.close()
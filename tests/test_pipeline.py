@@ -0,0 +1,105 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import engine
+import homework
+from pipeline import Pipeline
+from tenants import Tenant
+from utils import MockBot
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+def make_statuses(*names):
+    return [({'homework_name': name, 'status': 'approved'}, name)
+            for name in names]
+
+
+async def deliver(pipeline, state, current_date, statuses):
+    workers = [asyncio.create_task(work) for work in pipeline.run_workers()]
+    await pipeline.submit(state, current_date, statuses)
+    await pipeline.queue.join()
+    for worker in workers:
+        worker.cancel()
+
+
+class TestPipeline:
+    tenant = Tenant('alice', 'token', '1')
+
+    def test_failed_send_keeps_cursor(self, executor):
+        bot = MockBot(failing={'b'})
+        pipeline = Pipeline(engine.Runtime(bot, executor), workers=2)
+        state = engine.TenantState(self.tenant, current_timestamp=10)
+
+        asyncio.run(deliver(pipeline, state, 20, make_statuses('a', 'b', 'c')))
+
+        assert sorted(bot.messages) == ['a', 'c'], (
+            'Ошибка отправки одного сообщения не должна мешать остальным'
+        )
+        assert state.current_timestamp == 10, (
+            'Метка времени не должна сдвигаться, пока не доставлено всё'
+        )
+        assert state.batch is None
+        assert pipeline.stats['deliver'].errors == 1
+
+    def test_cursor_advances_after_delivery(self, executor):
+        bot = MockBot()
+        pipeline = Pipeline(engine.Runtime(bot, executor))
+        state = engine.TenantState(self.tenant, current_timestamp=10)
+
+        asyncio.run(deliver(pipeline, state, 20, make_statuses('a', 'b')))
+
+        assert state.current_timestamp == 20
+        assert pipeline.stats['deliver'].summary()['count'] == 2
+
+    def test_order_within_chat(self, executor):
+        bot = MockBot(jitter=0.005)
+        pipeline = Pipeline(engine.Runtime(bot, executor), workers=8)
+        state = engine.TenantState(self.tenant, current_timestamp=10)
+        names = [str(index) for index in range(8)]
+
+        asyncio.run(deliver(pipeline, state, 20, make_statuses(*names)))
+
+        assert bot.messages == names, (
+            'Сообщения одного опроса должны доставляться по порядку'
+        )
+
+    def test_backpressure(self, executor):
+        pipeline = Pipeline(engine.Runtime(MockBot(), executor), maxsize=1)
+        states = [
+            engine.TenantState(Tenant(name, 'token', name))
+            for name in ('alice', 'bob')
+        ]
+
+        async def submit_without_workers():
+            for state in states:
+                await asyncio.wait_for(
+                    pipeline.submit(state, 20, make_statuses('a', 'b')), 0.1
+                )
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(submit_without_workers())
+        assert pipeline.queue.qsize() == 1, (
+            'Опрос должен ждать, пока в очереди не освободится место'
+        )
+
+
+class TestPollOnce:
+
+    def test_failed_send_does_not_abort_batch(self, monkeypatch):
+        monkeypatch.setattr(
+            homework, 'fetch_statuses',
+            lambda *args: (20, make_statuses('a', 'b', 'c'))
+        )
+        bot = MockBot(failing={'a'})
+
+        with pytest.raises(IOError):
+            homework.poll_once(bot, 'token', 1, 10)
+
+        assert bot.messages == ['b', 'c']
@@ -0,0 +1,78 @@
+import os
+import signal
+import sys
+import time
+
+import pytest
+
+from profiling import Profiler, collapse
+
+
+def busy_loop(seconds):
+    data = []
+    finish = time.monotonic() + seconds
+    while time.monotonic() < finish:
+        data.append(bytearray(64))
+    return data
+
+
+def wait_for(condition, timeout=5):
+    finish = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < finish, 'Профилировщик не переключился'
+        time.sleep(0.01)
+
+
+class TestProfiler:
+
+    def test_collapse(self):
+        stack = collapse(sys._getframe())
+        assert stack.split(';')[-1].startswith('test_collapse (')
+
+    def test_disabled_by_default(self, tmp_path):
+        profiler = Profiler(str(tmp_path), interval=0.001)
+        profiler.install(enabled=False)
+        with profiler.iteration():
+            busy_loop(0.05)
+        assert not profiler.enabled
+        assert not profiler.stacks
+        assert not os.listdir(tmp_path), (
+            'Выключенный профилировщик не должен писать файлы'
+        )
+
+    def test_writes_stacks_and_allocations(self, tmp_path):
+        profiler = Profiler(str(tmp_path), interval=0.001)
+        profiler.install(enabled=True)
+        wait_for(lambda: profiler.enabled)
+        with profiler.iteration():
+            kept = busy_loop(0.2)
+        profiler.toggle(False)
+        wait_for(lambda: not profiler.enabled)
+
+        files = os.listdir(tmp_path)
+        stacks = [name for name in files if name.endswith('.folded')]
+        reports = [name for name in files if name.startswith('alloc-')]
+        assert stacks and reports
+        with open(tmp_path / stacks[0], encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        assert any('busy_loop (test_profiling.py' in line for line in lines)
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines), (
+            'Файл стеков должен быть в свернутом формате flamegraph'
+        )
+        with open(tmp_path / reports[0], encoding='utf-8') as file:
+            assert 'test_profiling.py' in file.read()
+        assert kept
+
+    @pytest.mark.skipif(not hasattr(signal, 'SIGUSR1'),
+                        reason='Нет сигнала SIGUSR1')
+    def test_signal_toggles(self, tmp_path):
+        previous = signal.getsignal(signal.SIGUSR1)
+        profiler = Profiler(str(tmp_path), interval=0.001)
+        try:
+            profiler.install(enabled=False)
+            os.kill(os.getpid(), signal.SIGUSR1)
+            wait_for(lambda: profiler.enabled)
+            os.kill(os.getpid(), signal.SIGUSR1)
+            wait_for(lambda: not profiler.enabled)
+        finally:
+            signal.signal(signal.SIGUSR1, previous)
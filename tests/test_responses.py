@@ -0,0 +1,158 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import homework
+from responses import ResponseCache
+from transport import Transport
+
+RESPONSE = {'homeworks': [], 'current_date': 1}
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Request:
+
+    def __init__(self, delay=0.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return RESPONSE
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'responses.sqlite3')
+
+
+@pytest.fixture
+def cache(path, clock):
+    cache = ResponseCache(path, ttl=30, window=60, clock=clock)
+    yield cache
+    cache.close()
+
+
+class TestResponseCache:
+
+    def test_ttl(self, cache, clock):
+        request = Request()
+        assert cache.fetch('token', 100, request) == RESPONSE
+        assert cache.fetch('token', 110, request) == RESPONSE
+        assert request.calls == 1, 'Повторный запрос должен взять ответ из кеша'
+
+        clock.now += 31
+        cache.fetch('token', 110, request)
+        assert request.calls == 2, 'Устаревший ответ не должен выдаваться'
+
+    def test_keys(self, cache):
+        request = Request()
+        cache.fetch('token', 100, request)
+        cache.fetch('token', 90, request)
+        cache.fetch('token', 200, request)
+        cache.fetch('other', 100, request)
+        assert request.calls == 4, (
+            'Ответ подходит только тому же токену, окну from_date и'
+            ' запросам с from_date не раньше закешированного'
+        )
+
+    def test_token_not_stored(self, cache, path):
+        cache.fetch('secret-token', 100, Request())
+        with open(path, 'rb') as file:
+            assert b'secret-token' not in file.read()
+
+    def test_errors_not_cached(self, cache):
+        request = Request(error=IOError('Ошибка'))
+        for _ in range(2):
+            with pytest.raises(IOError):
+                cache.fetch('token', 100, request)
+        assert request.calls == 2
+
+    def test_eviction(self, path, clock):
+        cache = ResponseCache(path, ttl=30, window=1, size=3, clock=clock)
+        request = Request()
+        for from_date in range(5):
+            clock.now += 1
+            cache.fetch('token', from_date, request)
+        cache.fetch('token', 0, request)
+        cache.fetch('token', 4, request)
+        cache.close()
+        assert request.calls == 6, 'Старые ответы должны вытесняться'
+
+    def test_single_flight_threads(self, cache):
+        request = Request(delay=0.1)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda _: cache.fetch('token', 100, request), range(8)
+            ))
+        assert request.calls == 1, (
+            'Одновременные запросы должны ждать один запрос'
+        )
+        assert results == [RESPONSE] * 8
+        assert cache.stats['coalesced'] == 7
+
+    def test_single_flight_errors(self, cache):
+        request = Request(delay=0.1, error=IOError('Ошибка'))
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(cache.fetch, 'token', 100, request)
+                for _ in range(4)
+            ]
+        for future in futures:
+            assert isinstance(future.exception(), IOError)
+        assert request.calls == 1
+
+    def test_single_flight_processes(self, path):
+        caches = [ResponseCache(path) for _ in range(4)]
+        request = Request(delay=0.2)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda cache: cache.fetch('token', 100, request), caches
+            ))
+        for cache in caches:
+            cache.close()
+        assert request.calls == 1, (
+            'Процессы должны ждать ответ владельца аренды ключа'
+        )
+        assert results == [RESPONSE] * 4
+
+    def test_fetch_api_answer(self, monkeypatch, cache):
+        calls = []
+
+        class Response:
+
+            def json(self):
+                return RESPONSE
+
+        def request_api(from_date, practicum_token, transport=None):
+            calls.append(from_date)
+            return Response()
+
+        monkeypatch.setattr(homework, 'request_api', request_api)
+        transport = Transport(responses=cache)
+        for _ in range(3):
+            assert homework.fetch_api_answer(100, 'token', transport) == (
+                RESPONSE
+            )
+        assert calls == [100]
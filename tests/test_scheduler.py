@@ -0,0 +1,62 @@
+import random
+
+from scheduler import TimingWheel, jittered
+
+
+class TestTimingWheel:
+
+    def test_due_keys(self):
+        wheel = TimingWheel(tick=1, now=0)
+        wheel.schedule('a', 5)
+        wheel.schedule('b', 10.5)
+
+        assert wheel.advance(4.9) == []
+        assert wheel.advance(5) == ['a']
+        assert wheel.advance(10) == ['b']
+        assert len(wheel) == 0
+
+    def test_cancel_and_reschedule(self):
+        wheel = TimingWheel(tick=1, now=0)
+        wheel.schedule('a', 5)
+        wheel.schedule('b', 5)
+        wheel.cancel('a')
+        wheel.schedule('b', 7)
+
+        assert wheel.advance(6) == [], 'Отмененный срок не должен срабатывать'
+        assert wheel.advance(7) == ['b'], (
+            'Повторное планирование должно заменять прежний срок'
+        )
+
+    def test_past_deadline_fires_immediately(self):
+        wheel = TimingWheel(tick=1, now=100)
+        wheel.schedule('a', 50)
+
+        assert wheel.advance(100) == ['a']
+
+    def test_far_deadlines_cascade(self):
+        random.seed(1)
+        wheel = TimingWheel(tick=1, slots=4, levels=3, now=0)
+        deadlines = {key: random.uniform(0, 500) for key in range(200)}
+        for key, deadline in deadlines.items():
+            wheel.schedule(key, deadline)
+
+        fired = {}
+        now = 0.0
+        while now < 600:
+            previous, now = now, now + random.uniform(0, 3)
+            for key in wheel.advance(now):
+                fired[key] = previous
+
+        assert set(fired) == set(deadlines), (
+            'Все запланированные сроки должны сработать'
+        )
+        for key, deadline in deadlines.items():
+            assert fired[key] < int(deadline) + 1, (
+                'Срок не должен срабатывать позже следующего тика'
+            )
+
+    def test_jittered(self):
+        values = [jittered(100, 0.1) for _ in range(1000)]
+
+        assert all(90 <= value <= 110 for value in values)
+        assert len(set(values)) > 1
@@ -0,0 +1,83 @@
+import pytest
+
+import homework
+from schema import LazyMessage, compile_schema
+
+
+class TestSchema:
+
+    @pytest.mark.parametrize('response, error', [
+        ([], TypeError),
+        ({'current_date': 1}, KeyError),
+        ({'homeworks': {}, 'current_date': 1}, TypeError),
+        ({'homeworks': []}, KeyError),
+        ({'homeworks': [], 'current_date': '1'}, TypeError),
+        ({'homeworks': [{'status': 'approved'}], 'current_date': 1}, KeyError),
+        ({'homeworks': [[]], 'current_date': 1}, TypeError),
+        (
+            {
+                'homeworks': [{'homework_name': 'hw', 'status': 'unknown'}],
+                'current_date': 1,
+            },
+            KeyError,
+        ),
+    ])
+    def test_full_response_errors(self, response, error):
+        with pytest.raises(error):
+            homework.validate_full_response(response)
+
+    def test_check_response_does_not_check_homeworks(self):
+        response = {'homeworks': [{'status': 'unknown'}], 'current_date': 1}
+
+        assert homework.check_response(response) == response['homeworks'], (
+            'check_response не должна проверять отдельные работы'
+        )
+
+    def test_error_text(self):
+        with pytest.raises(KeyError) as info:
+            homework.parse_status({'homework_name': 'hw'})
+
+        assert str(info.value) == repr(
+            'В ответе от API отсутствует ключ "status".'
+            " homework = {'homework_name': 'hw'}."
+        )
+
+    def test_error_text_is_truncated(self):
+        response = {'homeworks': list(range(10000)), 'current_date': 'x'}
+
+        with pytest.raises(TypeError) as info:
+            homework.check_response(response)
+
+        assert len(str(info.value)) < 300, (
+            'Текст ошибки должен сокращать большие значения'
+        )
+
+    def test_message_is_lazy(self):
+        class Value:
+            def __repr__(self):
+                raise AssertionError('Значение не должно форматироваться')
+
+        LazyMessage('Ошибка.', 'value', Value())
+
+    def test_nested_schema(self):
+        validate = compile_schema({
+            'name': 'outer',
+            'fields': {'items': list},
+            'items': {'items': {'name': 'inner', 'fields': {'id': int}}},
+        })
+
+        assert validate({'items': [{'id': 1}]}) == {'items': [{'id': 1}]}
+        with pytest.raises(TypeError, match='inner'):
+            validate({'items': [{'id': '1'}]})
+
+    def test_keys_are_not_code(self):
+        validate = compile_schema({
+            'name': 'value',
+            'fields': {'it\'s "key"': int, 'items': list},
+            'items': {'items': {'name': 'item', 'fields': {'a b': str}}},
+        })
+        value = {'it\'s "key"': 1, 'items': [{'a b': 'x'}]}
+
+        assert validate(value) is value
+        with pytest.raises(KeyError, match='a b'):
+            validate({'it\'s "key"': 1, 'items': [{}]})
@@ -0,0 +1,112 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import homework
+from checkpoint import CheckpointStore
+from statuses import StatusIndex
+from utils import MockBot
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoint.sqlite3'))
+    yield store
+    store.close()
+
+
+class TestStatusIndex:
+
+    def test_only_transitions_are_sent(self, store):
+        checkpoint = store.for_tenant('alice')
+        bot = MockBot()
+        history = ['reviewing', 'reviewing', 'rejected', 'reviewing',
+                   'approved', 'approved']
+
+        for status in history:
+            item = {'id': 1, 'homework_name': 'hw', 'status': status}
+            homework.deliver_status(bot, 1, item, status, checkpoint)
+
+        assert bot.messages == ['reviewing', 'rejected', 'reviewing',
+                                'approved'], (
+            'Сообщение должно отправляться только при смене статуса'
+        )
+        assert store.index.stats()['suppressed'] == 2
+
+    def test_concurrent_copies_sent_once(self, store):
+        checkpoint = store.for_tenant('alice')
+        bot = MockBot(delay=0.05)
+        item = {'id': 1, 'homework_name': 'hw', 'status': 'approved'}
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(
+                lambda _: homework.deliver_status(
+                    bot, 1, dict(item), 'approved', checkpoint
+                ),
+                range(8),
+            ))
+
+        assert bot.messages == ['approved'], (
+            'Параллельные копии одного статуса не должны дублироваться'
+        )
+
+    def test_failed_send_releases_status(self, store):
+        checkpoint = store.for_tenant('alice')
+        item = {'id': 1, 'homework_name': 'hw', 'status': 'approved'}
+        homework.deliver_status(
+            MockBot(), 1, dict(item, status='reviewing'), 'reviewing',
+            checkpoint
+        )
+
+        with pytest.raises(IOError):
+            homework.deliver_status(
+                MockBot(fail=True), 1, item, 'approved', checkpoint
+            )
+
+        assert store.index.last_status('alice', '1') == 'reviewing', (
+            'После ошибки отправки должен вернуться прежний статус'
+        )
+        bot = MockBot()
+        assert homework.deliver_status(bot, 1, item, 'approved', checkpoint)
+        assert bot.messages == ['approved']
+
+    def test_bounded_and_backed_by_store(self, store):
+        index = StatusIndex(store, maxsize=2)
+        for key in ('a', 'b', 'c'):
+            index.record('alice', key, 'approved')
+
+        assert index.stats()['size'] == 2, (
+            'Индекс не должен превышать заданный размер'
+        )
+        assert not index.is_transition('alice', 'a', 'approved'), (
+            'Вытесненный статус должен читаться из хранилища'
+        )
+        assert index.stats()['misses'] == 1
+        assert not index.is_transition('alice', 'a', 'approved')
+        assert index.stats()['hits'] == 1
+
+    def test_forget_tenants(self, store):
+        index = StatusIndex(store, maxsize=3)
+        for tenant in ('alice', 'bob', 'carol'):
+            index.record(tenant, '1', 'approved')
+        index.record('alice', '2', 'approved')
+
+        index.forget(['alice', 'bob'])
+
+        assert list(index.entries) == [('carol', '1')], (
+            'Должны забываться только работы переданных пользователей'
+        )
+        assert index.by_tenant == {'carol': {'1'}}, (
+            'Вытеснение и удаление должны обновлять индекс по пользователям'
+        )
+
+    def test_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'checkpoint.sqlite3')
+        store = CheckpointStore(path)
+        store.index.record('alice', '1', 'reviewing')
+        store.close()
+
+        store = CheckpointStore(path)
+        assert store.index.last_status('alice', '1') == 'reviewing'
+        assert store.index.last_status('alice', '2') is None
+        store.close()
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+import requests
+
+from streaming import HomeworkStream, stream_homeworks
+
+HOMEWORKS = [
+    {'id': index, 'homework_name': f'hw{index}', 'status': 'approved',
+     'reviewer_comment': 'Всё нравится' * index}
+    for index in range(50)
+]
+
+
+def split(data, size):
+    raw = json.dumps(data, ensure_ascii=False).encode()
+    return [raw[index:index + size] for index in range(0, len(raw), size)]
+
+
+class TestHomeworkStream:
+
+    @pytest.mark.parametrize('size', [1, 3, 64, 100000])
+    def test_chunks(self, size):
+        data = {'homeworks': HOMEWORKS, 'extra': [1, {'a': 2}],
+                'current_date': 1234567890}
+        stream = HomeworkStream(split(data, size))
+
+        assert list(stream) == HOMEWORKS, (
+            'Проверьте, что работы разбираются при любом делении на части'
+        )
+        assert stream.current_date == 1234567890
+
+    def test_current_date_before_homeworks(self):
+        stream = HomeworkStream(split(
+            {'current_date': 5, 'homeworks': HOMEWORKS[:2]}, 7
+        ))
+
+        assert list(stream) == HOMEWORKS[:2]
+        assert stream.current_date == 5
+
+    @pytest.mark.parametrize('data, error', [
+        ([], TypeError),
+        ({'current_date': 1}, KeyError),
+        ({'homeworks': []}, KeyError),
+        ({'homeworks': {}, 'current_date': 1}, TypeError),
+        ({'homeworks': [], 'current_date': '1'}, TypeError),
+        ({'homeworks': [{'status': 'approved'}], 'current_date': 1},
+         KeyError),
+        ({'homeworks': [{'homework_name': 'hw', 'status': 'unknown'}],
+          'current_date': 1}, KeyError),
+    ])
+    def test_invalid_response(self, data, error):
+        with pytest.raises(error):
+            list(HomeworkStream(split(data, 4)))
+
+    def test_invalid_json(self):
+        with pytest.raises(ValueError):
+            list(HomeworkStream([b'{"homeworks": [{"a" 1}]}']))
+
+    def test_stream_homeworks(self, monkeypatch):
+        closed = []
+
+        class Response:
+            status_code = 200
+
+            def iter_content(self, chunk_size):
+                return split({'homeworks': HOMEWORKS, 'current_date': 1}, 10)
+
+            def close(self):
+                closed.append(True)
+
+        def get(url, params=None, stream=False, **kwargs):
+            assert stream, 'Тело ответа должно читаться потоком'
+            assert params == {'from_date': 0}
+            return Response()
+
+        monkeypatch.setattr(requests, 'get', get)
+
+        assert list(stream_homeworks('token', 0)) == HOMEWORKS
+        assert closed, 'После чтения ответ должен закрываться'
@@ -0,0 +1,290 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import Counter
+
+import pytest
+
+import engine
+import homework
+from checkpoint import CheckpointStore
+from outbox import TELEGRAM_RATE, Outbox
+from supervisor import (
+    HashRing, Supervisor, collect_checkpoints, worker_checkpoint_path,
+)
+from tenants import Tenant
+from utils import MockBot
+
+NAMES = [f'tenant-{index}' for index in range(2000)]
+
+
+def fake_worker(worker_id, control):
+    owned = set()
+    while True:
+        command, payload = control.recv()
+        if command == 'stop':
+            return
+        if command == 'acquire':
+            owned.update(tenant.name for tenant, _ in payload)
+        elif command == 'release':
+            owned.difference_update(payload)
+            control.send(('released', payload))
+        control.send(('statuses', (worker_id, sorted(owned), True)))
+
+
+def chatty_worker(worker_id, control):
+    payload = [f'{index}' * 1000 for index in range(2000)]
+    control.send(('statuses', (worker_id, payload, False)))
+    fake_worker(worker_id, control)
+
+
+def share_worker(worker_id, control):
+    while True:
+        command, payload = control.recv()
+        if command == 'stop':
+            return
+        if command == 'release':
+            control.send(('released', payload))
+        elif command == 'share':
+            control.send(('statuses', (worker_id, payload, True)))
+
+
+class Shards:
+
+    def __init__(self):
+        self.owned = {}
+
+    def update(self, worker_id, names, complete=False):
+        self.owned[worker_id] = names
+
+
+class TestHashRing:
+
+    def test_balance(self):
+        ring = HashRing(range(4))
+        counts = Counter(ring.owner(name) for name in NAMES)
+        assert set(counts) == {0, 1, 2, 3}
+        assert max(counts.values()) < 1.5 * len(NAMES) / 4, (
+            'Пользователи должны распределяться примерно поровну'
+        )
+
+    def test_minimal_movement(self):
+        ring = HashRing(range(4))
+        before = {name: ring.owner(name) for name in NAMES}
+
+        ring.add(4)
+        after = {name: ring.owner(name) for name in NAMES}
+        moved = [name for name in NAMES if before[name] != after[name]]
+        assert all(after[name] == 4 for name in moved), (
+            'Переезжать должны только пользователи нового узла'
+        )
+        assert len(moved) < 0.3 * len(NAMES)
+
+        ring.remove(2)
+        final = {name: ring.owner(name) for name in NAMES}
+        assert all(
+            final[name] == after[name] for name in NAMES if after[name] != 2
+        ), 'При потере узла переезжают только его пользователи'
+
+
+class TestHandoff:
+
+    def test_worker_checkpoint_path(self):
+        assert worker_checkpoint_path(3, 'data/checkpoint.sqlite3') == (
+            os.path.join('data', 'checkpoint-3.sqlite3')
+        )
+
+    def test_collect_checkpoints(self, tmp_path):
+        paths = [str(tmp_path / f'checkpoint-{index}.sqlite3')
+                 for index in range(2)]
+        for path, cursor, status in zip(
+            paths, (10, 20), ('reviewing', 'approved')
+        ):
+            store = CheckpointStore(path)
+            store.save_cursor('alice', cursor)
+            store.mark_delivered('alice', 'hw', status)
+            store.close()
+
+        latest = collect_checkpoints(['alice', 'bob'], paths)
+
+        assert latest == {'alice': (20, {'hw': 'approved'})}, (
+            'Передаваться должна самая свежая контрольная точка'
+        )
+
+    def test_worker_commands(self, monkeypatch, tmp_path):
+        polled = []
+
+        def fetch_statuses(practicum_token, current_timestamp, transport,
+                           locale):
+            polled.append((practicum_token, current_timestamp))
+            return current_timestamp + 1, []
+
+        monkeypatch.setattr(homework, 'fetch_statuses', fetch_statuses)
+        supervisor_end, worker_end = multiprocessing.Pipe()
+        store = CheckpointStore(str(tmp_path / 'checkpoint.sqlite3'))
+        alice = Tenant('alice', 'token', '1')
+
+        async def drive():
+            task = asyncio.create_task(engine.run(
+                [], None, store=store, interval=0.01, control=worker_end
+            ))
+            supervisor_end.send(
+                ('acquire', [(alice, {'alice': (100, {'hw': 'approved'})})])
+            )
+            while not polled:
+                await asyncio.sleep(0.01)
+            supervisor_end.send(('release', ['alice']))
+            while not supervisor_end.poll():
+                await asyncio.sleep(0.01)
+            reply = supervisor_end.recv()
+            supervisor_end.send(('stop', None))
+            with pytest.raises(engine.WorkerStopped):
+                await task
+            return reply
+
+        reply = asyncio.run(drive())
+
+        assert polled[0] == ('token', 100), (
+            'Новый владелец должен продолжить с переданного курсора'
+        )
+        assert reply == ('released', ['alice'])
+        assert store.load_cursor('alice') > 100, (
+            'Перед передачей курсор должен быть зафиксирован'
+        )
+        assert store.load_status('alice', 'hw') == 'approved'
+        store.close()
+
+
+    def test_control_channel_does_not_block(self):
+        supervisor_end, worker_end = multiprocessing.Pipe()
+        channel = engine.ControlChannel(worker_end)
+        payload = [f'{index}' * 1000 for index in range(2000)]
+        started = time.monotonic()
+
+        channel.send(('statuses', payload))
+        channel.send(('released', ['alice']))
+
+        assert time.monotonic() - started < 0.5, (
+            'Отправка супервизору не должна ждать, пока он читает канал'
+        )
+        assert supervisor_end.recv() == ('statuses', payload)
+        assert supervisor_end.recv() == ('released', ['alice'])
+        channel.close()
+
+
+class TestSupervisor:
+
+    def wait_for(self, supervisor, condition, timeout=30):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline, 'Превышено время ожидания'
+            supervisor.step(0.05)
+
+    def test_rebalance(self, tmp_path):
+        tenants = [Tenant(name, name, name) for name in NAMES[:200]]
+        shards = Shards()
+        supervisor = Supervisor(
+            tenants, workers=2, target=fake_worker, cache=shards,
+            restart_delay=0, checkpoint_path=str(tmp_path / 'c.sqlite3'),
+        )
+
+        def consistent():
+            return all(
+                shards.owned.get(worker_id) == supervisor.shard(worker_id)
+                for worker_id in supervisor.workers
+            )
+
+        try:
+            supervisor.start()
+            self.wait_for(supervisor, consistent)
+            before = dict(supervisor.owners)
+
+            supervisor.scale(3)
+            self.wait_for(supervisor, consistent)
+            moved = [
+                name for name in before
+                if supervisor.owners[name] != before[name]
+            ]
+            assert moved and all(
+                supervisor.owners[name] == 2 for name in moved
+            ), 'Новому обработчику переходят только его пользователи'
+
+            lost = supervisor.workers[0].process
+            lost.kill()
+            lost.join()
+            self.wait_for(
+                supervisor,
+                lambda: 0 in supervisor.workers and consistent()
+                and supervisor.shard(0),
+            )
+            assert supervisor.owners == {
+                name: supervisor.ring.owner(name) for name in before
+            }, 'После перезапуска пользователи должны вернуться владельцам'
+        finally:
+            supervisor.stop()
+        assert not supervisor.workers
+
+
+    def test_large_handoff_while_worker_writes(self, tmp_path):
+        tenants = [Tenant(name, name * 100, name) for name in NAMES]
+        shards = Shards()
+        supervisor = Supervisor(
+            tenants, workers=1, target=chatty_worker, cache=shards,
+            restart_delay=0, checkpoint_path=str(tmp_path / 'c.sqlite3'),
+        )
+
+        try:
+            supervisor.start()
+            self.wait_for(
+                supervisor, lambda: shards.owned.get(0) == supervisor.shard(0)
+            )
+        finally:
+            supervisor.stop()
+
+    def test_limits_are_shared(self, tmp_path):
+        shares = Shards()
+        supervisor = Supervisor(
+            [Tenant('alice', 'token', '1')], workers=3, target=share_worker,
+            cache=shares, restart_delay=0,
+            checkpoint_path=str(tmp_path / 'c.sqlite3'),
+        )
+
+        def total_rate(workers):
+            return len(supervisor.workers) == workers and sum(
+                TELEGRAM_RATE / shares.owned.get(worker_id, 1)
+                for worker_id in supervisor.workers
+            ) == pytest.approx(TELEGRAM_RATE)
+
+        try:
+            supervisor.start()
+            self.wait_for(supervisor, lambda: total_rate(3))
+            supervisor.scale(4)
+            self.wait_for(supervisor, lambda: total_rate(4))
+            supervisor.scale(2)
+            self.wait_for(supervisor, lambda: total_rate(2))
+        finally:
+            supervisor.stop()
+
+    def test_shared_rate_bounds_total_sends(self, monkeypatch):
+        monkeypatch.setattr(engine, 'TELEGRAM_RATE', 40)
+        runtimes = [
+            engine.Runtime(Outbox(MockBot(), chat_rate=1000), None)
+            for _ in range(2)
+        ]
+        for runtime in runtimes:
+            engine.share_limits(runtime, len(runtimes))
+        started = time.monotonic()
+
+        futures = [
+            runtime.bot.submit(chat_id, 'msg')
+            for runtime in runtimes for chat_id in range(21)
+        ]
+        for future in futures:
+            future.result()
+
+        assert time.monotonic() - started >= 0.9, (
+            'Все обработчики вместе не должны превышать TELEGRAM_RATE'
+        )
+        for runtime in runtimes:
+            runtime.bot.close()
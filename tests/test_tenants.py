@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+import homework
+import tenants
+
+
+class TestTenants:
+
+    def test_load_tenants_from_file(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'name': 'alice', 'practicum_token': 't1', 'chat_id': 1},
+            {'practicum_token': 't2', 'chat_id': '2'},
+        ]))
+
+        result = tenants.load_tenants(str(path))
+
+        assert result == [
+            tenants.Tenant('alice', 't1', '1'),
+            tenants.Tenant('2', 't2', '2'),
+        ], 'Проверьте загрузку пользователей из файла'
+
+    def test_load_tenants_from_env(self, monkeypatch):
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', 42)
+
+        result = tenants.load_tenants(None)
+
+        assert result == [tenants.Tenant('42', 'token', '42')], (
+            'Без файла пользователей должен использоваться один '
+            'пользователь из переменных окружения'
+        )
+
+    def test_load_tenants_without_env(self, monkeypatch):
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', None)
+
+        assert tenants.load_tenants(None) == []
+
+    @pytest.mark.parametrize('entry, error', [
+        ([], TypeError),
+        ({'chat_id': 1}, KeyError),
+        ({'practicum_token': 't'}, KeyError),
+    ])
+    def test_parse_tenant_invalid(self, entry, error):
+        with pytest.raises(error):
+            tenants.parse_tenant(entry)
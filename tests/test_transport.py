@@ -0,0 +1,94 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import homework
+from transport import Transport
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'homeworks': [], 'current_date': 1}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    connections = 0
+
+    def get_request(self):
+        self.connections += 1
+        return super().get_request()
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = CountingServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    monkeypatch.setattr(
+        homework, 'ENDPOINT', f'http://{host}:{port}/homework_statuses/'
+    )
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestTransport:
+
+    def test_connection_reused(self, server):
+        transport = Transport()
+
+        for _ in range(5):
+            response = homework.fetch_api_answer(1, 'token', transport)
+
+        transport.close()
+        assert response == {'homeworks': [], 'current_date': 1}
+        assert server.connections == 1, (
+            'Проверьте, что транспорт переиспользует соединение'
+        )
+
+    def test_default_timeout(self, monkeypatch):
+        transport = Transport(connect_timeout=1, read_timeout=2)
+        calls = []
+
+        def get(url, **kwargs):
+            calls.append(kwargs)
+            response = requests.Response()
+            response.status_code = 200
+            return response
+
+        monkeypatch.setattr(transport.session, 'get', get)
+
+        transport.get('http://example.com')
+
+        assert calls == [{'timeout': (1, 2)}], (
+            'Проверьте, что транспорт задает таймауты по умолчанию'
+        )
+
+    def test_connection_error(self, monkeypatch):
+        monkeypatch.setattr(homework, 'ENDPOINT', 'http://127.0.0.1:9/')
+        transport = Transport(connect_timeout=0.5)
+
+        with pytest.raises(IOError):
+            homework.fetch_api_answer(1, 'token', transport)
+
+    def test_without_transport_uses_requests_get(self, monkeypatch):
+        def get(url, **kwargs):
+            raise requests.ConnectionError('нет сети')
+
+        monkeypatch.setattr(requests, 'get', get)
+
+        with pytest.raises(IOError, match='нет сети'):
+            homework.fetch_api_answer(1, 'token')
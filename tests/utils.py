@@ -1,3 +1,6 @@
+import random
+import threading
+import time
 from inspect import signature
 from types import ModuleType
 
@@ -37,3 +40,28 @@ def check_default_var_exists(scope: ModuleType, var_name: str) -> None:
         f'{var_name} должна быть переменной, а не функцией.'
     )
 
+
+class MockBot:
+    """Заглушка бота: запоминает отправленные сообщения.
+
+    Может отвечать с задержкой delay (плюс случайная до jitter секунд) и
+    падать на всех сообщениях (fail) или только на текстах из failing.
+    В messages попадают тексты, в sent — пары (чат, текст).
+    """
+
+    def __init__(self, delay=0, fail=False, failing=(), jitter=0):
+        self.messages = []
+        self.sent = []
+        self.delay = delay
+        self.fail = fail
+        self.failing = set(failing)
+        self.jitter = jitter
+        self.lock = threading.Lock()
+
+    def send_message(self, chat_id, text):
+        time.sleep(self.delay + random.uniform(0, self.jitter))
+        if self.fail or text in self.failing:
+            raise IOError('Ошибка')
+        with self.lock:
+            self.messages.append(text)
+            self.sent.append((chat_id, text))
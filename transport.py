@@ -0,0 +1,102 @@
+import os
+import threading
+from functools import partial
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import deadlines
+from breakers import CircuitBreaker
+
+CONNECT_TIMEOUT = float(os.getenv('CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('READ_TIMEOUT', 30))
+POOL_HOSTS = int(os.getenv('POOL_HOSTS', 4))
+POOL_MAXSIZE = int(os.getenv('POOL_MAXSIZE', 32))
+
+
+class Transport:
+    """HTTP-транспорт с общим пулом соединений keep-alive.
+
+    Один экземпляр разделяется между всеми опросами и пользователями:
+    соединение с хостом переиспользуется, а число одновременных
+    соединений с одним хостом ограничено pool_maxsize. С breakers=True
+    запросы к каждому хосту идут через общий автомат защиты. Если задан
+    responses (ResponseCache), ответы API берутся через него, а если
+    задан hedger (Hedger) — медленные GET-запросы дублируются. Таймауты
+    не выходят за срок итерации из deadlines.
+    """
+
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT,
+                 read_timeout=READ_TIMEOUT, pool_hosts=POOL_HOSTS,
+                 pool_maxsize=POOL_MAXSIZE, breakers=True, responses=None,
+                 hedger=None):
+        """Создает сессию с пулом соединений и таймаутами."""
+        self.timeout = (connect_timeout, read_timeout)
+        self.responses = responses
+        self.hedger = hedger
+        self.breakers = {} if breakers else None
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_hosts,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url, **kwargs):
+        """Выполняет GET-запрос через пул соединений.
+
+        Потоковые запросы не дублируются.
+        """
+        attempt = partial(self._attempt, self.session.get, url, **kwargs)
+        if self.hedger is None or kwargs.get('stream'):
+            return attempt()
+        return self.hedger.call(attempt)
+
+    def post(self, url, **kwargs):
+        """Выполняет POST-запрос через пул соединений."""
+        return self._attempt(self.session.post, url, **kwargs)
+
+    def breaker(self, url):
+        """Возвращает автомат защиты хоста url или None."""
+        if self.breakers is None:
+            return None
+        host = urlsplit(url).netloc
+        with self.lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = self.breakers[host] = CircuitBreaker(host)
+        return breaker
+
+    def close(self):
+        """Закрывает все соединения пула, кеш ответов и пул копий."""
+        self.session.close()
+        if self.responses is not None:
+            self.responses.close()
+        if self.hedger is not None:
+            self.hedger.close()
+
+    def _attempt(self, send, url, **kwargs):
+        kwargs.setdefault('timeout', deadlines.timeout(*self.timeout))
+        try:
+            return self._guarded(send, url, **kwargs)
+        except requests.Timeout as error:
+            if deadlines.expired():
+                raise deadlines.exceeded() from error
+            raise
+
+    def _guarded(self, send, url, **kwargs):
+        breaker = self.breaker(url)
+        if breaker is None:
+            return send(url, **kwargs)
+        generation = breaker.allow()
+        try:
+            response = send(url, **kwargs)
+        except Exception:
+            breaker.record(True, generation)
+            raise
+        breaker.record(breaker.failed(response.status_code), generation)
+        return response